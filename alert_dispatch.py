@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提醒分发
+扫描线程只把提醒放入队列立即返回；后台分发线程合并同一股票短时间内的多条提醒，
+按单只股票间隔和全局每分钟上限限流后，投递给各个输出渠道（控制台、文件、Webhook、GUI弹窗）
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_COALESCE_SECONDS = 2.0   # 同一股票的提醒等待合并的时间
+DEFAULT_SYMBOL_INTERVAL = 60.0   # 同一股票两次投递的最小间隔（秒）
+DEFAULT_MAX_PER_MINUTE = 20      # 每分钟最多投递的提醒数，超出部分汇总为一条
+SUMMARY_CODE = '*'               # 汇总提醒的股票代码
+SUMMARY_MAX_LINES = 20
+
+
+class Alert:
+    """一条（可能由多条合并而成的）提醒"""
+
+    __slots__ = ('stock_name', 'stock_code', 'messages', 'timestamp')
+
+    def __init__(self, stock_name: str, stock_code: str, messages: List[str], timestamp: int):
+        self.stock_name = stock_name
+        self.stock_code = stock_code
+        self.messages = messages
+        self.timestamp = timestamp
+
+    def merge(self, messages: List[str]):
+        """合并新的提醒内容（去掉重复的行）"""
+        for message in messages:
+            if message not in self.messages:
+                self.messages.append(message)
+
+    def text(self) -> str:
+        return f"【{self.stock_name} ({self.stock_code})】\n\n" + "\n".join(self.messages)
+
+    def to_dict(self) -> Dict:
+        return {'name': self.stock_name, 'code': self.stock_code,
+                'messages': self.messages, 'timestamp': self.timestamp}
+
+
+class ConsoleSink:
+    """输出到控制台（GUI模式下进入日志区域）"""
+
+    def deliver(self, alert: Alert):
+        print(f"\n!!! 提醒 !!!\n{alert.text()}\n")
+
+
+class FileSink:
+    """每条提醒追加一行JSON到文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def deliver(self, alert: Alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert.to_dict(), ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """以JSON POST到Webhook地址（本地可用 mock_server.py 的 /webhook 代替）"""
+
+    def __init__(self, url: str, timeout: float = 5):
+        import requests
+
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def deliver(self, alert: Alert):
+        self.session.post(self.url, json=alert.to_dict(), timeout=self.timeout).raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class MainThreadSink:
+    """转交给GUI主线程的渠道：deliver只入队，由主线程定时调用poll取出并显示"""
+
+    def __init__(self, show: Callable[[Alert], None]):
+        self.show = show
+        self.queue = queue.SimpleQueue()
+
+    def deliver(self, alert: Alert):
+        self.queue.put(alert)
+
+    def poll(self):
+        """在主线程中调用，显示队列中的全部提醒"""
+        while True:
+            try:
+                alert = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            self.show(alert)
+
+
+class AlertDispatcher:
+    """提醒分发器
+
+    submit 在任意线程调用且不阻塞。分发线程中：
+      - 同一股票在 coalesce_seconds 内的提醒合并为一条；
+      - 同一股票距上次投递不足 symbol_interval 时继续合并，到期后一并投递；
+      - 每分钟投递超过 max_per_minute 条时，其余提醒汇总为一条“多只股票”提醒，待有余量时投递。
+    """
+
+    def __init__(self, sinks: Optional[List] = None, coalesce_seconds: float = DEFAULT_COALESCE_SECONDS,
+                 symbol_interval: float = DEFAULT_SYMBOL_INTERVAL, max_per_minute: int = DEFAULT_MAX_PER_MINUTE):
+        self.sinks = list(sinks or [])
+        self.coalesce_seconds = coalesce_seconds
+        self.symbol_interval = symbol_interval
+        self.max_per_minute = max_per_minute
+        self.stats = {'submitted': 0, 'delivered': 0, 'coalesced': 0, 'summarized': 0, 'sink_errors': 0}
+        self._queue = queue.SimpleQueue()
+        self._pending: Dict[str, Alert] = {}
+        self._ready_at: Dict[str, float] = {}
+        self._last_delivered: Dict[str, float] = {}
+        self._recent = deque()  # 最近一分钟内的投递时间
+        self._summary: Optional[Alert] = None
+        self._summary_count = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+
+    def submit(self, stock_name: str, stock_code: str, messages: List[str]):
+        """提交一条提醒（立即返回）"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='alert-dispatch', daemon=True)
+                    self._thread.start()
+        self._queue.put(Alert(stock_name, stock_code, list(messages), int(time.time())))
+
+    def _add(self, alert: Alert, now: float):
+        self.stats['submitted'] += 1
+        pending = self._pending.get(alert.stock_code)
+        if pending is None:
+            self._pending[alert.stock_code] = alert
+            ready = now + self.coalesce_seconds
+            last = self._last_delivered.get(alert.stock_code)
+            if last is not None:
+                ready = max(ready, last + self.symbol_interval)
+            self._ready_at[alert.stock_code] = ready
+        else:
+            pending.merge(alert.messages)
+            self.stats['coalesced'] += 1
+
+    def _deliver(self, alert: Alert):
+        for sink in self.sinks:
+            try:
+                sink.deliver(alert)
+            except Exception as e:
+                self.stats['sink_errors'] += 1
+                print(f"提醒投递失败 ({type(sink).__name__}): {str(e)}")
+        self.stats['delivered'] += 1
+
+    def _take_slot(self, now: float) -> bool:
+        """全局限流：最近60秒内的投递数未达上限时占用一个名额"""
+        while self._recent and now - self._recent[0] >= 60:
+            self._recent.popleft()
+        if self.max_per_minute and len(self._recent) >= self.max_per_minute:
+            return False
+        self._recent.append(now)
+        return True
+
+    def _add_to_summary(self, alert: Alert):
+        self._summary_count += 1
+        self.stats['summarized'] += 1
+        if self._summary is None:
+            self._summary = Alert('多只股票', SUMMARY_CODE, [], alert.timestamp)
+        if len(self._summary.messages) < SUMMARY_MAX_LINES:
+            self._summary.messages.append(f"{alert.stock_name}({alert.stock_code}): {alert.messages[0]}")
+
+    def _flush_ready(self, now: float, force: bool = False):
+        """投递已到期的提醒；force时忽略合并等待和限流（停止时使用）"""
+        if self._summary is not None and (force or self._take_slot(now)):
+            summary, count = self._summary, self._summary_count
+            if count > len(summary.messages):
+                summary.messages.append(f"... 共{count}只股票触发提醒")
+            self._summary, self._summary_count = None, 0
+            self._deliver(summary)
+
+        for code in [code for code, ready in self._ready_at.items() if force or ready <= now]:
+            alert = self._pending.pop(code)
+            del self._ready_at[code]
+            if force or self._take_slot(now):
+                self._last_delivered[code] = now
+                self._deliver(alert)
+            else:
+                self._add_to_summary(alert)
+
+    def _next_wakeup(self, now: float) -> float:
+        deadlines = list(self._ready_at.values())
+        if self._summary is not None and self._recent:
+            deadlines.append(self._recent[0] + 60)
+        return max(min(deadlines) - now, 0.01) if deadlines else 0.5
+
+    def _run(self):
+        while True:
+            # 把队列中已有的提醒一次取完再投递，便于合并；None 表示停止
+            batch = []
+            try:
+                batch.append(self._queue.get(timeout=self._next_wakeup(time.monotonic())))
+                while True:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            now = time.monotonic()
+            for alert in batch:
+                if alert is not None:
+                    self._add(alert, now)
+            if any(alert is None for alert in batch):
+                break
+            self._flush_ready(now)
+        self._flush_ready(time.monotonic(), force=True)
+
+    def close(self, timeout: float = 5):
+        """投递剩余提醒后停止分发线程，并关闭各渠道（之后再submit会重新启动分发线程）"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=timeout)
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+声明式提醒规则
+规则在配置中以表达式描述，例如:
+  {"name": "放量上涨", "when": "change_percent > 3 and volume > 2x avg_volume_20", "cooldown": 1800}
+加载时解析并编译为NumPy列运算，每轮扫描对整个自选股一次性求值；同一规则同一股票在冷却时间内只提醒一次
+
+表达式可用:
+  - 行情字段: price, change, change_percent, volume, turnover, high, low, open, prev_close, code
+  - 分析结果: score（综合评分）, news_important（本轮新增新闻的标题含 news.keywords 中的关键词）
+  - avg_volume_N: 最近N个交易日的平均成交量
+  - volume_ratio: 量比，当日开盘以来平均每分钟成交量 / 最近5个交易日平均每分钟成交量
+  - 运算: and / or / not, 比较（可连写）, + - * /, in [...], abs() / min() / max()
+  - "2x" 是 "2 *" 的简写
+"""
+
+import ast
+import operator
+import re
+import string
+from functools import partial
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_COOLDOWN = 600  # 同一规则同一股票两次提醒的最小间隔（秒）
+
+QUOTE_FIELDS = ('price', 'change', 'change_percent', 'volume', 'turnover', 'high', 'low', 'open', 'prev_close')
+FIELDS = frozenset(QUOTE_FIELDS + ('code', 'score', 'news_important', 'volume_ratio'))
+DETAIL_FIELDS = ('buy_signals', 'sell_signals')  # 只能用于 message / details 的列表字段
+AVG_VOLUME_FIELD = re.compile(r'^avg_volume_(\d+)$')
+VOLUME_RATIO_DAYS = 5  # 量比的基准天数
+_MULTIPLIER = re.compile(r'(?<![\w.])(\d+(?:\.\d+)?)x\b')  # 独立的数字加x（如 2x），不匹配 abc2x、0x10
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+}
+_COMPARE_OPS = {
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+}
+_FUNCTIONS = {
+    'abs': np.abs,
+    'min': np.minimum,
+    'max': np.maximum,
+}
+
+
+def _as_bool(value):
+    return np.asarray(value, dtype=bool)
+
+
+class AlertRule:
+    """一条编译后的提醒规则"""
+
+    def __init__(self, name: str, when: str, message: Optional[str] = None,
+                 cooldown: float = DEFAULT_COOLDOWN, details: Optional[str] = None):
+        self.name = name
+        self.when = when
+        self.message = message or name
+        self.cooldown = cooldown
+        self.details = details  # 附加逐行列出的字段（如 buy_signals）
+        self.fields = set()
+        for _, field, _, _ in string.Formatter().parse(self.message):
+            if field:
+                self.fields.add(self._check_field(field, DETAIL_FIELDS))
+        if details:
+            self.fields.add(self._check_field(details, DETAIL_FIELDS))
+        try:
+            tree = ast.parse(_MULTIPLIER.sub(r'\1 *', when), mode='eval')
+        except SyntaxError as e:
+            raise ValueError(f"规则 {name} 表达式语法错误: {e.msg}") from None
+        self._evaluate = self._compile(tree.body)
+
+    def _check_field(self, name: str, extra=()) -> str:
+        if name not in FIELDS and name not in extra and not AVG_VOLUME_FIELD.match(name):
+            raise ValueError(f"规则 {self.name} 中的未知字段: {name}")
+        return name
+
+    def _compile(self, node):
+        """把表达式语法树编译为 列字典 -> 数组 的函数"""
+        if isinstance(node, ast.BoolOp):
+            parts = [self._compile(value) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            def bool_op(columns):
+                result = _as_bool(parts[0](columns))
+                for part in parts[1:]:
+                    result = combine(result, _as_bool(part(columns)))
+                return result
+            return bool_op
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._compile(node.operand)
+            if isinstance(node.op, ast.Not):
+                return lambda columns: ~_as_bool(operand(columns))
+            if isinstance(node.op, ast.USub):
+                return lambda columns: -operand(columns)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            op = _BINARY_OPS[type(node.op)]
+            left, right = self._compile(node.left), self._compile(node.right)
+            def binary_op(columns):
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    return op(left(columns), right(columns))
+            return binary_op
+
+        if isinstance(node, ast.Compare):
+            return self._compile_compare(node)
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS \
+                and not node.keywords:
+            func = _FUNCTIONS[node.func.id]
+            args = [self._compile(arg) for arg in node.args]
+            if not 1 <= len(args) <= 2 or (func is np.abs) != (len(args) == 1):
+                raise ValueError(f"规则 {self.name} 中 {node.func.id}() 参数个数错误")
+            return lambda columns: func(*(arg(columns) for arg in args))
+
+        if isinstance(node, ast.Name):
+            name = self._check_field(node.id)
+            self.fields.add(name)
+            return lambda columns: columns[name]
+
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str, bool)):
+            value = node.value
+            return lambda columns: value
+
+        raise ValueError(f"规则 {self.name} 中不支持的语法: {type(node).__name__}")
+
+    def _compile_compare(self, node: ast.Compare):
+        operands = [self._compile(node.left)]
+        ops = []
+        for op, comparator in zip(node.ops, node.comparators):
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)) or \
+                        not all(isinstance(item, ast.Constant) for item in comparator.elts):
+                    raise ValueError(f"规则 {self.name} 中 in 的右侧必须是常量列表")
+                values = [item.value for item in comparator.elts]
+                ops.append(partial(np.isin, invert=isinstance(op, ast.NotIn)))
+                operands.append(lambda columns, values=values: values)
+            elif type(op) in _COMPARE_OPS:
+                ops.append(_COMPARE_OPS[type(op)])
+                operands.append(self._compile(comparator))
+            else:
+                raise ValueError(f"规则 {self.name} 中不支持的比较: {type(op).__name__}")
+
+        def compare(columns):
+            values = [operand(columns) for operand in operands]
+            result = None
+            for i, op in enumerate(ops):
+                part = _as_bool(op(values[i], values[i + 1]))
+                result = part if result is None else result & part
+            return result
+        return compare
+
+    def matches(self, columns: Dict[str, Any], n_rows: int) -> np.ndarray:
+        """对整列求值，返回每行是否满足规则"""
+        return np.broadcast_to(_as_bool(self._evaluate(columns)), (n_rows,))
+
+    def render(self, columns: Dict[str, Any], row: int) -> List[str]:
+        """生成第row行的提醒文字"""
+        values = {name: column[row] for name, column in columns.items()}
+        lines = [self.message.format(**values)]
+        if self.details:
+            lines.extend(f"  - {item}" for item in values.get(self.details) or [])
+        return lines
+
+
+class AlertRuleSet:
+    """一组提醒规则及其冷却状态"""
+
+    def __init__(self, rules: Iterable[AlertRule]):
+        self.rules = list(rules)
+        self.fields = set().union(*(rule.fields for rule in self.rules))
+        windows = {int(AVG_VOLUME_FIELD.match(field).group(1))
+                   for field in self.fields if AVG_VOLUME_FIELD.match(field)}
+        if 'volume_ratio' in self.fields:
+            windows.add(VOLUME_RATIO_DAYS)
+        self.volume_windows = sorted(windows)
+        self._last_fired: Dict[tuple, float] = {}
+
+    def inherit_cooldowns(self, previous: 'AlertRuleSet', removed_codes: Iterable[str] = ()):
+        """重新加载规则后沿用旧规则集的冷却状态（按规则名称），已移出自选股的股票不再保留"""
+        names = {rule.name for rule in self.rules}
+        removed = set(removed_codes)
+        self._last_fired = {key: fired for key, fired in previous._last_fired.items()
+                            if key[0] in names and key[1] not in removed}
+
+    def evaluate(self, columns: Dict[str, Any], now: float) -> Dict[int, List[str]]:
+        """对所有行求值，返回 行号 -> 提醒文字（已去掉冷却中的提醒）
+
+        columns 中 code 列为股票代码，其余为规则用到的字段；details 引用的字段可以是普通列表。
+        """
+        codes = columns['code']
+        alerts: Dict[int, List[str]] = {}
+        for rule in self.rules:
+            for row in np.flatnonzero(rule.matches(columns, len(codes))):
+                key = (rule.name, str(codes[row]))
+                last = self._last_fired.get(key)
+                if last is not None and now - last < rule.cooldown:
+                    continue
+                self._last_fired[key] = now
+                alerts.setdefault(int(row), []).extend(rule.render(columns, row))
+        return dict(sorted(alerts.items()))
+
+
+def default_rules(alert_conditions: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """由 alert_conditions 生成内置规则（价格异动、成交量异动、买卖信号、重要新闻）
+
+    volume_threshold 为量比的百分比阈值（200 表示量比达到2），未配置时不生成成交量异动规则。
+    """
+    cooldown = alert_conditions.get('cooldown', DEFAULT_COOLDOWN)
+    rules = [
+        {'name': '价格异动', 'when': f"abs(change_percent) >= {alert_conditions['price_change_threshold']}",
+         'message': '价格异动: {change_percent:+.2f}%', 'cooldown': cooldown},
+        {'name': '买入信号', 'when': f"score >= {alert_conditions['buy_signal_threshold']}",
+         'message': '强烈买入信号! 评分: {score}', 'details': 'buy_signals', 'cooldown': cooldown},
+        {'name': '卖出信号', 'when': f"score <= {alert_conditions['sell_signal_threshold']}",
+         'message': '强烈卖出信号! 评分: {score}', 'details': 'sell_signals', 'cooldown': cooldown},
+        {'name': '重要新闻', 'when': 'news_important', 'message': '发现重要新闻!', 'cooldown': cooldown},
+    ]
+    if 'volume_threshold' in alert_conditions:
+        ratio = alert_conditions['volume_threshold'] / 100
+        rules.insert(1, {'name': '成交量异动', 'when': f"volume_ratio >= {ratio}",
+                         'message': '成交量异动: 量比 {volume_ratio:.2f}', 'cooldown': cooldown})
+    return rules
+
+
+def compile_rule(config: Dict[str, Any]) -> AlertRule:
+    """编译一条规则配置，表达式无效时抛出ValueError"""
+    if 'when' not in config:
+        raise ValueError(f"规则缺少 when 表达式: {config}")
+    return AlertRule(config.get('name') or config['when'], config['when'], config.get('message'),
+                     config.get('cooldown', DEFAULT_COOLDOWN), config.get('details'))
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程技术分析
+把价格矩阵写入共享内存，按行分片交给多个工作进程用批量指标引擎计算，
+每个进程只返回各信号的紧凑数组（评分、信号标志、RSI和J值，以及启用时的ATR、OBV），不传递价格列表
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from batch_indicators import VALUE_FIELDS, analyze_matrix
+
+# 工作进程返回的字段（build_signals 需要的全部内容）
+RESULT_FIELDS = ('score', 'ma_bull', 'ma_bear', 'rsi_oversold', 'rsi_overbought',
+                 'macd_golden', 'macd_dead', 'kdj_oversold', 'kdj_overbought',
+                 'boll_oversold', 'boll_overbought', 'rsi', 'j')  # 另加启用的 VALUE_FIELDS（ATR、OBV）
+MIN_SHARD_ROWS = 64  # 每个分片至少的股票数，太小时进程间通信开销大于计算
+
+# 工作进程中已连接的共享内存（按名称缓存，父进程换新块后关闭旧的）
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    block = _attached.get(name)
+    if block is None:
+        for old in _attached.values():
+            old.close()
+        _attached.clear()
+        # 工作进程与父进程共用资源跟踪器，共享内存由父进程负责释放
+        block = _attached[name] = shared_memory.SharedMemory(name=name)
+    return block
+
+
+def compact_result(result: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """只保留构建信号所需的字段，并压缩为小类型（未启用的RSI、KDJ的数值补0，未启用的ATR、OBV不返回）"""
+    compact = {name: result[name] if name in result else np.zeros(len(result['score'])) for name in RESULT_FIELDS}
+    compact.update((name, result[name]) for name in VALUE_FIELDS if name in result)
+    compact['score'] = compact['score'].astype(np.int8)
+    return compact
+
+
+def analyze_shard(name: str, shape: tuple, start: int, stop: int,
+                  enabled: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """在工作进程中分析共享内存中第 start~stop 行股票（依次为收盘价、最高价、最低价、成交量矩阵）"""
+    block = _attach(name)
+    prices = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    closes, highs, lows, volumes = (prices[i, start:stop] for i in range(4))
+    return compact_result(analyze_matrix(closes, highs, lows, enabled, volumes))
+
+
+class AnalysisPool:
+    """按股票分片的多进程分析执行器
+
+    共享内存块在多轮扫描间复用，只有价格矩阵变大时才重新分配；
+    股票数不足以分成两个分片时直接在当前进程计算。
+    """
+
+    def __init__(self, workers: int, min_shard_rows: int = MIN_SHARD_ROWS):
+        self.workers = workers
+        self.min_shard_rows = min_shard_rows
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def _buffer(self, shape: tuple) -> np.ndarray:
+        size = int(np.prod(shape)) * np.dtype(np.float64).itemsize
+        if self._shm is None or self._shm.size < size:
+            self._release_buffer()
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        return np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf)
+
+    def _release_buffer(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def analyze(self, closes, highs, lows, enabled: Optional[Sequence[str]] = None,
+                volumes=None) -> Dict[str, np.ndarray]:
+        """分析 股票 × K线 的价格矩阵（enabled 为启用的指标，volumes 为成交量矩阵，OBV 用到），
+        返回与 analyze_matrix 相同字段（仅 RESULT_FIELDS 和启用的 VALUE_FIELDS）的数组"""
+        closes = np.asarray(closes, dtype=np.float64)
+        n_symbols = closes.shape[0]
+        n_shards = min(self.workers, n_symbols // self.min_shard_rows)
+        if n_shards <= 1:
+            return compact_result(analyze_matrix(closes, highs, lows, enabled, volumes))
+
+        shape = (4,) + closes.shape
+        prices = self._buffer(shape)
+        prices[0], prices[1], prices[2] = closes, highs, lows
+        prices[3] = 0 if volumes is None else volumes
+
+        if self._executor is None:
+            # 监控进程中有多个线程，使用spawn避免fork继承锁状态
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        bounds = np.linspace(0, n_symbols, n_shards + 1).astype(int)
+        futures = [self._executor.submit(analyze_shard, self._shm.name, shape, start, stop, enabled)
+                   for start, stop in zip(bounds[:-1], bounds[1:])]
+        parts = [future.result() for future in futures]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def shutdown(self):
+        """关闭工作进程并释放共享内存"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._release_buffer()
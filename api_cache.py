@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API缓存层
+为变化缓慢的接口（盘面信息、新闻）提供分接口TTL、LRU淘汰与过期后先返回旧值再后台刷新
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+# 缓存默认参数（可在 config.json 的 cache 中覆盖）
+DEFAULT_TTLS = {
+    'market_info': 3600,  # 盘面信息（PE/PB、股本）
+    'news': 300,          # 新闻
+}
+DEFAULT_STALE_TTL = 600
+DEFAULT_MAX_ENTRIES = 10000
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class TTLCache:
+    """线程安全的TTL + LRU缓存
+
+    超过ttl但未超过ttl+stale_ttl的条目视为"陈旧"，仍可返回；再之后视为未命中。
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = DEFAULT_STALE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._data: 'OrderedDict[Any, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'refresh_errors': 0}
+
+    def get(self, key) -> tuple:
+        """返回 (值, 状态)，状态为 fresh / stale / miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None, MISS
+            value, stored_at = entry
+            age = now - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._data[key]
+                self.stats['misses'] += 1
+                return None, MISS
+            self._data.move_to_end(key)
+            if age > self.ttl:
+                self.stats['stale_hits'] += 1
+                return value, STALE
+            self.stats['hits'] += 1
+            return value, FRESH
+
+    def set(self, key, value):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def count(self, event: str):
+        """累加一项计数（与其他计数一样在锁内修改，可在后台刷新线程中调用）"""
+        with self._lock:
+            self.stats[event] += 1
+
+    def discard(self, key):
+        """删除缓存条目"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_matching(self, predicate):
+        """删除键满足条件的全部条目"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CachedAPI:
+    """TongHuaShunAPI的缓存包装，未缓存的方法直接转发给原API"""
+
+    def __init__(self, api, ttls: Optional[Dict[str, float]] = None,
+                 stale_ttl: float = DEFAULT_STALE_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.api = api
+        ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.caches = {endpoint: TTLCache(ttl, stale_ttl, max_entries) for endpoint, ttl in ttls.items()}
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor: Optional[ThreadPoolExecutor] = None  # 首次后台刷新时创建，close 后再刷新会重新创建
+        self._news_since: Dict[tuple, Optional[int]] = {}  # (股票代码, limit) -> 当前缓存的新闻游标
+
+    def __getattr__(self, name):
+        return getattr(self.api, name)
+
+    def _refresh(self, endpoint: str, keys: List, fetch):
+        """后台刷新陈旧条目，同一条目同时只刷新一次"""
+        with self._refresh_lock:
+            keys = [key for key in keys if (endpoint, key) not in self._refreshing]
+            self._refreshing.update((endpoint, key) for key in keys)
+            if not keys:
+                return
+            if self._refresh_executor is None:
+                self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+            executor = self._refresh_executor
+
+        def run():
+            cache = self.caches[endpoint]
+            try:
+                for key, value in fetch(keys).items():
+                    cache.set(key, value)
+            except Exception:
+                # 刷新失败时保留旧值，等待下次再试
+                cache.count('refresh_errors')
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update((endpoint, key) for key in keys)
+
+        executor.submit(run)
+
+    def get_market_infos(self, stock_codes: List[str], chunk_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """批量获取盘面信息，只向接口请求未命中的股票"""
+        cache = self.caches['market_info']
+        result = {}
+        missing, stale = [], []
+        for stock_code in dict.fromkeys(stock_codes):
+            value, state = cache.get(stock_code)
+            if state == MISS:
+                missing.append(stock_code)
+            else:
+                result[stock_code] = value
+                if state == STALE:
+                    stale.append(stock_code)
+
+        if missing:
+            fetched = self.api.get_market_infos(missing, chunk_size)
+            for stock_code, value in fetched.items():
+                cache.set(stock_code, value)
+            result.update(fetched)
+        if stale:
+            self._refresh('market_info', stale,
+                          lambda codes: self.api.get_market_infos(codes, chunk_size))
+
+        return {stock_code: result[stock_code] for stock_code in stock_codes if stock_code in result}
+
+    def get_market_info(self, stock_code: str) -> Dict[str, Any]:
+        """获取盘面信息"""
+        return self.get_market_infos([stock_code])[stock_code]
+
+    def get_news(self, stock_code: str, limit: int = 5, since: Optional[int] = None) -> List[Dict[str, str]]:
+        """获取股票新闻（游标since是缓存键的一部分）
+
+        每只股票只保留当前游标的条目：游标前进后删除旧游标的条目，不留给LRU淘汰。
+        """
+        cache = self.caches['news']
+        key = (stock_code, limit, since)
+        value, state = cache.get(key)
+        if state == MISS:
+            value = self.api.get_news(stock_code, limit, since)
+            cache.set(key, value)
+            previous = self._news_since.get((stock_code, limit), since)
+            self._news_since[(stock_code, limit)] = since
+            if previous != since:
+                cache.discard((stock_code, limit, previous))
+        elif state == STALE:
+            self._refresh('news', [key],
+                          lambda keys: {k: self.api.get_news(*k) for k in keys})
+        return value
+
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """各接口的命中/未命中计数"""
+        return {endpoint: dict(cache.stats, size=len(cache)) for endpoint, cache in self.caches.items()}
+
+    def invalidate(self, stock_code: str):
+        """删除一只股票的全部缓存"""
+        self.caches['market_info'].discard(stock_code)
+        self.caches['news'].discard_matching(lambda key: key[0] == stock_code)
+        for key in [key for key in self._news_since if key[0] == stock_code]:
+            del self._news_since[key]
+
+    def close(self):
+        """停止后台刷新线程（正在进行的刷新完成后退出）"""
+        with self._refresh_lock:
+            executor, self._refresh_executor = self._refresh_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+信号回测引擎
+用与 analyze_buy_sell_signals 相同的评分规则回放历史日K线，统计交易、收益、回撤和胜率。
+指标与评分沿时间轴一次性向量化计算，股票按分片交给多个进程并行处理。
+
+交易规则（只做多）:
+  - 收盘评分 >= buy_score（默认5，即STRONG BUY）时，次日开盘买入
+  - 收盘评分 <= sell_score（默认-2，即SELL/STRONG SELL）时，次日开盘卖出
+  - 每次买入、卖出按 cost 比例扣除交易成本
+  - 组合为所有已上市股票等权（每日再平衡）
+
+用法:
+  python backtest.py --symbols 1000 --days 2500            # 模拟数据
+  python backtest.py --bar-path data/bars --codes 600000,000001
+  python backtest.py --symbols 5000 --days 2500 --workers 8 --trades trades.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import partial
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from batch_indicators import indicator_series, score_series
+from bar_store import BarStore, date_to_int, int_to_date, previous_trading_day, trading_days_between
+from seeded_api import generate_bars, DEFAULT_SEED
+
+DEFAULT_BUY_SCORE = 5       # STRONG BUY
+DEFAULT_SELL_SCORE = -2     # SELL 及以下
+DEFAULT_COST = 0.0015       # 单边交易成本（佣金、印花税、滑点的近似）
+DEFAULT_SHARD_SIZE = 250    # 每个进程任务处理的股票数
+TRADING_DAYS_PER_YEAR = 244
+
+
+def trading_calendar(days: int, end: date) -> np.ndarray:
+    """截至end（含）的最近days个交易日，YYYYMMDD整数数组"""
+    if end.weekday() >= 5:
+        end = previous_trading_day(end)
+    calendar = trading_days_between(end - timedelta(days=days * 7 // 5 + 7), end)[-days:]
+    return np.array([date_to_int(day) for day in calendar], dtype=np.int32)
+
+
+def load_bars(codes: List[str], calendar: np.ndarray, bar_path: Optional[str] = None,
+              seed: int = DEFAULT_SEED) -> Dict[str, Dict[str, np.ndarray]]:
+    """读取每只股票在回测区间内的K线（本地K线库或可复现的模拟数据）"""
+    if bar_path:
+        store = BarStore(bar_path)
+        return {code: store.read_bars(code) for code in codes}
+    end = int_to_date(calendar[-1])
+    return {code: generate_bars(code, len(calendar), end, seed) for code in codes}
+
+
+def align_bars(bars_by_code: Dict[str, Dict[str, np.ndarray]], calendar: np.ndarray) -> Dict[str, np.ndarray]:
+    """按交易日历对齐为 股票 × 交易日 的OHLC矩阵
+
+    上市前为NaN；上市后缺失的交易日视为停牌，以前收盘价填充且当天不产生价格变动。
+    """
+    n_symbols, n_days = len(bars_by_code), len(calendar)
+    matrices = {column: np.full((n_symbols, n_days), np.nan) for column in ('open', 'high', 'low', 'close')}
+    for row, bars in enumerate(bars_by_code.values()):
+        dates = np.asarray(bars['date'])
+        if len(dates) == 0:
+            continue
+        positions = np.searchsorted(calendar, dates)
+        in_range = positions < n_days
+        in_range[in_range] = calendar[positions[in_range]] == dates[in_range]
+        for column, matrix in matrices.items():
+            matrix[row, positions[in_range]] = np.asarray(bars[column])[in_range]
+
+    close = matrices['close']
+    missing = np.isnan(close)
+    last_valid = np.maximum.accumulate(np.where(missing, 0, np.arange(n_days)), axis=1)
+    filled = np.take_along_axis(close, last_valid, axis=1)
+    suspended = missing & ~np.isnan(filled)
+    for matrix in matrices.values():
+        matrix[suspended] = filled[suspended]
+    return matrices
+
+
+def score_matrix(matrices: Dict[str, np.ndarray]) -> np.ndarray:
+    """计算每只股票每个交易日收盘时的评分，上市时间相同的股票一起向量化计算"""
+    close = matrices['close']
+    scores = np.zeros(close.shape, dtype=np.int64)
+    listed = ~np.isnan(close)
+    first = np.where(listed.any(axis=1), listed.argmax(axis=1), -1)
+    for start in np.unique(first[first >= 0]):
+        rows = np.flatnonzero(first == start)
+        series = indicator_series(close[rows, start:], matrices['high'][rows, start:], matrices['low'][rows, start:])
+        scores[rows, start:] = score_series(series)['score']
+    return scores
+
+
+def positions_from_scores(scores: np.ndarray, buy_score: int = DEFAULT_BUY_SCORE,
+                          sell_score: int = DEFAULT_SELL_SCORE) -> np.ndarray:
+    """由收盘评分得到每个交易日（开盘后）的持仓，1为持有、0为空仓"""
+    n_symbols, n_days = scores.shape
+    target = np.where(scores >= buy_score, 1, np.where(scores <= sell_score, 0, -1))
+    # 没有新信号的日子沿用上一个信号（向前填充）
+    last_signal = np.maximum.accumulate(np.where(target >= 0, np.arange(n_days), -1), axis=1)
+    state = np.where(last_signal >= 0, np.take_along_axis(target, np.maximum(last_signal, 0), axis=1), 0)
+    held = np.zeros((n_symbols, n_days), dtype=np.int8)
+    held[:, 1:] = state[:, :-1]  # 收盘出信号，次日开盘成交
+    return held
+
+
+def daily_returns(held: np.ndarray, matrices: Dict[str, np.ndarray], cost: float = DEFAULT_COST) -> np.ndarray:
+    """每只股票每个交易日的策略收益：隔夜段按前一日持仓，日内段按当日持仓"""
+    open_, close = matrices['open'], matrices['close']
+    prev_close = np.empty_like(close)
+    prev_close[:, 0] = np.nan
+    prev_close[:, 1:] = close[:, :-1]
+    prev_held = np.zeros_like(held)
+    prev_held[:, 1:] = held[:, :-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        overnight = np.nan_to_num(open_ / prev_close - 1)
+        intraday = np.nan_to_num(close / open_ - 1)
+    returns = (1 + prev_held * overnight) * (1 + held * intraday) - 1
+    return returns - cost * np.abs(held - prev_held)
+
+
+def extract_trades(codes: List[str], calendar: np.ndarray, held: np.ndarray,
+                   matrices: Dict[str, np.ndarray], cost: float = DEFAULT_COST) -> List[Dict[str, Any]]:
+    """从持仓矩阵中提取每笔交易；回测结束时仍持有的按最后收盘价计算"""
+    n_days = held.shape[1]
+    changes = np.diff(held, axis=1, prepend=0, append=0)
+    entry_rows, entry_days = np.nonzero(changes == 1)
+    _, exit_days = np.nonzero(changes == -1)  # 按行优先排列，与买入一一对应
+
+    open_, close = matrices['open'], matrices['close']
+    entry_prices = open_[entry_rows, entry_days]
+    still_open = exit_days >= n_days
+    exit_prices = np.where(still_open, close[entry_rows, n_days - 1], open_[entry_rows, np.minimum(exit_days, n_days - 1)])
+    returns = exit_prices / entry_prices - 1 - cost * (2 - still_open)
+
+    return [
+        {
+            'code': codes[row],
+            'entry_date': int_to_date(calendar[entry]).isoformat(),
+            'entry_price': round(float(entry_price), 4),
+            'exit_date': int_to_date(calendar[min(exit_, n_days - 1)]).isoformat(),
+            'exit_price': round(float(exit_price), 4),
+            'return': float(ret),
+            'bars': int(exit_ - entry),
+            'open': bool(is_open),
+        }
+        for row, entry, exit_, entry_price, exit_price, ret, is_open in zip(
+            entry_rows, entry_days, exit_days, entry_prices, exit_prices, returns, still_open)
+    ]
+
+
+def backtest_shard(codes: List[str], calendar: np.ndarray, bar_path: Optional[str] = None,
+                   seed: int = DEFAULT_SEED, buy_score: int = DEFAULT_BUY_SCORE,
+                   sell_score: int = DEFAULT_SELL_SCORE, cost: float = DEFAULT_COST) -> Dict[str, Any]:
+    """回测一组股票（在子进程中运行），返回交易列表和可跨分片合并的逐日汇总"""
+    matrices = align_bars(load_bars(codes, calendar, bar_path, seed), calendar)
+    listed = ~np.isnan(matrices['close'])
+    held = positions_from_scores(score_matrix(matrices), buy_score, sell_score)
+    returns = np.where(listed, daily_returns(held, matrices, cost), 0.0)
+    return {
+        'trades': extract_trades(codes, calendar, held, matrices, cost),
+        'returns_sum': returns.sum(axis=0),
+        'listed': listed.sum(axis=0),
+        'held_days': int(held.sum()),
+        'symbol_days': int(listed.sum()),
+        'symbols': int(listed.any(axis=1).sum()),
+    }
+
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """最大回撤（正数比例）"""
+    if len(equity) == 0:
+        return 0.0
+    peaks = np.maximum.accumulate(np.maximum(equity, 1.0))
+    return float(np.max(1 - equity / peaks))
+
+
+def summarize(shards: List[Dict[str, Any]], calendar: np.ndarray) -> Dict[str, Any]:
+    """合并各分片结果，计算组合净值与统计指标"""
+    returns_sum = np.sum([shard['returns_sum'] for shard in shards], axis=0)
+    listed = np.sum([shard['listed'] for shard in shards], axis=0)
+    portfolio = np.divide(returns_sum, listed, out=np.zeros(len(calendar)), where=listed > 0)
+    equity = np.cumprod(1 + portfolio)
+
+    trades = [trade for shard in shards for trade in shard['trades']]
+    trade_returns = np.array([trade['return'] for trade in trades])
+    symbol_days = sum(shard['symbol_days'] for shard in shards)
+    years = len(calendar) / TRADING_DAYS_PER_YEAR
+    total_return = float(equity[-1] - 1) if len(equity) else 0.0
+    volatility = float(portfolio.std())
+
+    summary = {
+        'symbols': sum(shard['symbols'] for shard in shards),
+        'days': len(calendar),
+        'start': int_to_date(calendar[0]).isoformat() if len(calendar) else None,
+        'end': int_to_date(calendar[-1]).isoformat() if len(calendar) else None,
+        'trades': len(trades),
+        'hit_rate': float((trade_returns > 0).mean()) if len(trades) else 0.0,
+        'avg_trade_return': float(trade_returns.mean()) if len(trades) else 0.0,
+        'avg_holding_bars': float(np.mean([trade['bars'] for trade in trades])) if trades else 0.0,
+        'total_return': total_return,
+        'annualized_return': (1 + total_return) ** (1 / years) - 1 if years > 0 and total_return > -1 else 0.0,
+        'max_drawdown': max_drawdown(equity),
+        'sharpe': float(portfolio.mean() / volatility * np.sqrt(TRADING_DAYS_PER_YEAR)) if volatility > 0 else 0.0,
+        'exposure': sum(shard['held_days'] for shard in shards) / symbol_days if symbol_days else 0.0,
+    }
+    return {
+        'summary': summary,
+        'trades': trades,
+        'dates': [int_to_date(day).isoformat() for day in calendar],
+        'equity': equity.tolist(),
+    }
+
+
+def run_backtest(codes: List[str], days: int = 2500, end: Optional[date] = None, bar_path: Optional[str] = None,
+                 seed: int = DEFAULT_SEED, buy_score: int = DEFAULT_BUY_SCORE, sell_score: int = DEFAULT_SELL_SCORE,
+                 cost: float = DEFAULT_COST, workers: Optional[int] = None,
+                 shard_size: int = DEFAULT_SHARD_SIZE) -> Dict[str, Any]:
+    """回测全部股票：按shard_size分片，workers个进程并行（workers<=1时在当前进程运行）"""
+    calendar = trading_calendar(days, end or previous_trading_day(datetime.now().date()))
+    shards = [codes[i:i + shard_size] for i in range(0, len(codes), shard_size)]
+    task = partial(backtest_shard, calendar=calendar, bar_path=bar_path, seed=seed,
+                   buy_score=buy_score, sell_score=sell_score, cost=cost)
+
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if workers <= 1:
+        results = [task(shard) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(task, shards))
+    return summarize(results, calendar)
+
+
+def write_trades(trades: List[Dict[str, Any]], path: str):
+    """把交易明细保存为CSV"""
+    fields = ['code', 'entry_date', 'entry_price', 'exit_date', 'exit_price', 'return', 'bars', 'open']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(trades)
+
+
+def main(argv=None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='买卖信号回测')
+    parser.add_argument('--codes', help='股票代码，逗号分隔')
+    parser.add_argument('--symbols', type=int, default=100, help='未指定--codes时生成的模拟股票数')
+    parser.add_argument('--days', type=int, default=2500, help='回测交易日数')
+    parser.add_argument('--end', help='回测结束日期 YYYY-MM-DD（默认上一交易日）')
+    parser.add_argument('--bar-path', help='本地K线库目录（默认使用模拟数据）')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='模拟数据随机种子')
+    parser.add_argument('--buy-score', type=int, default=DEFAULT_BUY_SCORE, help='买入评分阈值')
+    parser.add_argument('--sell-score', type=int, default=DEFAULT_SELL_SCORE, help='卖出评分阈值')
+    parser.add_argument('--cost', type=float, default=DEFAULT_COST, help='单边交易成本比例')
+    parser.add_argument('--workers', type=int, default=None, help='进程数（默认CPU核数）')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help='每个进程任务的股票数')
+    parser.add_argument('--trades', help='交易明细CSV保存路径')
+    parser.add_argument('--output', help='汇总结果与净值曲线JSON保存路径')
+    args = parser.parse_args(argv)
+
+    codes = args.codes.split(',') if args.codes else [f'{600000 + i:06d}' for i in range(args.symbols)]
+    end = datetime.strptime(args.end, '%Y-%m-%d').date() if args.end else None
+
+    start = time.perf_counter()
+    result = run_backtest(codes, args.days, end, args.bar_path, args.seed, args.buy_score,
+                          args.sell_score, args.cost, args.workers, args.shard_size)
+    elapsed = time.perf_counter() - start
+
+    summary = result['summary']
+    print(f"回测区间: {summary['start']} ~ {summary['end']} ({summary['days']}个交易日, {summary['symbols']}只股票)")
+    print(f"交易次数: {summary['trades']}  胜率: {summary['hit_rate']:.2%}  "
+          f"平均每笔收益: {summary['avg_trade_return']:.2%}  平均持有: {summary['avg_holding_bars']:.1f}天")
+    print(f"总收益: {summary['total_return']:.2%}  年化收益: {summary['annualized_return']:.2%}  "
+          f"最大回撤: {summary['max_drawdown']:.2%}  夏普比率: {summary['sharpe']:.2f}  "
+          f"持仓比例: {summary['exposure']:.2%}")
+    print(f"耗时: {elapsed:.2f} 秒")
+
+    if args.trades:
+        write_trades(result['trades'], args.trades)
+        print(f"交易明细已保存到 {args.trades}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'dates': result['dates'], 'equity': result['equity']},
+                      f, ensure_ascii=False, indent=2)
+        print(f"汇总结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情聚合为K线
+把实时行情（轮询或推送）聚合为1分钟、5分钟和日K线（OHLCV）。每只股票每个周期一个固定容量的
+环形缓冲区，监控运行多久内存都不增长；技术分析直接读取缓冲区的连续视图，不复制数据。
+
+成交量: 行情中的 volume 是当日累计成交量，分钟K线的成交量为相邻两条行情的差值。
+某只股票当天收到的第一条行情只作为基准，不计入分钟K线（无法知道这部分成交分布在之前哪些分钟）；
+日K线的成交量直接取当日累计成交量。
+"""
+
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from bar_store import date_to_int
+from records import Quote
+
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+# 周期 -> K线秒数；分钟K线的 time 为开始时刻的时间戳，日K线按本机日期划分，time 为 YYYYMMDD
+TIMEFRAMES = {'1m': 60, '5m': 300, '1d': None}
+DEFAULT_CAPACITY = {'1m': 480, '5m': 480, '1d': 250}  # 1分钟约两个交易日，5分钟约十个交易日
+
+
+class RingBuffer:
+    """固定容量的环形缓冲区，每个字段一行 float64
+
+    每条记录同时写入位置 i 和 i + capacity，最近n条记录因此总是连续存放，
+    view 直接返回底层数组的只读切片，不需要拼接首尾两段。视图内容会被之后的写入改变，应在持有锁时用完。
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str] = FIELDS):
+        if capacity < 1:
+            raise ValueError(f"环形缓冲区容量必须大于0: {capacity}")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._index = {name: i for i, name in enumerate(self.fields)}
+        self._data = np.zeros((len(self.fields), 2 * capacity))
+        self._next = 0   # 下一条记录的写入位置
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, values: Sequence[float]):
+        """追加一条记录（按 fields 顺序），已满时覆盖最旧的记录"""
+        self._data[:, self._next] = values
+        self._data[:, self._next + self.capacity] = values
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def replace_last(self, values: Sequence[float]):
+        """覆盖最新一条记录（更新未完成的K线）"""
+        if not self._count:
+            raise IndexError("环形缓冲区为空")
+        position = (self._next - 1) % self.capacity
+        self._data[:, position] = values
+        self._data[:, position + self.capacity] = values
+
+    def last(self, field: str) -> float:
+        """最新一条记录的字段值"""
+        if not self._count:
+            raise IndexError("环形缓冲区为空")
+        return float(self._data[self._index[field], self._next + self.capacity - 1])
+
+    def view(self, field: Optional[str] = None, n: Optional[int] = None) -> np.ndarray:
+        """最近n条（默认全部）记录按时间顺序的只读视图；field为None时返回 (字段数, n) 的二维视图"""
+        n = self._count if n is None else min(n, self._count)
+        end = self._next + self.capacity
+        rows = slice(None) if field is None else self._index[field]
+        view = self._data[rows, end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+
+class BarAggregator:
+    """按股票和周期维护K线环形缓冲区
+
+    扫描线程和推送处理线程都会调用 update，读取视图时应持有 lock。
+    日K线需先用 load_daily 载入历史K线，之后 update 把实时行情作为当日未完成的K线更新。
+    """
+
+    def __init__(self, capacities: Optional[Dict[str, int]] = None):
+        self.capacities = {**DEFAULT_CAPACITY, **(capacities or {})}
+        self.lock = threading.RLock()
+        self.stats = {'quotes': 0, 'bars': 0, 'stale': 0}
+        self._buffers: Dict[tuple, RingBuffer] = {}
+        self._last_volume: Dict[str, tuple] = {}  # 股票代码 -> (日期, 累计成交量)
+
+    def buffer(self, stock_code: str, timeframe: str) -> Optional[RingBuffer]:
+        return self._buffers.get((stock_code, timeframe))
+
+    def bars(self, stock_code: str, timeframe: str, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """最近n根K线，返回 字段 -> 只读视图（没有数据时为空数组）"""
+        buffer = self._buffers.get((stock_code, timeframe))
+        if buffer is None:
+            return {field: np.empty(0) for field in FIELDS}
+        return {field: buffer.view(field, n) for field in FIELDS}
+
+    def has_daily(self, stock_code: str) -> bool:
+        return (stock_code, '1d') in self._buffers
+
+    def load_daily(self, stock_code: str, history: Dict[str, Sequence[float]]):
+        """载入历史日K线（列名 -> 数组，列与BarStore一致），替换该股票原有的日K线"""
+        columns = [np.asarray(history['date' if field == 'time' else field], dtype=np.float64) for field in FIELDS]
+        buffer = RingBuffer(self.capacities['1d'])
+        for row in np.array(columns).T[-buffer.capacity:]:
+            buffer.append(row)
+        with self.lock:
+            self._buffers[(stock_code, '1d')] = buffer
+
+    def drop(self, stock_code: str):
+        """释放该股票全部周期的K线"""
+        with self.lock:
+            for timeframe in TIMEFRAMES:
+                self._buffers.pop((stock_code, timeframe), None)
+            self._last_volume.pop(stock_code, None)
+
+    def clear_daily(self):
+        """丢弃全部日K线（跨交易日后重新载入历史）"""
+        with self.lock:
+            for key in [key for key in self._buffers if key[1] == '1d']:
+                del self._buffers[key]
+
+    def update(self, quote: Quote):
+        """把一条行情计入各周期K线"""
+        day = date_to_int(datetime.fromtimestamp(quote.timestamp).date())
+        with self.lock:
+            self.stats['quotes'] += 1
+            last_day, last_volume = self._last_volume.get(quote.code, (None, 0))
+            delta = quote.volume - last_volume if last_day == day and quote.volume >= last_volume else 0
+            self._last_volume[quote.code] = (day, quote.volume)
+
+            for timeframe, seconds in TIMEFRAMES.items():
+                if seconds is None:
+                    buffer = self._buffers.get((quote.code, timeframe))
+                    if buffer is not None:
+                        self._merge(buffer, day, (day, quote.open, quote.high, quote.low, quote.price, quote.volume))
+                    continue
+                key = (quote.code, timeframe)
+                buffer = self._buffers.get(key)
+                if buffer is None:
+                    buffer = self._buffers[key] = RingBuffer(self.capacities[timeframe])
+                start = quote.timestamp - quote.timestamp % seconds
+                bar = (start, quote.price, quote.price, quote.price, quote.price, delta)
+                if len(buffer) and buffer.last('time') == start:
+                    _, open_, high, low, _, volume = buffer.view(n=1)[:, 0]
+                    bar = (start, open_, max(high, quote.price), min(low, quote.price), quote.price, volume + delta)
+                self._merge(buffer, start, bar)
+
+    def _merge(self, buffer: RingBuffer, start: float, bar: tuple):
+        """更新当前K线或开始新K线；早于最新K线的行情（乱序）忽略"""
+        if not len(buffer) or start > buffer.last('time'):
+            buffer.append(bar)
+            self.stats['bars'] += 1
+        elif start == buffer.last('time'):
+            buffer.replace_last(bar)
+        else:
+            self.stats['stale'] += 1
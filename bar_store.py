@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线列式存储
+每只股票一个目录，OHLCV每列一个只追加的二进制文件，读取时通过内存映射零拷贝返回
+"""
+
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# 列名 -> 存储类型；日期以 YYYYMMDD 整数保存
+COLUMNS = {
+    'date': np.int32,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.float64,
+}
+
+
+def date_to_int(day: date) -> int:
+    """日期转换为 YYYYMMDD 整数"""
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def int_to_date(value: int) -> date:
+    """YYYYMMDD 整数转换为日期"""
+    value = int(value)
+    return date(value // 10000, value // 100 % 100, value % 100)
+
+
+def trading_days_between(start: date, end: date) -> List[date]:
+    """start(不含) 到 end(含) 之间的交易日（按工作日计算）"""
+    days = []
+    day = start + timedelta(days=1)
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def previous_trading_day(day: date) -> date:
+    """day之前的最近一个交易日（按工作日计算）"""
+    day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+class BarStore:
+    """按股票代码组织的只追加列式K线存储"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._maps: Dict[tuple, np.ndarray] = {}
+
+    def _path(self, stock_code: str, column: str) -> str:
+        return os.path.join(self.root, stock_code, f'{column}.bin')
+
+    def bar_count(self, stock_code: str) -> int:
+        """已存储的完整K线数（各列长度取最小值，忽略写入中断留下的残缺行）"""
+        counts = []
+        for column, dtype in COLUMNS.items():
+            path = self._path(stock_code, column)
+            if not os.path.exists(path):
+                return 0
+            counts.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        return min(counts)
+
+    def read(self, stock_code: str, column: str, last_n: Optional[int] = None) -> np.ndarray:
+        """读取一列数据的内存映射视图（只读，不复制）"""
+        count = self.bar_count(stock_code)
+        if count == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+
+        key = (stock_code, column)
+        with self._lock:
+            mapped = self._maps.get(key)
+            if mapped is None or len(mapped) < count:
+                mapped = np.memmap(self._path(stock_code, column), dtype=COLUMNS[column], mode='r')
+                self._maps[key] = mapped
+        view = mapped[:count]
+        return view if last_n is None else view[-last_n:]
+
+    def read_bars(self, stock_code: str, last_n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """读取全部列，返回 列名 -> 内存映射视图"""
+        return {column: self.read(stock_code, column, last_n) for column in COLUMNS}
+
+    def last_date(self, stock_code: str) -> Optional[date]:
+        """已存储的最新K线日期"""
+        dates = self.read(stock_code, 'date', 1)
+        return int_to_date(dates[0]) if len(dates) else None
+
+    def append(self, stock_code: str, bars: List[Dict]) -> int:
+        """追加K线（忽略不晚于已存储最新日期的K线），返回实际追加的条数"""
+        last = self.last_date(stock_code)
+        if last is not None:
+            last_value = date_to_int(last)
+            bars = [bar for bar in bars if bar['date'] > last_value]
+        if not bars:
+            return 0
+
+        os.makedirs(os.path.join(self.root, stock_code), exist_ok=True)
+        count = self.bar_count(stock_code)
+        for column, dtype in COLUMNS.items():
+            path = self._path(stock_code, column)
+            with open(path, 'ab') as f:
+                # 截掉上次写入中断留下的残缺行，保证各列对齐
+                f.truncate(count * np.dtype(dtype).itemsize)
+                f.write(np.array([bar[column] for bar in bars], dtype=dtype).tobytes())
+        return len(bars)
+
+    def replace(self, stock_code: str, bars: List[Dict]):
+        """丢弃已存储数据并整体重写（回看窗口变长需要补更早的历史时使用）"""
+        with self._lock:
+            for column in COLUMNS:
+                self._maps.pop((stock_code, column), None)
+                path = self._path(stock_code, column)
+                if os.path.exists(path):
+                    os.remove(path)
+        self.append(stock_code, bars)
+
+    def drop(self, stock_code: str):
+        """删除一只股票的全部数据"""
+        self.replace(stock_code, [])
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量技术指标引擎 - 基于NumPy
+输入为 股票数 × K线数 的二维价格矩阵，一次向量化计算全部股票的全部指标
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+from indicators import ATR_PERIOD, BOLL_PERIOD, BOLL_WIDTH, DEFAULT_INDICATORS, MIN_BARS, recommendation_for
+
+# 各指标的买入/卖出信号标志（score_indicators 的输出，未启用的指标全为False）
+SIGNAL_FLAGS = {
+    'ma': ('ma_bull', 'ma_bear'),
+    'rsi': ('rsi_oversold', 'rsi_overbought'),
+    'macd': ('macd_golden', 'macd_dead'),
+    'kdj': ('kdj_oversold', 'kdj_overbought'),
+    'boll': ('boll_oversold', 'boll_overbought'),
+}
+# 只输出数值、不参与打分的指标字段（build_signals 放在结果的 indicators 字段中）
+VALUE_FIELDS = ('atr', 'obv')
+
+
+def _as_matrix(prices) -> np.ndarray:
+    """转换为二维float64矩阵（股票 × K线）"""
+    matrix = np.asarray(prices, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2:
+        raise ValueError(f"价格矩阵必须是二维的，实际维度: {matrix.ndim}")
+    return matrix
+
+
+def batch_ma(closes: np.ndarray, period: int = 5) -> np.ndarray:
+    """批量计算移动平均线（最新值）"""
+    closes = _as_matrix(closes)
+    if closes.shape[1] < period:
+        return np.zeros(closes.shape[0])
+    return closes[:, -period:].mean(axis=1)
+
+
+def batch_rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    """批量计算RSI（最新值，Wilder平滑）"""
+    closes = _as_matrix(closes)
+    if closes.shape[1] < period + 1:
+        return np.full(closes.shape[0], 50.0)
+
+    diffs = np.diff(closes, axis=1)
+    gains = np.where(diffs > 0, diffs, 0.0)
+    losses = np.where(diffs > 0, 0.0, -diffs)
+
+    # 首个平均值取简单平均，之后沿时间轴递推（每步为整列运算）
+    avg_gain = gains[:, :period].mean(axis=1)
+    avg_loss = losses[:, :period].mean(axis=1)
+    for t in range(period, diffs.shape[1]):
+        avg_gain = (avg_gain * (period - 1) + gains[:, t]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[:, t]) / period
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        rsi = 100 - (100 / (1 + rs))
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+
+def batch_ema_series(closes: np.ndarray, period: int) -> np.ndarray:
+    """批量计算指数移动平均序列，形状为 股票数 × (K线数 - period + 1)
+
+    EMA在时间轴上是递推的，这里沿股票轴向量化，每根K线只做一次整列运算。
+    """
+    closes = _as_matrix(closes)
+    n_symbols, n_bars = closes.shape
+    if n_bars < period:
+        return np.empty((n_symbols, 0))
+
+    multiplier = 2 / (period + 1)
+    series = np.empty((n_symbols, n_bars - period + 1))
+    series[:, 0] = closes[:, :period].mean(axis=1)
+    for t in range(period, n_bars):
+        prev = series[:, t - period]
+        series[:, t - period + 1] = (closes[:, t] - prev) * multiplier + prev
+    return series
+
+
+def batch_ema(closes: np.ndarray, period: int) -> np.ndarray:
+    """批量计算指数移动平均（最新值）"""
+    closes = _as_matrix(closes)
+    if closes.shape[1] == 0:
+        return np.zeros(closes.shape[0])
+    if closes.shape[1] < period:
+        return closes[:, -1].copy()
+    return batch_ema_series(closes, period)[:, -1]
+
+
+def batch_macd(closes: np.ndarray, signal_period: int = 9) -> Dict[str, np.ndarray]:
+    """批量计算MACD指标"""
+    closes = _as_matrix(closes)
+    n_symbols = closes.shape[0]
+    if closes.shape[1] < 26:
+        zeros = np.zeros(n_symbols)
+        return {'macd': zeros, 'signal': zeros.copy(), 'histogram': zeros.copy()}
+
+    # ema_12 从第12根K线开始，ema_26 从第26根开始，对齐后相减
+    macd_series = batch_ema_series(closes, 12)[:, 14:] - batch_ema_series(closes, 26)
+
+    # 信号线为MACD线的EMA，以第一个MACD值为初始值
+    multiplier = 2 / (signal_period + 1)
+    signal_line = macd_series[:, 0]
+    for t in range(1, macd_series.shape[1]):
+        signal_line = (macd_series[:, t] - signal_line) * multiplier + signal_line
+
+    macd_line = macd_series[:, -1]
+    return {
+        'macd': macd_line,
+        'signal': signal_line,
+        'histogram': macd_line - signal_line
+    }
+
+
+def batch_kdj(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+              period: int = 9) -> Dict[str, np.ndarray]:
+    """批量计算KDJ指标"""
+    closes = _as_matrix(closes)
+    n_symbols = closes.shape[0]
+    if closes.shape[1] < period:
+        fifty = np.full(n_symbols, 50.0)
+        return {'k': fifty, 'd': fifty.copy(), 'j': fifty.copy()}
+
+    windows_low = np.lib.stride_tricks.sliding_window_view(_as_matrix(lows), period, axis=1)
+    windows_high = np.lib.stride_tricks.sliding_window_view(_as_matrix(highs), period, axis=1)
+    lowest_low = windows_low.min(axis=2)
+    highest_high = windows_high.max(axis=2)
+    spread = highest_high - lowest_low
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsv = (closes[:, period - 1:] - lowest_low) / spread * 100
+    rsv = np.where(spread == 0, 50.0, rsv)
+
+    # K、D为RSV的递推平滑，初始值50
+    k = np.full(n_symbols, 50.0)
+    d = np.full(n_symbols, 50.0)
+    for t in range(rsv.shape[1]):
+        k = k * 2 / 3 + rsv[:, t] / 3
+        d = d * 2 / 3 + k / 3
+    j = 3 * k - 2 * d
+    return {'k': k, 'd': d, 'j': j}
+
+
+def batch_boll(closes: np.ndarray, period: int = BOLL_PERIOD, width: float = BOLL_WIDTH) -> Dict[str, np.ndarray]:
+    """批量计算布林线（最新值，中轨为均线，上下轨为中轨加减width倍总体标准差）"""
+    closes = _as_matrix(closes)
+    if closes.shape[1] < period:
+        zeros = np.zeros(closes.shape[0])
+        return {'boll_mid': zeros, 'boll_upper': zeros.copy(), 'boll_lower': zeros.copy()}
+    window = closes[:, -period:]
+    mid = window.mean(axis=1)
+    std = window.std(axis=1)
+    return {'boll_mid': mid, 'boll_upper': mid + width * std, 'boll_lower': mid - width * std}
+
+
+def batch_atr(highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, period: int = ATR_PERIOD) -> np.ndarray:
+    """批量计算平均真实波幅（Wilder平均，逐列递推，与 indicators 的逐只计算逐位一致）"""
+    closes = _as_matrix(closes)
+    if closes.shape[1] < period:
+        return np.zeros(closes.shape[0])
+    highs, lows = _as_matrix(highs), _as_matrix(lows)
+    prev = closes[:, :-1]
+    ranges = np.concatenate((highs[:, :1] - lows[:, :1],
+                             np.maximum(highs[:, 1:] - lows[:, 1:],
+                                        np.maximum(abs(highs[:, 1:] - prev), abs(lows[:, 1:] - prev)))), axis=1)
+    total = np.zeros(closes.shape[0])
+    for t in range(period):
+        total = total + ranges[:, t]
+    atr = total / period
+    for t in range(period, ranges.shape[1]):
+        atr = (atr * (period - 1) + ranges[:, t]) / period
+    return atr
+
+
+def batch_obv(closes: np.ndarray, volumes: Optional[np.ndarray] = None) -> np.ndarray:
+    """批量计算能量潮（逐列累计，没有成交量时为0）"""
+    closes = _as_matrix(closes)
+    obv = np.zeros(closes.shape[0])
+    if volumes is None:
+        return obv
+    volumes = _as_matrix(volumes)
+    diffs = np.diff(closes, axis=1)
+    for t in range(diffs.shape[1]):
+        volume = volumes[:, t + 1]
+        obv = np.where(diffs[:, t] > 0, obv + volume, np.where(diffs[:, t] < 0, obv - volume, obv))
+    return obv
+
+
+def compute_indicators(closes, highs=None, lows=None,
+                       enabled: Optional[Sequence[str]] = None, volumes=None) -> Dict[str, np.ndarray]:
+    """一次性计算所有股票启用的指标（默认 MA、RSI、MACD、KDJ），返回 指标名 -> 每只股票的数值数组
+
+    volumes 为成交量矩阵，只有 OBV 用到，未提供时 OBV 为0。
+    """
+    closes = _as_matrix(closes)
+    highs = closes if highs is None else _as_matrix(highs)
+    lows = closes if lows is None else _as_matrix(lows)
+    if highs.shape != closes.shape or lows.shape != closes.shape:
+        raise ValueError("highs/lows 与 closes 的形状必须一致")
+    enabled = DEFAULT_INDICATORS if enabled is None else enabled
+
+    indicators = {'price': closes[:, -1] if closes.shape[1] else np.zeros(closes.shape[0])}
+    if 'ma' in enabled:
+        indicators.update(ma5=batch_ma(closes, 5), ma10=batch_ma(closes, 10), ma20=batch_ma(closes, 20))
+    if 'rsi' in enabled:
+        indicators['rsi'] = batch_rsi(closes)
+    if 'macd' in enabled:
+        indicators.update(batch_macd(closes))
+    if 'kdj' in enabled:
+        indicators.update(batch_kdj(highs, lows, closes))
+    if 'boll' in enabled:
+        indicators.update(batch_boll(closes))
+    if 'atr' in enabled:
+        indicators['atr'] = batch_atr(highs, lows, closes)
+    if 'obv' in enabled:
+        indicators['obv'] = batch_obv(closes, volumes)
+    return indicators
+
+
+def indicator_series(closes, highs=None, lows=None) -> Dict[str, np.ndarray]:
+    """计算每根K线收盘时的全部指标，返回 指标名 -> 股票数 × K线数 的矩阵
+
+    第t列等于 compute_indicators(closes[:, :t + 1]) 的结果，即截至该K线的全量计算值，
+    用于回测时按时间轴一次性得到每天的信号。
+    """
+    closes = _as_matrix(closes)
+    highs = closes if highs is None else _as_matrix(highs)
+    lows = closes if lows is None else _as_matrix(lows)
+    if highs.shape != closes.shape or lows.shape != closes.shape:
+        raise ValueError("highs/lows 与 closes 的形状必须一致")
+    n_symbols, n_bars = closes.shape
+    series = {'price': closes}
+
+    # 均线：累计和相减
+    cumsum = np.concatenate((np.zeros((n_symbols, 1)), np.cumsum(closes, axis=1)), axis=1)
+    for period in (5, 10, 20):
+        ma = np.zeros((n_symbols, n_bars))
+        if n_bars >= period:
+            ma[:, period - 1:] = (cumsum[:, period:] - cumsum[:, :-period]) / period
+        series[f'ma{period}'] = ma
+
+    # RSI：Wilder平滑沿时间轴递推，每步为整列运算
+    period = 14
+    rsi = np.full((n_symbols, n_bars), 50.0)
+    if n_bars >= period + 1:
+        diffs = np.diff(closes, axis=1)
+        gains = np.where(diffs > 0, diffs, 0.0)
+        losses = np.where(diffs > 0, 0.0, -diffs)
+        avg_gain = np.empty((n_symbols, n_bars - period))
+        avg_loss = np.empty((n_symbols, n_bars - period))
+        avg_gain[:, 0] = gains[:, :period].mean(axis=1)
+        avg_loss[:, 0] = losses[:, :period].mean(axis=1)
+        for t in range(1, n_bars - period):
+            avg_gain[:, t] = (avg_gain[:, t - 1] * (period - 1) + gains[:, t + period - 1]) / period
+            avg_loss[:, t] = (avg_loss[:, t - 1] * (period - 1) + losses[:, t + period - 1]) / period
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = 100 - (100 / (1 + avg_gain / avg_loss))
+        rsi[:, period:] = np.where(avg_loss == 0, 100.0, values)
+    series['rsi'] = rsi
+
+    # MACD：从第26根K线开始，信号线以第一个MACD值为初值
+    macd = np.zeros((n_symbols, n_bars))
+    signal = np.zeros((n_symbols, n_bars))
+    if n_bars >= 26:
+        macd[:, 25:] = batch_ema_series(closes, 12)[:, 14:] - batch_ema_series(closes, 26)
+        multiplier = 2 / (9 + 1)
+        signal[:, 25] = macd[:, 25]
+        for t in range(26, n_bars):
+            signal[:, t] = (macd[:, t] - signal[:, t - 1]) * multiplier + signal[:, t - 1]
+    series.update(macd=macd, signal=signal, histogram=macd - signal)
+
+    # KDJ
+    period = 9
+    k = np.full((n_symbols, n_bars), 50.0)
+    d = np.full((n_symbols, n_bars), 50.0)
+    if n_bars >= period:
+        lowest_low = np.lib.stride_tricks.sliding_window_view(lows, period, axis=1).min(axis=2)
+        highest_high = np.lib.stride_tricks.sliding_window_view(highs, period, axis=1).max(axis=2)
+        spread = highest_high - lowest_low
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsv = (closes[:, period - 1:] - lowest_low) / spread * 100
+        rsv = np.where(spread == 0, 50.0, rsv)
+        prev_k = np.full(n_symbols, 50.0)
+        prev_d = np.full(n_symbols, 50.0)
+        for t in range(rsv.shape[1]):
+            prev_k = k[:, t + period - 1] = prev_k * 2 / 3 + rsv[:, t] / 3
+            prev_d = d[:, t + period - 1] = prev_d * 2 / 3 + prev_k / 3
+    series.update(k=k, d=d, j=3 * k - 2 * d)
+    return series
+
+
+def score_indicators(indicators: Dict[str, np.ndarray], n_bars: int,
+                     enabled: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """对整个指标矩阵一次性打分，规则与 analyze_buy_sell_signals 相同（只对启用的指标打分）
+
+    返回各信号的布尔数组以及每只股票的总评分
+    """
+    enabled = DEFAULT_INDICATORS if enabled is None else enabled
+    no_signal = np.zeros(indicators['price'].shape, dtype=bool)
+    flags = {name: no_signal for names in SIGNAL_FLAGS.values() for name in names}
+    score = np.zeros(indicators['price'].shape, dtype=np.int64)
+    if n_bars < MIN_BARS:
+        flags['score'] = score
+        return flags
+
+    price = indicators['price']
+    # (指标, 买入条件, 卖出条件, 分值)；买入条件成立时不再判断卖出
+    rules = []
+    if 'ma' in enabled:
+        ma5, ma10, ma20 = indicators['ma5'], indicators['ma10'], indicators['ma20']
+        rules.append(('ma', (ma5 > ma10) & (ma10 > ma20) & (price > ma5),
+                      (ma5 < ma10) & (ma10 < ma20) & (price < ma5), 2))
+    if 'rsi' in enabled:
+        rules.append(('rsi', indicators['rsi'] < 30, indicators['rsi'] > 70, 3))
+    if 'macd' in enabled:
+        macd, signal, histogram = indicators['macd'], indicators['signal'], indicators['histogram']
+        rules.append(('macd', (histogram > 0) & (macd > signal), (histogram < 0) & (macd < signal), 2))
+    if 'kdj' in enabled:
+        rules.append(('kdj', indicators['j'] < 20, indicators['j'] > 80, 2))
+    if 'boll' in enabled:
+        rules.append(('boll', price < indicators['boll_lower'], price > indicators['boll_upper'], 2))
+
+    for name, buy, sell, points in rules:
+        buy_flag, sell_flag = SIGNAL_FLAGS[name]
+        flags[buy_flag] = buy
+        flags[sell_flag] = ~buy & sell
+        score = score + points * buy.astype(np.int64) - points * flags[sell_flag]
+    flags['score'] = score
+    return flags
+
+
+def score_series(series: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """对 indicator_series 的结果逐根K线打分，不足 MIN_BARS 根K线的列不产生信号"""
+    flags = score_indicators(series, MIN_BARS)
+    for values in flags.values():
+        values[:, :MIN_BARS - 1] = 0
+    return flags
+
+
+def analyze_matrix(closes, highs=None, lows=None, enabled: Optional[Sequence[str]] = None,
+                   volumes=None) -> Dict[str, np.ndarray]:
+    """批量分析整个价格矩阵（只计算启用的指标），返回指标与评分数组（不构建逐只股票的字典）"""
+    closes = _as_matrix(closes)
+    indicators = compute_indicators(closes, highs, lows, enabled, volumes)
+    result = dict(indicators)
+    result.update(score_indicators(indicators, closes.shape[1], enabled))
+    return result
+
+
+def build_signals(result: Dict[str, np.ndarray], row: int) -> Dict[str, Any]:
+    """从批量结果中取出一只股票，转换为 analyze_buy_sell_signals 的输出格式"""
+    buy_signals = []
+    sell_signals = []
+    if result['ma_bull'][row]:
+        buy_signals.append('均线多头排列')
+    elif result['ma_bear'][row]:
+        sell_signals.append('均线空头排列')
+    if result['rsi_oversold'][row]:
+        buy_signals.append(f"RSI超卖({result['rsi'][row]:.2f})")
+    elif result['rsi_overbought'][row]:
+        sell_signals.append(f"RSI超买({result['rsi'][row]:.2f})")
+    if result['macd_golden'][row]:
+        buy_signals.append('MACD金叉')
+    elif result['macd_dead'][row]:
+        sell_signals.append('MACD死叉')
+    if result['kdj_oversold'][row]:
+        buy_signals.append(f"KDJ超卖(J={result['j'][row]:.2f})")
+    elif result['kdj_overbought'][row]:
+        sell_signals.append(f"KDJ超买(J={result['j'][row]:.2f})")
+    if result['boll_oversold'][row]:
+        buy_signals.append('跌破布林线下轨')
+    elif result['boll_overbought'][row]:
+        sell_signals.append('突破布林线上轨')
+
+    score = int(result['score'][row])
+    signals = {
+        'buy_signals': buy_signals,
+        'sell_signals': sell_signals,
+        'score': score,
+        'recommendation': recommendation_for(score)
+    }
+    info = {name: float(result[name][row]) for name in VALUE_FIELDS if name in result}
+    if info:
+        signals['indicators'] = info
+    return signals
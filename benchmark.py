@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试
+使用可复现的模拟数据，测量各技术指标、综合分析和完整扫描在不同股票数和K线数下的耗时，
+结果保存为JSON，可与之前的结果对比以发现性能回退
+
+用法:
+  python benchmark.py                          # 完整规模 (10/1000/5000只 × 30/250/2500根)
+  python benchmark.py --quick                  # 快速规模
+  python benchmark.py --compare old.json       # 与之前的结果对比，有回退时退出码为1
+  python benchmark.py --no-startup             # 不测量启动耗时（新进程导入与 --once 单次扫描）
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from stock_monitor import StockAnalyzer, StockMonitor
+from batch_indicators import analyze_matrix, compute_indicators
+from bar_store import previous_trading_day
+from seeded_api import SeededAPI, generate_bars, DEFAULT_SEED
+
+SYMBOL_SIZES = (10, 1000, 5000)
+BAR_SIZES = (30, 250, 2500)
+QUICK_SYMBOL_SIZES = (10, 1000)
+QUICK_BAR_SIZES = (30, 250)
+DEFAULT_THRESHOLD = 0.2  # 耗时增加超过20%视为回退
+NOISE_FLOOR = 0.001      # 低于1毫秒的耗时不参与回退判断
+STARTUP_SYMBOLS = 10     # 启动基准中 --once 扫描的股票数
+STARTUP_REPEAT = 5
+
+
+def make_codes(n_symbols: int) -> List[str]:
+    """生成n只股票代码"""
+    return [f'{600000 + i:06d}' for i in range(n_symbols)]
+
+
+def make_matrices(codes: List[str], n_bars: int, seed: int = DEFAULT_SEED) -> Dict[str, np.ndarray]:
+    """生成 股票 × K线 的收盘/最高/最低价矩阵"""
+    end = previous_trading_day(datetime.now().date())
+    rows = [generate_bars(code, n_bars, end, seed) for code in codes]
+    return {column: np.vstack([row[column] for row in rows]) for column in ('close', 'high', 'low')}
+
+
+def time_call(func: Callable, repeat: int = 1) -> float:
+    """多次运行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _record(name: str, n_symbols: int, n_bars: int, seconds: float) -> Dict:
+    return {
+        'name': name,
+        'symbols': n_symbols,
+        'bars': n_bars,
+        'seconds': seconds,
+        'per_symbol_us': seconds / n_symbols * 1e6,
+    }
+
+
+def bench_indicators(n_symbols: int, n_bars: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    """逐只计算（StockAnalyzer）与批量计算（batch_indicators）的耗时"""
+    analyzer = StockAnalyzer()
+    matrices = make_matrices(make_codes(n_symbols), n_bars, seed)
+    closes = [row.tolist() for row in matrices['close']]
+    highs = [row.tolist() for row in matrices['high']]
+    lows = [row.tolist() for row in matrices['low']]
+    repeat = 3 if n_symbols * n_bars <= 250_000 else 1
+
+    scalar_cases = {
+        'calculate_ma': lambda: [analyzer.calculate_ma(p, 20) for p in closes],
+        'calculate_rsi': lambda: [analyzer.calculate_rsi(p) for p in closes],
+        '_calculate_ema': lambda: [analyzer._calculate_ema(p, 26) for p in closes],
+        'calculate_macd': lambda: [analyzer.calculate_macd(p) for p in closes],
+        'calculate_kdj': lambda: [analyzer.calculate_kdj(h, l, p) for h, l, p in zip(highs, lows, closes)],
+        'analyze_buy_sell_signals': lambda: [
+            analyzer.analyze_buy_sell_signals({'prices': p, 'highs': h, 'lows': l})
+            for h, l, p in zip(highs, lows, closes)
+        ],
+        'batch.compute_indicators': lambda: compute_indicators(matrices['close'], matrices['high'], matrices['low']),
+        'batch.analyze_matrix': lambda: analyze_matrix(matrices['close'], matrices['high'], matrices['low']),
+    }
+    return [_record(name, n_symbols, n_bars, time_call(func, repeat)) for name, func in scalar_cases.items()]
+
+
+def bench_scan(n_symbols: int, n_bars: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    """完整扫描耗时：首次扫描（需载入历史数据）与后续扫描"""
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'watchlist': make_codes(n_symbols),
+                'scan_interval': 3600,
+                'technical_analysis': {'history_days': max(n_bars, 30)},
+                'data_store': {'bar_path': ''},
+            }, f)
+
+        monitor = StockMonitor(config_file)
+        monitor.api = monitor.create_api(SeededAPI(seed=seed, batch_size=monitor.api.batch_size))
+        # 屏蔽弹窗和输出，只测量扫描本身
+        monitor.show_alert = lambda *args: None
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            cold = time_call(monitor.scan_stocks)
+            warm = time_call(monitor.scan_stocks)
+        monitor.stop_executors()
+
+    return [
+        _record('scan_stocks.cold', n_symbols, n_bars, cold),
+        _record('scan_stocks.warm', n_symbols, n_bars, warm),
+    ]
+
+
+def _run_process(command: List[str], cwd: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def bench_startup(repeat: int = STARTUP_REPEAT) -> List[Dict]:
+    """启动耗时（新解释器进程，取多次中的最短值）
+
+    startup.python 为空解释器基线；startup.import 为导入 stock_monitor；
+    startup.once 为 `stock_monitor.py --once` 扫描 STARTUP_SYMBOLS 只股票、写出结果并退出的总耗时。
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'watchlist': make_codes(STARTUP_SYMBOLS),
+                'scan_interval': 3600,
+                'data_store': {'bar_path': ''},
+                'metrics': {'file': ''},
+                'alert_dispatch': {'sinks': []},
+            }, f)
+        commands = {
+            'startup.python': (1, [sys.executable, '-c', 'pass']),
+            'startup.import': (1, [sys.executable, '-c', 'import stock_monitor']),
+            'startup.once': (STARTUP_SYMBOLS, [sys.executable, os.path.join(root, 'stock_monitor.py'), '--once',
+                                               '--config', config_file, '--output', os.path.join(tmp, 'scan.json')]),
+        }
+        return [_record(name, n_symbols, 0, min(_run_process(command, root) for _ in range(repeat)))
+                for name, (n_symbols, command) in commands.items()]
+
+
+def git_revision() -> Optional[str]:
+    """当前代码版本"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_benchmarks(symbol_sizes=SYMBOL_SIZES, bar_sizes=BAR_SIZES, scan: bool = True,
+                   seed: int = DEFAULT_SEED, verbose: bool = True, startup: bool = True) -> Dict:
+    """运行全部基准测试，返回可保存为JSON的结果"""
+    results = []
+    if startup:
+        for case in bench_startup():
+            if verbose:
+                print(f"  {case['name']:<28} {case['seconds'] * 1000:>10.2f} ms")
+            results.append(case)
+    for n_symbols in symbol_sizes:
+        for n_bars in bar_sizes:
+            cases = bench_indicators(n_symbols, n_bars, seed)
+            if scan:
+                cases += bench_scan(n_symbols, n_bars, seed)
+            for case in cases:
+                if verbose:
+                    print(f"  {case['name']:<28} {n_symbols:>5}只 × {n_bars:>4}根  "
+                          f"{case['seconds'] * 1000:>10.2f} ms  ({case['per_symbol_us']:.1f} µs/只)")
+            results.extend(cases)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = DEFAULT_THRESHOLD) -> List[Dict]:
+    """与基准结果对比，返回耗时增加超过阈值的用例"""
+    baseline_index = {(r['name'], r['symbols'], r['bars']): r['seconds'] for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        before = baseline_index.get((result['name'], result['symbols'], result['bars']))
+        if before is None or max(before, result['seconds']) < NOISE_FLOOR:
+            continue
+        ratio = result['seconds'] / before if before > 0 else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append(dict(result, baseline_seconds=before, ratio=ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    """主函数"""
+    parser = argparse.ArgumentParser(description='股票监控系统性能基准测试')
+    parser.add_argument('--quick', action='store_true', help='只运行较小规模')
+    parser.add_argument('--symbols', help='股票数，逗号分隔，例如 10,1000')
+    parser.add_argument('--bars', help='K线数，逗号分隔，例如 30,250')
+    parser.add_argument('--no-scan', action='store_true', help='不测量完整扫描')
+    parser.add_argument('--no-startup', action='store_true', help='不测量启动耗时')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='模拟数据随机种子')
+    parser.add_argument('--output', default='bench_results.json', help='结果保存路径')
+    parser.add_argument('--compare', help='与之前保存的结果对比')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='回退判定阈值（比例）')
+    args = parser.parse_args(argv)
+
+    symbol_sizes = QUICK_SYMBOL_SIZES if args.quick else SYMBOL_SIZES
+    bar_sizes = QUICK_BAR_SIZES if args.quick else BAR_SIZES
+    if args.symbols:
+        symbol_sizes = tuple(int(x) for x in args.symbols.split(','))
+    if args.bars:
+        bar_sizes = tuple(int(x) for x in args.bars.split(','))
+
+    print("运行基准测试...")
+    report = run_benchmarks(symbol_sizes, bar_sizes, scan=not args.no_scan, seed=args.seed,
+                            startup=not args.no_startup)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存到 {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回退 (阈值 {args.threshold:.0%}):")
+            for r in regressions:
+                print(f"  {r['name']} {r['symbols']}只 × {r['bars']}根: "
+                      f"{r['baseline_seconds'] * 1000:.2f} ms -> {r['seconds'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+            return 1
+        print("\n未发现性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
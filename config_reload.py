@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置热加载
+监控循环定期检查 config.json 的修改时间和大小，变化后重新读取、校验，并在两轮扫描之间应用：
+  - 自选股按差异处理：新增的股票下一轮扫描时才获取历史数据，移除的股票释放其状态，其余股票的状态保留；
+  - 阈值和提醒规则先在旁边编译好，再整体替换，扫描过程中看到的始终是同一套规则；
+  - 读取、校验、编译规则或应用失败时打印原因并保留原配置
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_RELOAD_INTERVAL = 2.0  # 检查配置文件是否修改的间隔（秒）
+
+STOCK_CODE = re.compile(r'\d{6}')
+REQUIRED_CONDITIONS = ('price_change_threshold', 'buy_signal_threshold', 'sell_signal_threshold')
+# 修改后需要重启才生效的配置（创建API、缓存、指标端点时读取）
+RESTART_REQUIRED = (('api_config', 'mode'), ('api_config', 'base_url'), ('api_config', 'batch_size'),
+                    ('data_store', 'bar_path'), ('cache', None), ('metrics', 'port'), ('scan_store', 'path'))
+# 影响扫描调度的配置
+SCHEDULE_KEYS = ('watchlist', 'scan_interval', 'schedule')
+
+
+class ConfigWatcher:
+    """轮询配置文件的修改时间和大小"""
+
+    def __init__(self, path: str, interval: float = DEFAULT_RELOAD_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._signature = self._stat()
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def changed(self) -> bool:
+        """自上次检查以来文件是否被修改（文件暂时不存在时不算修改，等写完再读）"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+
+def validate_config(config: Dict[str, Any]) -> List[str]:
+    """检查配置中会导致扫描出错的项，返回错误说明（为空表示有效）
+
+    只做类型和取值检查，不访问接口；上万只自选股也只需几毫秒。
+    """
+    errors = []
+    watchlist = config.get('watchlist')
+    if not isinstance(watchlist, list):
+        errors.append("watchlist 必须是股票代码列表")
+    else:
+        invalid = [code for code in watchlist if not isinstance(code, str) or not STOCK_CODE.fullmatch(code)]
+        if invalid:
+            errors.append(f"watchlist 中有 {len(invalid)} 个无效的股票代码，如 {invalid[0]!r}")
+    interval = config.get('scan_interval')
+    if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+        errors.append(f"scan_interval 必须是正数: {interval!r}")
+    conditions = config.get('alert_conditions')
+    if not isinstance(conditions, dict):
+        errors.append("alert_conditions 必须是对象")
+    else:
+        for key in REQUIRED_CONDITIONS + tuple(key for key in ('volume_threshold', 'cooldown') if key in conditions):
+            value = conditions.get(key)
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                errors.append(f"alert_conditions.{key} 必须是数字: {value!r}")
+    analysis = config.get('technical_analysis', {})
+    if not isinstance(analysis, dict):
+        errors.append("technical_analysis 必须是对象")
+    elif not isinstance(analysis.get('history_days', 30), int) or analysis.get('history_days', 30) < 30:
+        errors.append(f"technical_analysis.history_days 必须是不小于30的整数: {analysis['history_days']!r}")
+    rules = config.get('alert_rules', [])
+    if not isinstance(rules, list):
+        errors.append("alert_rules 必须是列表")
+    else:
+        for index, rule in enumerate(rules):
+            if not isinstance(rule, dict) or not isinstance(rule.get('when'), str):
+                errors.append(f"alert_rules 第 {index + 1} 条必须是含 when 表达式（字符串）的对象")
+    schedule = config.get('schedule', {})
+    if not isinstance(schedule, dict):
+        errors.append("schedule 必须是对象")
+        schedule = {}
+    tiers = schedule.get('tiers', [])
+    if not isinstance(tiers, list):
+        errors.append("schedule.tiers 必须是列表")
+        tiers = []
+    for index, tier in enumerate(tiers):
+        if not isinstance(tier, dict):
+            errors.append(f"schedule.tiers 第 {index + 1} 项必须是对象")
+            continue
+        interval = tier.get('interval')
+        if not isinstance(interval, (int, float)) or isinstance(interval, bool) or interval <= 0:
+            errors.append(f"schedule.tiers 中 {tier.get('name', '')} 的 interval 必须是正数")
+    return errors
+
+
+def diff_watchlist(old: Sequence[str], new: Sequence[str]) -> Tuple[List[str], List[str]]:
+    """返回 (新增的股票, 移除的股票)，各自保持在原列表中的顺序"""
+    old_set, new_set = set(old), set(new)
+    return ([code for code in dict.fromkeys(new) if code not in old_set],
+            [code for code in dict.fromkeys(old) if code not in new_set])
+
+
+def _section_value(config: Dict[str, Any], section: str, key: Optional[str]):
+    value = config.get(section)
+    if key is None or not isinstance(value, dict):
+        return value
+    return value.get(key)
+
+
+def restart_required(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """修改了哪些需要重启才生效的配置"""
+    return [section if key is None else f'{section}.{key}' for section, key in RESTART_REQUIRED
+            if _section_value(old, section, key) != _section_value(new, section, key)]
+
+
+def schedule_changed(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    """是否需要重建扫描调度"""
+    return any(old.get(key) != new.get(key) for key in SCHEDULE_KEYS)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+滚动相关性与板块联动
+把自选股每根1分钟K线的收益率计入滚动窗口，维护窗口内各股票收益率之和与两两乘积之和，
+任意两只股票的相关系数由这些累计量直接得出：
+  - 新K线到来时只加上新收益率、减去移出窗口的收益率（秩2更新，按行分块以减少内存读写），
+    不按窗口重新计算 N×N 矩阵；3000只股票时每根K线约十几毫秒，整体重算约需十倍时间；
+  - 累计量的浮点误差每隔 refresh 根K线用窗口内的数据整体重算一次消除；
+  - 板块信号：配置的板块（如白酒 600519、000858）成员之间平均相关系数达到阈值，且当日同向涨跌、
+    平均涨跌幅达到阈值时，给出“板块联动”提醒；也可以按相关系数阈值自动发现联动的股票组
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_WINDOW = 120          # 滚动窗口（1分钟K线根数）
+DEFAULT_MIN_CORRELATION = 0.6  # 板块内平均相关系数阈值
+DEFAULT_MIN_MOVE = 2.0        # 板块平均涨跌幅阈值（%）
+DEFAULT_REFRESH = 1000        # 每隔多少根K线整体重算一次累计量
+MIN_SAMPLES = 10              # 窗口内至少有多少根K线才计算相关系数
+BLOCK_ROWS = 64               # 秩2更新时每块的行数
+
+
+class RollingCorrelation:
+    """滚动窗口收益率相关矩阵（增量更新）
+
+    update 传入按 codes 顺序排列的一根K线的收益率；没有新数据的股票传 NaN，按0收益计入。
+    """
+
+    def __init__(self, codes: Sequence[str], window: int = DEFAULT_WINDOW, refresh: int = DEFAULT_REFRESH):
+        if window < 2:
+            raise ValueError(f"相关性窗口至少为2: {window}")
+        self.codes = list(codes)
+        self.index = {code: i for i, code in enumerate(self.codes)}
+        self.window = window
+        self.refresh = refresh
+        n = len(self.codes)
+        self._returns = np.zeros((window, n))  # 环形缓冲区，每行一根K线
+        self._next = 0
+        self.count = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))  # 收益率两两乘积之和
+        self._last_prices: Optional[np.ndarray] = None
+        self._updates = 0
+
+    def update_prices(self, prices: Sequence[float]) -> bool:
+        """传入最新价格，按与上一次价格的对数收益率更新；第一次只作为基准，返回是否已更新"""
+        prices = np.asarray(prices, dtype=np.float64)
+        last, self._last_prices = self._last_prices, prices
+        if last is None:
+            return False
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.log(prices / last)
+        returns[~np.isfinite(returns)] = np.nan
+        self.update(returns)
+        return True
+
+    def update(self, returns: Sequence[float]):
+        """计入一根K线的收益率"""
+        new = np.nan_to_num(np.asarray(returns, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        old = self._returns[self._next].copy() if self.count == self.window else np.zeros_like(new)
+        self._returns[self._next] = new
+        self._next = (self._next + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        self._updates += 1
+        if self.refresh and self._updates % self.refresh == 0:
+            self.recompute()
+            return
+
+        self._sum += new - old
+        # cross += new·newᵀ - old·oldᵀ，写成 (n×2)(2×n) 的矩阵乘积，按行分块在缓存内完成
+        left = np.stack([new, old], axis=1)
+        right = np.stack([new, -old])
+        for start in range(0, len(new), BLOCK_ROWS):
+            self._cross[start:start + BLOCK_ROWS] += left[start:start + BLOCK_ROWS] @ right
+
+    def recompute(self):
+        """用窗口内的数据整体重算累计量"""
+        returns = self._returns if self.count == self.window else self._returns[:self.count]
+        self._sum = returns.sum(axis=0)
+        self._cross = returns.T @ returns
+
+    def window_returns(self) -> np.ndarray:
+        """窗口内的收益率（按时间顺序，K线数 × 股票数）"""
+        if self.count < self.window:
+            return self._returns[:self.count].copy()
+        return np.roll(self._returns, -self._next, axis=0)
+
+    def _covariance(self, rows, cols) -> np.ndarray:
+        n = self.count
+        mean = self._sum / n
+        return self._cross[np.ix_(rows, cols)] / n - np.outer(mean[rows], mean[cols])
+
+    def submatrix(self, codes: Sequence[str]) -> np.ndarray:
+        """指定股票之间的相关系数矩阵（只计算这几只股票，不生成整个矩阵）"""
+        rows = [self.index[code] for code in codes]
+        if self.count < 2:
+            return np.eye(len(rows))
+        cov = self._covariance(rows, rows)
+        std = np.sqrt(np.maximum(np.diag(cov), 0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = 0.0
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+
+    def pair(self, a: str, b: str) -> float:
+        """两只股票的相关系数"""
+        return float(self.submatrix([a, b])[0, 1])
+
+    def matrix(self) -> np.ndarray:
+        """全部股票的相关系数矩阵"""
+        return self.submatrix(self.codes)
+
+    def reindex(self, codes: Sequence[str]) -> 'RollingCorrelation':
+        """自选股变化后，返回按新代码列表排列的实例（保留股票的窗口数据，新增股票从0收益开始）"""
+        other = RollingCorrelation(codes, self.window, self.refresh)
+        kept = [(i, self.index[code]) for i, code in enumerate(other.codes) if code in self.index]
+        if kept:
+            new_cols, old_cols = map(list, zip(*kept))
+            other._returns[:, new_cols] = self._returns[:, old_cols]
+            if self._last_prices is not None:
+                other._last_prices = np.full(len(other.codes), np.nan)
+                other._last_prices[new_cols] = self._last_prices[old_cols]
+        other._next, other.count = self._next, self.count
+        other.recompute()
+        return other
+
+    def clusters(self, threshold: float = DEFAULT_MIN_CORRELATION, min_size: int = 2) -> List[List[str]]:
+        """相关系数不低于threshold的股票连成的组（连通分量），按组大小从大到小"""
+        if self.count < MIN_SAMPLES:
+            return []
+        adjacency = self.matrix() >= threshold
+        labels = np.full(len(self.codes), -1)
+        groups = []
+        for seed in range(len(self.codes)):
+            if labels[seed] >= 0:
+                continue
+            labels[seed] = len(groups)
+            members, frontier = [seed], [seed]
+            while frontier:
+                linked = np.flatnonzero(adjacency[frontier].any(axis=0) & (labels < 0))
+                labels[linked] = len(groups)
+                members.extend(linked.tolist())
+                frontier = linked.tolist()
+            groups.append(members)
+        clusters = [[self.codes[i] for i in sorted(members)] for members in groups if len(members) >= min_size]
+        return sorted(clusters, key=len, reverse=True)
+
+
+class SectorMonitor:
+    """板块联动信号
+
+    sectors 为 板块名 -> 股票代码；discover 为True时，还把按相关系数自动发现的联动组作为板块检查。
+    同一板块同一方向的提醒在 cooldown 秒内只发出一次。
+    """
+
+    def __init__(self, sectors: Optional[Dict[str, List[str]]] = None,
+                 min_correlation: float = DEFAULT_MIN_CORRELATION, min_move: float = DEFAULT_MIN_MOVE,
+                 cooldown: float = 600, discover: bool = False):
+        self.sectors = {name: list(codes) for name, codes in (sectors or {}).items()}
+        self.min_correlation = min_correlation
+        self.min_move = min_move
+        self.cooldown = cooldown
+        self.discover = discover
+        self._last_fired: Dict[tuple, float] = {}
+
+    def groups(self, correlation: RollingCorrelation) -> Dict[str, List[str]]:
+        """待检查的股票组：配置的板块（只保留在相关矩阵中的成员）加上自动发现的联动组"""
+        groups = {}
+        for name, codes in self.sectors.items():
+            members = [code for code in codes if code in correlation.index]
+            if len(members) >= 2:
+                groups[name] = members
+        if self.discover:
+            configured = {frozenset(codes) for codes in groups.values()}
+            for codes in correlation.clusters(self.min_correlation):
+                if frozenset(codes) not in configured:
+                    groups[f"联动组({codes[0]}等{len(codes)}只)"] = codes
+        return groups
+
+    def signals(self, correlation: RollingCorrelation, changes: Dict[str, float],
+                now: Optional[float] = None) -> List[tuple]:
+        """检查各板块是否联动，返回 (板块名, 成员代码, 提醒文字) 列表
+
+        changes 为 股票代码 -> 当日涨跌幅(%)；成员全部同向涨跌、平均涨跌幅达到 min_move，
+        且窗口内成员两两之间的平均相关系数达到 min_correlation 时产生信号。
+        """
+        if correlation.count < MIN_SAMPLES:
+            return []
+        now = time.time() if now is None else now
+        result = []
+        for name, codes in self.groups(correlation).items():
+            moves = [changes[code] for code in codes if code in changes]
+            if len(moves) < len(codes):
+                continue
+            mean_move = sum(moves) / len(moves)
+            same_direction = all(move > 0 for move in moves) or all(move < 0 for move in moves)
+            if not same_direction or abs(mean_move) < self.min_move:
+                continue
+            corr = correlation.submatrix(codes)
+            n = len(codes)
+            mean_corr = (corr.sum() - n) / (n * (n - 1))
+            if mean_corr < self.min_correlation:
+                continue
+            direction = '上涨' if mean_move > 0 else '下跌'
+            key = (name, direction)
+            if now - self._last_fired.get(key, -float('inf')) < self.cooldown:
+                continue
+            self._last_fired[key] = now
+            result.append((name, codes, f"{name}板块联动{direction}: {', '.join(codes)} "
+                                        f"平均涨跌幅 {mean_move:+.2f}%, 平均相关系数 {mean_corr:.2f}"))
+        return result
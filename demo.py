@@ -29,6 +29,8 @@ def main():
     
     # 执行单次扫描
     monitor.scan_stocks()
+    # 提醒在后台合并后投递，退出前等待剩余提醒输出
+    monitor.alert_dispatcher.close()
     
     print("\n演示完成!")
 
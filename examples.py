@@ -30,6 +30,7 @@ def example_basic_monitoring():
     # 执行一次扫描
     print("\n执行单次扫描...")
     monitor.scan_stocks()
+    monitor.alert_dispatcher.close()  # 输出后台合并中的提醒
 
 
 def example_custom_config():
@@ -64,6 +65,7 @@ def example_custom_config():
     # 执行扫描
     print("\n执行扫描...")
     monitor.scan_stocks()
+    monitor.alert_dispatcher.close()
     
     # 清理临时文件
     if os.path.exists(temp_config_file):
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标注册表
+每个指标声明它依赖的共享中间量（逐K线涨跌额、EMA序列、最近N根K线之和等），
+IndicatorEngine 按 technical_analysis.enable_* 启用的指标整理出需要的中间量及其计算顺序：
+  - 只计算启用的指标需要的中间量，每只股票每轮每个中间量只计算一次
+    （如 MA20 与布林线中轨共用最近20根之和，RSI 与 OBV 共用逐K线涨跌额，MACD 的两条EMA各算一次）；
+  - 评分规则随指标注册，evaluate 只对启用的指标打分；没有评分规则的指标（ATR、OBV）只输出数值。
+
+新增指标：用 intermediate 注册需要的中间量，再用 register 注册 Indicator。
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 指标参数
+MA_PERIODS = (5, 10, 20)
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+KDJ_PERIOD = 9
+BOLL_PERIOD, BOLL_WIDTH = 20, 2.0
+ATR_PERIOD = 14
+MIN_BARS = 30  # 少于该K线数时不产生信号
+
+DEFAULT_INDICATORS = ('ma', 'rsi', 'macd', 'kdj')  # 配置中没有 enable_* 项时默认启用的指标
+
+Key = Tuple  # 中间量键: (名称, 参数...)，如 ('ema', 12)
+
+# 中间量名称 -> (计算函数, 依赖函数)；计算函数参数为 (已计算的值, *参数)，依赖函数返回依赖的中间量键
+_INTERMEDIATES: Dict[str, Tuple[Callable, Callable[..., Iterable[Key]]]] = {}
+
+
+def intermediate(name: str, requires: Callable[..., Iterable[Key]] = lambda *args: ()):
+    """注册中间量的装饰器"""
+    def decorator(func):
+        _INTERMEDIATES[name] = (func, requires)
+        return func
+    return decorator
+
+
+@intermediate('diffs')
+def _diffs(values) -> List[float]:
+    """逐K线涨跌额"""
+    closes = values['close']
+    return [closes[i] - closes[i - 1] for i in range(1, len(closes))]
+
+
+@intermediate('tail_sums')
+def _tail_sums(values, n: int) -> List[float]:
+    """最近k根收盘价之和（k = 0..n），各周期均线和布林线中轨共用"""
+    sums = [0.0]
+    for price in reversed(values['close'][-n:]):
+        sums.append(sums[-1] + price)
+    return sums
+
+
+@intermediate('mean', requires=lambda period: [('tail_sums', max(MA_PERIODS + (period,)))])
+def _mean(values, period: int) -> float:
+    """最近period根收盘价的均值，K线不足时为0"""
+    sums = values[('tail_sums', max(MA_PERIODS + (period,)))]
+    return sums[period] / period if len(sums) > period else 0
+
+
+@intermediate('std', requires=lambda period: [('mean', period)])
+def _std(values, period: int) -> float:
+    """最近period根收盘价的总体标准差，K线不足时为0"""
+    closes = values['close']
+    if len(closes) < period:
+        return 0
+    mean = values[('mean', period)]
+    return math.sqrt(sum((price - mean) ** 2 for price in closes[-period:]) / period)
+
+
+@intermediate('ema')
+def _ema(values, period: int) -> List[float]:
+    """收盘价的指数移动平均序列（从第period根K线开始，首值为简单平均）"""
+    closes = values['close']
+    if len(closes) < period:
+        return []
+    multiplier = 2 / (period + 1)
+    ema = sum(closes[:period]) / period
+    series = [ema]
+    for price in closes[period:]:
+        ema = (price - ema) * multiplier + ema
+        series.append(ema)
+    return series
+
+
+@intermediate('wilder', requires=lambda period: [('diffs',)])
+def _wilder(values, period: int) -> Optional[Tuple[float, float]]:
+    """涨幅与跌幅的Wilder平均 (avg_gain, avg_loss)，K线不足时为None"""
+    diffs = values[('diffs',)]
+    if len(diffs) < period:
+        return None
+    gains = [diff if diff > 0 else 0 for diff in diffs]
+    losses = [0 if diff > 0 else -diff for diff in diffs]
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * (period - 1) + gain) / period
+        avg_loss = (avg_loss * (period - 1) + loss) / period
+    return avg_gain, avg_loss
+
+
+@intermediate('rsv')
+def _rsv(values, period: int) -> List[float]:
+    """每根K线的RSV（最近period根的最高最低价区间内的位置）"""
+    closes, highs, lows = values['close'], values['high'], values['low']
+    series = []
+    for t in range(period - 1, len(closes)):
+        lowest_low = min(lows[t - period + 1:t + 1])
+        highest_high = max(highs[t - period + 1:t + 1])
+        if highest_high == lowest_low:
+            series.append(50)
+        else:
+            series.append((closes[t] - lowest_low) / (highest_high - lowest_low) * 100)
+    return series
+
+
+@intermediate('true_range')
+def _true_range(values) -> List[float]:
+    """每根K线的真实波幅（第一根为最高价减最低价）"""
+    closes, highs, lows = values['close'], values['high'], values['low']
+    ranges = [highs[0] - lows[0]] if closes else []
+    for t in range(1, len(closes)):
+        prev = closes[t - 1]
+        ranges.append(max(highs[t] - lows[t], abs(highs[t] - prev), abs(lows[t] - prev)))
+    return ranges
+
+
+class Indicator:
+    """一个技术指标
+
+    fields 为输出的字段名，requires 为依赖的中间量键，compute(values) 从已计算的中间量得出指标值
+    （字段名 -> 数值），rule(values, signals) 按指标值向 signals 添加买卖信号并加减评分，为None时只输出数值。
+    """
+
+    def __init__(self, name: str, fields: Sequence[str], requires: Sequence[Key],
+                 compute: Callable[[Dict], Dict[str, float]], rule: Optional[Callable[[Dict, Dict], None]] = None):
+        self.name = name
+        self.fields = tuple(fields)
+        self.requires = list(requires)
+        self.compute = compute
+        self.rule = rule
+
+
+INDICATORS: Dict[str, Indicator] = {}  # 按注册顺序，也是信号的排列顺序
+
+
+def register(indicator: Indicator) -> Indicator:
+    """注册指标（同名指标会被替换）"""
+    unknown = [key for key in indicator.requires if key[0] not in _INTERMEDIATES]
+    if unknown:
+        raise ValueError(f"指标 {indicator.name} 依赖未注册的中间量: {unknown}")
+    INDICATORS[indicator.name] = indicator
+    return indicator
+
+
+def _signal(signals: Dict, buy: bool, message: str, points: int):
+    signals['buy_signals' if buy else 'sell_signals'].append(message)
+    signals['score'] += points if buy else -points
+
+
+def _ma_rule(values, signals):
+    ma5, ma10, ma20, price = values['ma5'], values['ma10'], values['ma20'], values['price']
+    if ma5 > ma10 > ma20 and price > ma5:
+        _signal(signals, True, '均线多头排列', 2)
+    elif ma5 < ma10 < ma20 and price < ma5:
+        _signal(signals, False, '均线空头排列', 2)
+
+
+def _rsi(values):
+    averages = values[('wilder', RSI_PERIOD)]
+    if averages is None:
+        return {'rsi': 50}
+    avg_gain, avg_loss = averages
+    if avg_loss == 0:
+        return {'rsi': 100}
+    return {'rsi': 100 - (100 / (1 + avg_gain / avg_loss))}
+
+
+def _rsi_rule(values, signals):
+    rsi = values['rsi']
+    if rsi < 30:
+        _signal(signals, True, f'RSI超卖({rsi:.2f})', 3)
+    elif rsi > 70:
+        _signal(signals, False, f'RSI超买({rsi:.2f})', 3)
+
+
+def _macd(values):
+    fast, slow = values[('ema', MACD_FAST)], values[('ema', MACD_SLOW)]
+    if not slow:
+        return {'macd': 0, 'signal': 0, 'histogram': 0}
+    # 快线从第12根K线开始，慢线从第26根开始，对齐后相减
+    macd_series = [f - s for f, s in zip(fast[MACD_SLOW - MACD_FAST:], slow)]
+    # 信号线为MACD线的EMA，以第一个MACD值为初始值
+    multiplier = 2 / (MACD_SIGNAL + 1)
+    signal_line = macd_series[0]
+    for value in macd_series[1:]:
+        signal_line = (value - signal_line) * multiplier + signal_line
+    return {'macd': macd_series[-1], 'signal': signal_line, 'histogram': macd_series[-1] - signal_line}
+
+
+def _macd_rule(values, signals):
+    if values['histogram'] > 0 and values['macd'] > values['signal']:
+        _signal(signals, True, 'MACD金叉', 2)
+    elif values['histogram'] < 0 and values['macd'] < values['signal']:
+        _signal(signals, False, 'MACD死叉', 2)
+
+
+def _kdj(values):
+    # K、D为RSV的递推平滑，初始值50
+    k = d = 50
+    for rsv in values[('rsv', KDJ_PERIOD)]:
+        k = k * 2 / 3 + rsv / 3
+        d = d * 2 / 3 + k / 3
+    return {'k': k, 'd': d, 'j': 3 * k - 2 * d}
+
+
+def _kdj_rule(values, signals):
+    j = values['j']
+    if j < 20:
+        _signal(signals, True, f'KDJ超卖(J={j:.2f})', 2)
+    elif j > 80:
+        _signal(signals, False, f'KDJ超买(J={j:.2f})', 2)
+
+
+def _boll(values):
+    mid, std = values[('mean', BOLL_PERIOD)], values[('std', BOLL_PERIOD)]
+    return {'boll_mid': mid, 'boll_upper': mid + BOLL_WIDTH * std, 'boll_lower': mid - BOLL_WIDTH * std}
+
+
+def _boll_rule(values, signals):
+    if values['price'] < values['boll_lower']:
+        _signal(signals, True, '跌破布林线下轨', 2)
+    elif values['price'] > values['boll_upper']:
+        _signal(signals, False, '突破布林线上轨', 2)
+
+
+def _atr(values):
+    ranges = values[('true_range',)]
+    if len(ranges) < ATR_PERIOD:
+        return {'atr': 0}
+    atr = sum(ranges[:ATR_PERIOD]) / ATR_PERIOD
+    for value in ranges[ATR_PERIOD:]:
+        atr = (atr * (ATR_PERIOD - 1) + value) / ATR_PERIOD
+    return {'atr': atr}
+
+
+def _obv(values):
+    volumes = values['volume']
+    if not volumes:
+        return {'obv': 0}
+    obv = 0.0
+    for diff, volume in zip(values[('diffs',)], volumes[1:]):
+        if diff > 0:
+            obv += volume
+        elif diff < 0:
+            obv -= volume
+    return {'obv': obv}
+
+
+register(Indicator('ma', [f'ma{period}' for period in MA_PERIODS], [('mean', period) for period in MA_PERIODS],
+                   lambda values: {f'ma{period}': values[('mean', period)] for period in MA_PERIODS}, _ma_rule))
+register(Indicator('rsi', ['rsi'], [('wilder', RSI_PERIOD)], _rsi, _rsi_rule))
+register(Indicator('macd', ['macd', 'signal', 'histogram'], [('ema', MACD_FAST), ('ema', MACD_SLOW)],
+                   _macd, _macd_rule))
+register(Indicator('kdj', ['k', 'd', 'j'], [('rsv', KDJ_PERIOD)], _kdj, _kdj_rule))
+register(Indicator('boll', ['boll_mid', 'boll_upper', 'boll_lower'], [('mean', BOLL_PERIOD), ('std', BOLL_PERIOD)],
+                   _boll, _boll_rule))
+register(Indicator('atr', ['atr'], [('true_range',)], _atr))
+register(Indicator('obv', ['obv'], [('diffs',)], _obv))
+
+
+def enabled_indicators(config: Optional[Dict[str, Any]] = None) -> Tuple[str, ...]:
+    """technical_analysis 配置中启用的指标（enable_<名称>，未配置时按 DEFAULT_INDICATORS），按注册顺序"""
+    config = config or {}
+    return tuple(name for name in INDICATORS if config.get(f'enable_{name}', name in DEFAULT_INDICATORS))
+
+
+def recommendation_for(score: int) -> str:
+    """根据评分给出建议"""
+    if score >= 5:
+        return 'STRONG BUY'
+    elif score >= 2:
+        return 'BUY'
+    elif score <= -5:
+        return 'STRONG SELL'
+    elif score <= -2:
+        return 'SELL'
+    return 'HOLD'
+
+
+class IndicatorEngine:
+    """按启用的指标计算和打分
+
+    创建时整理出启用指标依赖的全部中间量（含中间量之间的依赖）及计算顺序，
+    compute 对每只股票按该顺序把每个中间量计算一次。
+    """
+
+    def __init__(self, enabled: Optional[Iterable[str]] = None):
+        enabled = DEFAULT_INDICATORS if enabled is None else tuple(enabled)
+        unknown = [name for name in enabled if name not in INDICATORS]
+        if unknown:
+            raise ValueError(f"未知的技术指标: {', '.join(unknown)}")
+        self.enabled = tuple(name for name in INDICATORS if name in enabled)
+        self.indicators = [INDICATORS[name] for name in self.enabled]
+        self.plan: List[Key] = []  # 中间量的计算顺序（依赖在前）
+        for indicator in self.indicators:
+            for key in indicator.requires:
+                self._add(key, set())
+
+    def _add(self, key: Key, visiting: set):
+        if key in self.plan:
+            return
+        if key in visiting:
+            raise ValueError(f"中间量循环依赖: {key}")
+        visiting.add(key)
+        for dependency in _INTERMEDIATES[key[0]][1](*key[1:]):
+            self._add(tuple(dependency), visiting)
+        self.plan.append(key)
+
+    def intermediates(self, closes: Sequence[float], highs: Optional[Sequence[float]] = None,
+                      lows: Optional[Sequence[float]] = None,
+                      volumes: Optional[Sequence[float]] = None) -> Dict[Any, Any]:
+        """计算一只股票的输入序列和全部所需中间量"""
+        closes = list(closes)
+        values = {
+            'close': closes,
+            'high': closes if highs is None else list(highs),
+            'low': closes if lows is None else list(lows),
+            'volume': [] if volumes is None else list(volumes),
+        }
+        for key in self.plan:
+            values[key] = _INTERMEDIATES[key[0]][0](values, *key[1:])
+        return values
+
+    def compute(self, closes: Sequence[float], highs: Optional[Sequence[float]] = None,
+                lows: Optional[Sequence[float]] = None,
+                volumes: Optional[Sequence[float]] = None) -> Dict[str, float]:
+        """计算启用的指标，返回 字段名 -> 数值（含最新价 price）"""
+        values = self.intermediates(closes, highs, lows, volumes)
+        result = {'price': values['close'][-1] if values['close'] else 0}
+        for indicator in self.indicators:
+            result.update(indicator.compute(values))
+        return result
+
+    def evaluate(self, indicators: Optional[Dict[str, float]]) -> Dict[str, Any]:
+        """按启用指标的评分规则打分，indicators为None表示数据不足
+
+        启用了没有评分规则的指标（ATR、OBV）时，其数值放在结果的 indicators 字段中。
+        """
+        signals = {
+            'buy_signals': [],
+            'sell_signals': [],
+            'score': 0,
+            'recommendation': 'HOLD'
+        }
+        if indicators is None:
+            return signals
+        info = {}
+        for indicator in self.indicators:
+            if indicator.rule is not None:
+                indicator.rule(indicators, signals)
+            else:
+                info.update((field, indicators[field]) for field in indicator.fields)
+        signals['recommendation'] = recommendation_for(signals['score'])
+        if info:
+            signals['indicators'] = info
+        return signals
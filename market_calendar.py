@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A股交易日历
+交易日为周一至周五且不在休市日期中；交易时段为 09:30-11:30、13:00-15:00（北京时间，按本机时间计算）。
+内置的休市日期需每年按交易所公告补充，也可以在配置 schedule.holidays 中追加
+"""
+
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Iterable, List, Tuple
+
+# 交易所休市安排（含周末的区间，只有工作日生效）
+HOLIDAY_RANGES = [
+    ('2025-01-01', '2025-01-01'),  # 元旦
+    ('2025-01-28', '2025-02-04'),  # 春节
+    ('2025-04-04', '2025-04-06'),  # 清明节
+    ('2025-05-01', '2025-05-05'),  # 劳动节
+    ('2025-05-31', '2025-06-02'),  # 端午节
+    ('2025-10-01', '2025-10-08'),  # 国庆节、中秋节
+    ('2026-01-01', '2026-01-03'),  # 元旦
+    ('2026-02-15', '2026-02-23'),  # 春节
+    ('2026-04-04', '2026-04-06'),  # 清明节
+    ('2026-05-01', '2026-05-05'),  # 劳动节
+    ('2026-06-19', '2026-06-21'),  # 端午节
+    ('2026-09-25', '2026-09-27'),  # 中秋节
+    ('2026-10-01', '2026-10-07'),  # 国庆节
+]
+
+SESSIONS = (('09:30', '11:30'), ('13:00', '15:00'))
+
+
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _parse_time(value: str) -> dtime:
+    return datetime.strptime(value, '%H:%M').time()
+
+
+def _minutes_between(start: dtime, end: dtime) -> float:
+    return (datetime.combine(date.min, end) - datetime.combine(date.min, start)).total_seconds() / 60
+
+
+def expand_holidays(ranges: Iterable[Tuple[str, str]]) -> set:
+    """把 (开始, 结束) 日期区间展开为日期集合"""
+    days = set()
+    for start, end in ranges:
+        day, end = _parse_date(start), _parse_date(end)
+        while day <= end:
+            days.add(day)
+            day += timedelta(days=1)
+    return days
+
+
+class MarketCalendar:
+    """交易日与交易时段判断"""
+
+    def __init__(self, holidays: Iterable[str] = (), sessions: Iterable[Tuple[str, str]] = SESSIONS):
+        self.holidays = expand_holidays(HOLIDAY_RANGES) | {_parse_date(day) for day in holidays}
+        self.sessions: List[Tuple[dtime, dtime]] = [(_parse_time(start), _parse_time(end))
+                                                    for start, end in sessions]
+
+    def is_trading_day(self, day: date) -> bool:
+        return day.weekday() < 5 and day not in self.holidays
+
+    def is_open(self, moment: datetime) -> bool:
+        """moment是否在交易时段内"""
+        if not self.is_trading_day(moment.date()):
+            return False
+        now = moment.time()
+        return any(start <= now < end for start, end in self.sessions)
+
+    def session_minutes(self) -> float:
+        """每个交易日的交易分钟数"""
+        return sum(_minutes_between(start, end) for start, end in self.sessions)
+
+    def elapsed_minutes(self, moment: datetime) -> float:
+        """当日开盘到moment经过的交易分钟数（不含午间休市）；非交易日按全天计算"""
+        if not self.is_trading_day(moment.date()):
+            return self.session_minutes()
+        now = moment.time()
+        return sum(_minutes_between(start, min(max(now, start), end)) for start, end in self.sessions)
+
+    def next_open(self, moment: datetime) -> datetime:
+        """moment之后（含）最近一个交易时段的开始时间；已在交易时段内时返回moment"""
+        if self.is_open(moment):
+            return moment
+        day = moment.date()
+        for _ in range(366):
+            if self.is_trading_day(day):
+                for start, _ in self.sessions:
+                    opening = datetime.combine(day, start)
+                    if opening >= moment:
+                        return opening
+            day += timedelta(days=1)
+        raise ValueError("一年内没有交易日，请检查休市日期配置")
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控指标
+计数器、数值和延迟直方图，以Prometheus文本格式导出到文件或本地HTTP端点
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# 延迟直方图默认分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(items, escaped)) + '}'
+
+
+class Histogram:
+    """累积分桶直方图"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self, prefix: str = 'stock_monitor', help_texts: Optional[Dict[str, str]] = None):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._types: Dict[str, str] = {}
+        self._help = {f'{prefix}_{name}': text for name, text in (help_texts or {}).items()}
+        self._values: Dict[str, Dict[tuple, object]] = {}
+        self._server = None
+
+    def _series(self, name: str, kind: str, labels: Dict[str, str]):
+        full_name = f'{self.prefix}_{name}'
+        if full_name not in self._types:
+            self._types[full_name] = kind
+            self._values[full_name] = {}
+        return self._values[full_name], tuple(sorted(labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """计数器加value"""
+        with self._lock:
+            series, key = self._series(name, COUNTER, labels)
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        """设置数值"""
+        with self._lock:
+            series, key = self._series(name, GAUGE, labels)
+            series[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """记录一次耗时（秒）"""
+        with self._lock:
+            series, key = self._series(name, HISTOGRAM, labels)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """计时上下文，退出时把耗时记入直方图"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def get(self, name: str, **labels):
+        """读取一个指标当前值（直方图返回Histogram对象），不存在时返回None"""
+        with self._lock:
+            return self._values.get(f'{self.prefix}_{name}', {}).get(tuple(sorted(labels.items())))
+
+    def render(self) -> str:
+        """以Prometheus文本格式输出全部指标"""
+        lines = []
+        with self._lock:
+            for full_name, kind in self._types.items():
+                if full_name in self._help:
+                    lines.append(f'# HELP {full_name} {self._help[full_name]}')
+                lines.append(f'# TYPE {full_name} {kind}')
+                for labels, value in self._values[full_name].items():
+                    if kind != HISTOGRAM:
+                        lines.append(f'{full_name}{_format_labels(labels)} {value}')
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        lines.append(f'{full_name}_bucket{_format_labels(labels, ("le", repr(float(bound))))} {cumulative}')
+                    lines.append(f'{full_name}_bucket{_format_labels(labels, ("le", "+Inf"))} {value.count}')
+                    lines.append(f'{full_name}_sum{_format_labels(labels)} {value.total}')
+                    lines.append(f'{full_name}_count{_format_labels(labels)} {value.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """原子地写入指标文件（可供node_exporter的textfile采集）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> int:
+        """在后台线程中提供 /metrics HTTP端点，返回实际监听端口"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def shutdown(self):
+        """停止HTTP端点"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
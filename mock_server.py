@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟行情服务器
+在本机提供行情、盘面信息、新闻和历史K线接口，可配置延迟、抖动、错误率和限流，
+用于在无外网环境下压测 TongHuaShunAPI 的真实HTTP路径（连接复用、超时、吞吐）
+
+用法:
+  python mock_server.py --port 8900 --latency 0.05 --jitter 0.02 --error-rate 0.01 --rate-limit 200
+然后在 config.json 中设置:
+  "api_config": {"mode": "http", "base_url": "http://127.0.0.1:8900"}
+提醒也可以投递到本服务器的 /webhook（代替真实的Webhook服务）:
+  "alert_dispatch": {"sinks": ["console", "webhook"], "webhook_url": "http://127.0.0.1:8900/webhook"}
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from bar_store import int_to_date
+from seeded_api import SeededAPI, DEFAULT_SEED
+
+
+class TokenBucket:
+    """令牌桶限流器，rate为每秒请求数"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """取一个令牌，没有可用令牌时返回False"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class MockQuoteServer:
+    """模拟行情HTTP服务器（数据来自可复现的 SeededAPI）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, rate_limit: Optional[float] = None,
+                 seed: int = DEFAULT_SEED):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.data = SeededAPI(seed=seed)
+        self.stats = {'requests': 0, 'errors': 0, 'rate_limited': 0, 'webhooks': 0}
+        self.webhooks = []  # 收到的提醒（POST /webhook）
+        self._stats_lock = threading.Lock()
+        self._random = random.Random(seed)
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def handle(self, path: str, params: Dict[str, list]) -> tuple:
+        """处理一个请求，返回 (HTTP状态码, 响应数据)"""
+        self._count('requests')
+        if path == '/stats':
+            return 200, dict(self.stats)
+
+        if self.limiter and not self.limiter.acquire():
+            self._count('rate_limited')
+            return 429, {'error': 'rate limited'}
+
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self._count('errors')
+            return 500, {'error': 'injected failure'}
+
+        def param(name, default=None):
+            return params.get(name, [default])[0]
+
+        if path == '/quotes':
+            quotes = self.data.get_realtime_prices(param('codes', '').split(','))
+            return 200, {'data': {code: quote.to_dict() for code, quote in quotes.items()}}
+        if path == '/stocks':
+            return 200, {'data': self.data.get_stock_list()}
+        if path == '/market_info':
+            infos = self.data.get_market_infos(param('codes', '').split(','))
+            return 200, {'data': {code: info.to_dict() for code, info in infos.items()}}
+        if path == '/news':
+            since = param('since')
+            news = self.data.get_news(param('code'), int(param('limit', 5)), int(since) if since else None)
+            return 200, {'data': [item.to_dict() for item in news]}
+        if path == '/history':
+            end = param('end')
+            end = int_to_date(int(end)) if end else None
+            return 200, {'data': self.data.get_historical_bars(param('code'), int(param('days', 30)), end)}
+        return 404, {'error': f'unknown path {path}'}
+
+    def handle_post(self, path: str, payload) -> tuple:
+        """处理POST请求，/webhook 记录收到的提醒（本地代替真实的Webhook服务）"""
+        if path != '/webhook':
+            return 404, {'error': f'unknown path {path}'}
+        with self._stats_lock:
+            self.stats['webhooks'] += 1
+            self.webhooks.append(payload)
+        return 200, {'ok': True}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # 支持长连接，便于测量连接复用
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                try:
+                    status, payload = server.handle(url.path, parse_qs(url.query))
+                except Exception as e:
+                    status, payload = 400, {'error': str(e)}
+                self._reply(status, payload)
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get('Content-Length', 0))
+                    status, payload = server.handle_post(urlparse(self.path).path,
+                                                         json.loads(self.rfile.read(length) or b'null'))
+                except Exception as e:
+                    status, payload = 400, {'error': str(e)}
+                self._reply(status, payload)
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json; charset=utf-8')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端已超时断开
+                    self.close_connection = True
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> str:
+        """在后台线程中启动，返回服务器地址"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        """停止服务器"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地模拟行情服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求的基础延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.0, help='延迟抖动幅度（秒）')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回500错误的比例')
+    parser.add_argument('--rate-limit', type=float, default=None, help='每秒最多处理的请求数，超出返回429')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='模拟数据随机种子')
+    args = parser.parse_args()
+
+    server = MockQuoteServer(args.host, args.port, args.latency, args.jitter,
+                             args.error_rate, args.rate_limit, args.seed)
+    print(f"模拟行情服务器已启动: {server.base_url}  ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务器已停止")
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
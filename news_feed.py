@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量新闻
+每只股票记录已处理到的发布时间（游标），只向接口请求更新的新闻；
+按 标题+内容 的哈希去重（转载、重复推送只处理一次）；
+重要新闻关键词用 Aho-Corasick 自动机匹配，每个标题只扫描一遍，与关键词数量无关
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from records import NewsItem
+
+DEFAULT_KEYWORDS = ('重大', '公告')  # 标题含任一关键词即为重要新闻
+DEFAULT_NEWS_LIMIT = 10             # 每次最多请求的新闻条数
+DEFAULT_MAX_SEEN = 50000            # 去重索引最多保留的条目数（超出后淘汰最早的）
+RECENT_NEWS = 3                     # 每只股票保留用于显示的最近新闻条数
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多关键词匹配"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        # 每个状态: 转移表、失败指针、在该状态结束的关键词
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[tuple] = [()]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state] += (keyword,)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+
+    def _states(self, text: str):
+        goto, fail = self._goto, self._fail
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            yield state
+
+    def find(self, text: str) -> Set[str]:
+        """返回文本中出现的全部关键词"""
+        output = self._output
+        found = set()
+        for state in self._states(text):
+            found.update(output[state])
+        return found
+
+    def contains_any(self, text: str) -> bool:
+        """文本中是否出现任一关键词（找到第一个即返回）"""
+        output = self._output
+        return any(output[state] for state in self._states(text))
+
+
+def content_hash(item: NewsItem) -> bytes:
+    """新闻内容哈希（标题+内容），用于识别转载和重复推送"""
+    return hashlib.blake2b(f'{item.title}\n{item.content}'.encode('utf-8'), digest_size=8).digest()
+
+
+class NewsFeed:
+    """按股票增量处理新闻：游标 + 内容哈希去重 + 关键词匹配
+
+    add 可在多个获取线程中并发调用（不同股票）。
+    """
+
+    def __init__(self, keywords: Iterable[str] = DEFAULT_KEYWORDS, max_seen: int = DEFAULT_MAX_SEEN,
+                 recent_size: int = RECENT_NEWS):
+        self.matcher = KeywordMatcher(keywords)
+        self.max_seen = max_seen
+        self.recent_size = recent_size
+        self.cursors: Dict[str, int] = {}  # 股票代码 -> 已处理的最新发布时间
+        self.stats = {'fetched': 0, 'new': 0, 'duplicates': 0}
+        self._seen: 'OrderedDict[tuple, None]' = OrderedDict()  # (股票代码, 内容哈希)
+        self._recent: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def cursor(self, stock_code: str) -> Optional[int]:
+        """该股票已处理到的发布时间，尚未处理过时为None"""
+        return self.cursors.get(stock_code)
+
+    def add(self, stock_code: str, items: Iterable[NewsItem]) -> List[NewsItem]:
+        """处理接口返回的新闻，返回其中新的条目（早于游标或重复的丢弃）
+
+        游标相同发布时间的新闻仍会交给去重索引判断，避免同一秒内发布的新闻被漏掉。
+        """
+        cursor = self.cursors.get(stock_code)
+        new_items = []
+        with self._lock:
+            for item in items:
+                self.stats['fetched'] += 1
+                if cursor is not None and item.publish_time < cursor:
+                    continue
+                key = (stock_code, content_hash(item))
+                if key in self._seen:
+                    self._seen.move_to_end(key)
+                    self.stats['duplicates'] += 1
+                    continue
+                self._seen[key] = None
+                if len(self._seen) > self.max_seen:
+                    self._seen.popitem(last=False)
+                new_items.append(item)
+            self.stats['new'] += len(new_items)
+
+        if new_items:
+            newest = max(item.publish_time for item in new_items)
+            self.cursors[stock_code] = max(newest, cursor or newest)
+            recent = self._recent.setdefault(stock_code, deque(maxlen=self.recent_size))
+            for item in sorted(new_items, key=lambda item: item.publish_time):
+                recent.appendleft(item)
+        return new_items
+
+    def set_keywords(self, keywords: Iterable[str]):
+        """更换重要新闻关键词（重新构建匹配自动机后整体替换）"""
+        self.matcher = KeywordMatcher(keywords)
+
+    def drop(self, stock_code: str):
+        """释放该股票的游标和最近新闻（去重索引中的条目由LRU自然淘汰）"""
+        self.cursors.pop(stock_code, None)
+        self._recent.pop(stock_code, None)
+
+    def recent(self, stock_code: str) -> List[NewsItem]:
+        """该股票最近的新闻（最新的在前），用于显示"""
+        return list(self._recent.get(stock_code, ()))
+
+    def is_important(self, item: NewsItem) -> bool:
+        """标题中是否包含重要新闻关键词"""
+        return self.matcher.contains_any(item.title)
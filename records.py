@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情数据记录
+行情、盘面信息和新闻使用 __slots__ 记录（不带实例字典），时间戳保存为整数秒，只在显示时格式化；
+整个自选股的行情快照可转换为NumPy结构化数组，按列做向量化计算
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def format_timestamp(timestamp: int) -> str:
+    """整数秒时间戳格式化为本地时间字符串"""
+    return datetime.fromtimestamp(timestamp).strftime(TIME_FORMAT)
+
+
+class Record:
+    """__slots__ 记录基类，支持 record['field'] 与 record.get('field') 的字典式读取"""
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        for name, value in zip(self.__slots__, args):
+            setattr(self, name, value)
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __getitem__(self, name: str):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__slots__
+
+    def get(self, name: str, default=None):
+        return getattr(self, name, default)
+
+    def keys(self):
+        return self.__slots__
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（JSON序列化时使用）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        """由接口返回的字典构造"""
+        return cls(*(data.get(name) for name in cls.__slots__))
+
+    def __eq__(self, other) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+
+class Quote(Record):
+    """实时行情"""
+
+    __slots__ = ('code', 'name', 'price', 'change', 'change_percent', 'volume', 'turnover',
+                 'high', 'low', 'open', 'prev_close', 'timestamp')
+
+
+class MarketInfo(Record):
+    """盘面信息"""
+
+    __slots__ = ('code', 'pe_ratio', 'pb_ratio', 'market_cap', 'circulation_market_cap',
+                 'total_shares', 'circulation_shares', 'timestamp')
+
+
+class NewsItem(Record):
+    """新闻"""
+
+    __slots__ = ('title', 'content', 'source', 'publish_time', 'url')
+
+
+# 行情快照的结构化数组字段（名称、行情文本字段除外）
+QUOTE_SNAPSHOT_FIELDS = [
+    ('code', 'U8'),
+    ('price', 'f8'),
+    ('change', 'f8'),
+    ('change_percent', 'f8'),
+    ('volume', 'i8'),
+    ('turnover', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('open', 'f8'),
+    ('prev_close', 'f8'),
+    ('timestamp', 'i8'),
+]
+
+
+def quote_snapshot(quotes: Iterable[Quote]):
+    """把一组行情转换为结构化数组（每只股票一行），便于对整个自选股做列运算"""
+    import numpy as np
+
+    names = [name for name, _ in QUOTE_SNAPSHOT_FIELDS]
+    rows = [tuple(getattr(quote, name) for name in names) for quote in quotes]
+    return np.array(rows, dtype=QUOTE_SNAPSHOT_FIELDS)
+
+
+def quotes_from_snapshot(snapshot, names: Dict[str, str] = None) -> List[Quote]:
+    """由结构化数组还原行情记录（名称缺省为 股票<代码>）"""
+    names = names or {}
+    quotes = []
+    for row in snapshot.tolist():
+        fields = dict(zip(snapshot.dtype.names, row))
+        fields['name'] = names.get(fields['code'], f"股票{fields['code']}")
+        quotes.append(Quote.from_dict(fields))
+    return quotes
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描结果存储
+每轮扫描的行情、信号、评分、提醒和错误追加写入本地SQLite数据库（WAL模式），用于事后核对提醒，
+不需要重新请求接口：
+  - 扫描线程只把本轮结果放入队列立即返回，由一个后台写入线程按轮批量写入，
+    队列中积压的多轮结果合并为一个事务提交；队列满时丢弃并计数，不阻塞扫描；
+  - 只追加，不修改已写入的行；
+  - 按股票代码和时间建索引，查询某只股票某段时间的结果只读取对应的索引范围。
+
+用法:
+  python scan_store.py --db data/scans.db --code 600000 --since "2026-10-16 09:30"
+  python scan_store.py --db data/scans.db --alerts --since 2026-10-16
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+DEFAULT_SCAN_DB = 'data/scans.db'
+DEFAULT_QUEUE_SIZE = 100  # 等待写入的扫描轮数上限
+
+# 每只股票的结果列（行情字段 + 信号），买卖信号以JSON数组保存
+RESULT_COLUMNS = ('code', 'name', 'price', 'change', 'change_percent', 'volume', 'turnover',
+                  'high', 'low', 'open', 'prev_close', 'timestamp',
+                  'score', 'recommendation', 'buy_signals', 'sell_signals')
+JSON_COLUMNS = ('buy_signals', 'sell_signals')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    time INTEGER NOT NULL,
+    seconds REAL,
+    n_results INTEGER NOT NULL,
+    n_alerts INTEGER NOT NULL,
+    n_errors INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    scan_id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    name TEXT,
+    price REAL,
+    change REAL,
+    change_percent REAL,
+    volume REAL,
+    turnover REAL,
+    high REAL,
+    low REAL,
+    open REAL,
+    prev_close REAL,
+    timestamp INTEGER,
+    score INTEGER,
+    recommendation TEXT,
+    buy_signals TEXT,
+    sell_signals TEXT
+);
+CREATE INDEX IF NOT EXISTS results_code_time ON results (code, time);
+CREATE INDEX IF NOT EXISTS results_time ON results (time);
+CREATE TABLE IF NOT EXISTS alerts (
+    scan_id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_code_time ON alerts (code, time);
+CREATE INDEX IF NOT EXISTS alerts_time ON alerts (time);
+CREATE TABLE IF NOT EXISTS errors (
+    scan_id INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    code TEXT NOT NULL,
+    error TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS errors_code_time ON errors (code, time);
+"""
+
+TimeArg = Union[None, int, float, str, datetime]
+
+
+def to_timestamp(value: TimeArg) -> Optional[int]:
+    """查询时间参数转换为整数秒：支持时间戳、datetime 和 ISO格式字符串（如 2026-10-16 09:30）"""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+class ScanStore:
+    """只追加的扫描结果库
+
+    submit 在扫描线程中调用，不等待写入；后台写入线程在第一次 submit 时启动。
+    查询每次使用独立的只读连接，WAL模式下读取不会被写入阻塞。
+    """
+
+    def __init__(self, path: str = DEFAULT_SCAN_DB, queue_size: int = DEFAULT_QUEUE_SIZE, readonly: bool = False):
+        """readonly 时只用于查询：不创建目录和表，数据库不存在时抛出FileNotFoundError"""
+        self.path = path
+        self.stats = {'scans': 0, 'rows': 0, 'batches': 0, 'dropped': 0, 'errors': 0}
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        if readonly:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"扫描结果库不存在: {path}")
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')  # 写入模式保存在数据库文件中
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10)
+
+    def submit(self, summary: Dict[str, Any]) -> bool:
+        """提交一轮扫描结果（scan_stocks 的返回值），立即返回；队列已满时丢弃并返回False"""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='scan-store', daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(summary)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            return False
+        return True
+
+    def pending(self) -> int:
+        """等待写入的扫描轮数"""
+        return self._queue.qsize()
+
+    def _run(self):
+        connection = self._connect()
+        connection.execute('PRAGMA synchronous=NORMAL')  # WAL模式下提交时不等待每次fsync
+        stop = False
+        while not stop:
+            # 把队列中已有的结果一次取完，合并为一个事务；Event 表示 flush，None 表示停止
+            batch, flushes = [], []
+            item = self._queue.get()
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    flushes.append(item)
+                else:
+                    batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(connection, batch)
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    print(f"写入扫描结果失败: {str(e)}")
+            for event in flushes:
+                event.set()
+        connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        with connection:
+            for summary in batch:
+                scan_time = to_timestamp(summary['time'])
+                cursor = connection.execute(
+                    'INSERT INTO scans (time, seconds, n_results, n_alerts, n_errors) VALUES (?, ?, ?, ?, ?)',
+                    (scan_time, summary.get('seconds'), len(summary['results']),
+                     len(summary['alerts']), len(summary['errors'])))
+                scan_id = cursor.lastrowid
+                connection.executemany(
+                    f"INSERT INTO results (scan_id, time, {', '.join(RESULT_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * (len(RESULT_COLUMNS) + 2))})",
+                    [(scan_id, scan_time) + tuple(json.dumps(row.get(column), ensure_ascii=False)
+                                                  if column in JSON_COLUMNS else row.get(column)
+                                                  for column in RESULT_COLUMNS)
+                     for row in summary['results']])
+                connection.executemany(
+                    'INSERT INTO alerts (scan_id, time, code, message) VALUES (?, ?, ?, ?)',
+                    [(scan_id, scan_time, code, message)
+                     for code, messages in summary['alerts'].items() for message in messages])
+                connection.executemany(
+                    'INSERT INTO errors (scan_id, time, code, error) VALUES (?, ?, ?, ?)',
+                    [(scan_id, scan_time, code, error) for code, error in summary['errors'].items()])
+        self.stats['rows'] += sum(len(summary['results']) for summary in batch)
+        self.stats['scans'] += len(batch)
+        self.stats['batches'] += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待此前提交的结果全部写入，返回是否在超时前完成"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(deadline - time.monotonic(), 0))
+
+    def close(self, timeout: float = 10):
+        """写完队列中的结果后停止写入线程（之后再submit会重新启动）；最多等待timeout秒，不会一直阻塞"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        deadline = time.monotonic() + timeout
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            print("扫描结果写入队列已满，未等待写入完成")
+            return
+        thread.join(timeout=max(deadline - time.monotonic(), 0))
+
+    def _query(self, table: str, code: Optional[str], start: TimeArg, end: TimeArg,
+               limit: Optional[int]) -> List[Dict[str, Any]]:
+        conditions, params = [], []
+        if code is not None:
+            conditions.append('code = ?')
+            params.append(code)
+        for operator, value in (('>=', start), ('<', end)):
+            value = to_timestamp(value)
+            if value is not None:
+                conditions.append(f'time {operator} ?')
+                params.append(value)
+        sql = f'SELECT * FROM {table}'
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY time, rowid'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True, timeout=10)
+        try:
+            connection.row_factory = sqlite3.Row
+            rows = [dict(row) for row in connection.execute(sql, params)]
+        finally:
+            connection.close()
+        for row in rows:
+            for column in JSON_COLUMNS:
+                if column in row and row[column] is not None:
+                    row[column] = json.loads(row[column])
+        return rows
+
+    def results(self, code: Optional[str] = None, start: TimeArg = None, end: TimeArg = None,
+                limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """查询扫描结果（时间范围为 [start, end)，按时间排序）"""
+        return self._query('results', code, start, end, limit)
+
+    def alerts(self, code: Optional[str] = None, start: TimeArg = None, end: TimeArg = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """查询提醒记录"""
+        return self._query('alerts', code, start, end, limit)
+
+    def errors(self, code: Optional[str] = None, start: TimeArg = None, end: TimeArg = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """查询扫描出错记录"""
+        return self._query('errors', code, start, end, limit)
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    from records import format_timestamp
+
+    parser = argparse.ArgumentParser(description='查询扫描结果库')
+    parser.add_argument('--db', default=DEFAULT_SCAN_DB, help='数据库路径')
+    parser.add_argument('--code', help='股票代码')
+    parser.add_argument('--since', help='起始时间（含），如 2026-10-16 09:30')
+    parser.add_argument('--until', help='结束时间（不含）')
+    parser.add_argument('--alerts', action='store_true', help='查询提醒记录')
+    parser.add_argument('--limit', type=int, default=100, help='最多输出的行数')
+    args = parser.parse_args(argv)
+
+    try:
+        store = ScanStore(args.db, readonly=True)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if args.alerts:
+        for row in store.alerts(args.code, args.since, args.until, args.limit):
+            print(f"{format_timestamp(row['time'])}  {row['code']}  {row['message']}")
+        return
+    for row in store.results(args.code, args.since, args.until, args.limit):
+        print(f"{format_timestamp(row['time'])}  {row['code']}  {row['name']}  {row['price']:.2f}  "
+              f"{row['change_percent']:+.2f}%  评分 {row['score']}  {row['recommendation']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描调度
+按固定频率（以启动时刻为基准，不随扫描耗时漂移）安排每只股票的扫描：
+  - 股票分为若干优先级档位，各档位有自己的扫描间隔（如持仓3秒、长尾5分钟）；
+  - 股票很多的档位按 max_batch 分片，各分片在间隔内错开，避免同一时刻集中请求；
+  - 只在交易时段内扫描，休市期间（夜间、周末、节假日、午间休市）不请求接口
+"""
+
+import heapq
+import math
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from market_calendar import MarketCalendar
+
+DEFAULT_MAX_BATCH = 200   # 每个分片最多的股票数
+MAX_IDLE_SECONDS = 300    # 休市期间最长连续等待时间（防止系统时间调整后睡过头）
+
+
+class Tier:
+    """一个优先级档位"""
+
+    def __init__(self, name: str, interval: float, codes: Sequence[str], priority: int = 0):
+        self.name = name
+        self.interval = interval
+        self.codes = list(codes)
+        self.priority = priority  # 数值越小越先扫描
+
+
+class ScanScheduler:
+    """固定频率、分档位、按交易时段的扫描调度器
+
+    due 返回当前应扫描的股票（同一时刻到期的各档位合并为一次扫描，高优先级在前），
+    next_wakeup 返回距离下一次到期的秒数。时间参数均可传入，便于测试。
+    """
+
+    def __init__(self, tiers: List[Tier], calendar: Optional[MarketCalendar] = None,
+                 max_batch: int = DEFAULT_MAX_BATCH, start: Optional[float] = None):
+        self.tiers = sorted(tiers, key=lambda tier: tier.priority)
+        self.calendar = calendar  # 为None时不区分交易时段
+        self.stats: Dict[str, Dict[str, int]] = {tier.name: {'ticks': 0, 'missed': 0} for tier in self.tiers}
+        self._paused = False  # 休市后第一次到期不计入错过的周期
+        start = time.monotonic() if start is None else start
+        # 堆元素: (下次到期时间, 优先级, 序号, 档位, 分片)
+        self._heap = []
+        for tier in self.tiers:
+            n_slices = max(1, math.ceil(len(tier.codes) / max_batch))
+            for i in range(n_slices):
+                codes = tier.codes[i * max_batch:(i + 1) * max_batch]
+                if codes:
+                    offset = tier.interval * i / n_slices
+                    self._heap.append((start + offset, tier.priority, len(self._heap), tier, codes))
+        heapq.heapify(self._heap)
+
+    def is_open(self, wall: Optional[datetime] = None) -> bool:
+        return self.calendar is None or self.calendar.is_open(wall or datetime.now())
+
+    def due(self, now: Optional[float] = None, wall: Optional[datetime] = None) -> List[str]:
+        """取出已到期的股票并安排各分片的下一次扫描；休市时返回空列表
+
+        错过的周期（扫描超时或休市）不补扫，下一次到期时间对齐到原来的固定频率。
+        """
+        now = time.monotonic() if now is None else now
+        if not self._heap:
+            return []
+        if not self.is_open(wall):
+            self._paused = True
+            return []
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            next_due, priority, seq, tier, codes = heapq.heappop(self._heap)
+            due.append((priority, seq, codes))
+            missed = int((now - next_due) // tier.interval)
+            self.stats[tier.name]['ticks'] += 1
+            if not self._paused:
+                self.stats[tier.name]['missed'] += missed
+            heapq.heappush(self._heap, (next_due + (missed + 1) * tier.interval, priority, seq, tier, codes))
+        self._paused = False
+        due.sort(key=lambda entry: entry[:2])
+        return list(dict.fromkeys(code for _, _, codes in due for code in codes))
+
+    def next_wakeup(self, now: Optional[float] = None, wall: Optional[datetime] = None) -> float:
+        """距离下一次需要检查的秒数"""
+        now = time.monotonic() if now is None else now
+        if not self._heap:
+            return MAX_IDLE_SECONDS
+        if not self.is_open(wall):
+            wall = wall or datetime.now()
+            return min((self.calendar.next_open(wall) - wall).total_seconds(), MAX_IDLE_SECONDS)
+        return max(self._heap[0][0] - now, 0.0)
+
+
+def build_tiers(watchlist: Sequence[str], tier_configs: List[Dict], default_interval: float) -> List[Tier]:
+    """由 schedule.tiers 配置生成档位；未列入任何档位的自选股使用 scan_interval
+
+    只调度自选股中的股票；同一股票出现在多个档位时归入排在前面的档位。
+    """
+    watchset = set(watchlist)
+    assigned = set()
+    tiers = []
+    for priority, config in enumerate(tier_configs):
+        codes = [code for code in config.get('codes', []) if code in watchset and code not in assigned]
+        assigned.update(codes)
+        if codes:
+            tiers.append(Tier(config.get('name', f'tier{priority}'), config['interval'], codes, priority))
+    rest = [code for code in watchlist if code not in assigned]
+    if rest:
+        tiers.append(Tier('default', default_interval, rest, len(tier_configs)))
+    return tiers
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全市场选股
+每轮对全部上市A股（约5000只）按 analyze_buy_sell_signals 的规则打分，只保留评分最高和最低的N只：
+  - 历史日K线每个交易日载入一次，组成 股票数 × K线数 的矩阵，每轮只把最新行情写入最后一列，
+    整个矩阵一次向量化计算指标和评分（batch_indicators），不逐只建立指标状态；
+  - 前N名和后N名用堆选出（heapq.nlargest / nsmallest，O(n log N)），不对全市场排序；
+  - 结果为排名表，每行含排名、代码、名称、价格、涨跌幅、评分、建议和信号
+"""
+
+import heapq
+import time
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from batch_indicators import analyze_matrix, build_signals
+
+DEFAULT_TOP_N = 20
+DEFAULT_BOTTOM_N = 20
+HISTORY_COLUMNS = ('close', 'high', 'low')  # 技术分析用到的日K线列
+
+
+def select_extremes(scores: Sequence[int], tiebreak: Sequence[float],
+                    top_n: int, bottom_n: int) -> tuple:
+    """用堆选出评分最高的top_n行和最低的bottom_n行，返回 (前N名行号, 后N名行号)，各自按名次排列
+
+    评分相同时按 tiebreak（涨跌幅）排序：前N名涨幅大的在前，后N名跌幅大的在前。
+    """
+    keys = list(zip(np.asarray(scores).tolist(), np.asarray(tiebreak).tolist(), range(len(scores))))
+    top = heapq.nlargest(top_n, keys)
+    bottom = heapq.nsmallest(bottom_n, keys)
+    return [key[2] for key in top], [key[2] for key in bottom]
+
+
+def format_table(rows: List[Dict[str, Any]], title: str = '') -> str:
+    """把排名行格式化为文本表格"""
+    lines = [title] if title else []
+    lines.append(f"{'排名':>4} {'代码':<8}{'名称':<10}{'价格':>9}{'涨跌幅':>9}{'评分':>6}  {'建议':<12}信号")
+    for row in rows:
+        signals = '、'.join(row['buy_signals'] + row['sell_signals'])
+        lines.append(f"{row['rank']:>4} {row['code']:<8}{row['name']:<10}{row['price']:>9.2f}"
+                     f"{row['change_percent']:>8.2f}%{row['score']:>6}  {row['recommendation']:<12}{signals}")
+    return '\n'.join(lines)
+
+
+class Screener:
+    """全市场选股器
+
+    api 需提供 get_stock_list、get_historical_ohlcv 和批量行情接口；run_tasks 执行一组 (函数, 参数) 任务
+    并返回 任务键 -> 结果（失败为异常对象），call_api 包装单次接口调用（重试、计时），
+    由 StockMonitor 传入其线程池和重试逻辑，默认顺序执行、不重试。
+    """
+
+    def __init__(self, api, history_days: int, top_n: int = DEFAULT_TOP_N, bottom_n: int = DEFAULT_BOTTOM_N,
+                 interval: Optional[float] = None,
+                 run_tasks: Optional[Callable[[Dict[Any, tuple]], Dict[Any, Any]]] = None,
+                 call_api: Optional[Callable] = None, enabled: Optional[Sequence[str]] = None):
+        self.api = api
+        self.history_days = history_days
+        self.top_n = top_n
+        self.bottom_n = bottom_n
+        self.interval = interval  # 两轮选股的间隔（秒），由监控循环调度
+        self.run_tasks = run_tasks or self._run_sequential
+        self.call_api = call_api or (lambda func, *args, **kwargs: func(*args, **kwargs))
+        self.enabled = enabled  # 参与打分的技术指标，None为默认（MA、RSI、MACD、KDJ）
+        self.codes: List[str] = []       # 历史矩阵各行对应的股票
+        self.skipped: Dict[str, str] = {}  # 历史数据获取失败或不足的股票 -> 原因
+        self._matrix: Optional[np.ndarray] = None  # (列, 股票数, K线数+1)，最后一列为当日K线
+        self._day = None
+        self._next_run = 0.0
+
+    @staticmethod
+    def _run_sequential(tasks: Dict[Any, tuple]) -> Dict[Any, Any]:
+        results = {}
+        for key, (func, arg) in tasks.items():
+            try:
+                results[key] = func(arg)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    def due(self, now: Optional[float] = None) -> bool:
+        """是否到了下一轮选股的时间"""
+        return (time.monotonic() if now is None else now) >= self._next_run
+
+    def seconds_until_due(self, now: Optional[float] = None) -> float:
+        return max(0.0, self._next_run - (time.monotonic() if now is None else now))
+
+    def load_history(self, codes: List[str]):
+        """载入全部股票的历史日K线，组成矩阵（K线不足 history_days 根的股票本交易日不参与选股）"""
+        days = self.history_days
+        tasks = {code: (partial(self.call_api, self.api.get_historical_ohlcv, days=days), code) for code in codes}
+        histories = self.run_tasks(tasks)
+        self.skipped = {}
+        valid = []
+        for code in codes:
+            history = histories[code]
+            if isinstance(history, Exception):
+                self.skipped[code] = f"{type(history).__name__}: {str(history)}"
+            elif len(history['close']) < days:
+                self.skipped[code] = f"历史K线不足{days}根"
+            else:
+                valid.append(code)
+
+        matrix = np.empty((len(HISTORY_COLUMNS), len(valid), days + 1))
+        for row, code in enumerate(valid):
+            for i, column in enumerate(HISTORY_COLUMNS):
+                matrix[i, row, :days] = histories[code][column][-days:]
+        self.codes = valid
+        self._matrix = matrix
+
+    def fetch_quotes(self, codes: List[str]) -> Dict[str, Any]:
+        """按批量接口并发获取全部股票的行情，获取失败的批次不在结果中"""
+        tasks = {i: (partial(self.call_api, self.api.get_realtime_prices), chunk)
+                 for i, chunk in enumerate(self.api.chunk_codes(codes))}
+        quotes = {}
+        for value in self.run_tasks(tasks).values():
+            if not isinstance(value, Exception):
+                quotes.update(value)
+        return quotes
+
+    def screen(self) -> Dict[str, Any]:
+        """对全市场打分一次，返回 top/bottom 排名表以及 universe（股票总数）、scored（参与打分数）、seconds
+
+        股票列表和历史K线每个交易日只获取一次。
+        """
+        start = time.perf_counter()
+        if self.interval:
+            self._next_run = time.monotonic() + self.interval
+        today = datetime.now().date()
+        if self._day != today or self._matrix is None:
+            universe = self.call_api(self.api.get_stock_list)
+            self.load_history(list(dict.fromkeys(universe)))
+            self._day = today
+
+        quotes = self.fetch_quotes(self.codes)
+        rows = np.array([row for row, code in enumerate(self.codes) if code in quotes], dtype=np.intp)
+        matrix = self._matrix[:, rows]
+        quoted = [quotes[self.codes[row]] for row in rows]
+        for i, field in enumerate(('price', 'high', 'low')):
+            matrix[i, :, -1] = [getattr(quote, field) for quote in quoted]
+
+        result = analyze_matrix(matrix[0], matrix[1], matrix[2], self.enabled)
+        changes = [quote.change_percent for quote in quoted]
+        top, bottom = select_extremes(result['score'], changes, self.top_n, self.bottom_n)
+
+        def ranked(indices):
+            table = []
+            for rank, i in enumerate(indices, 1):
+                quote = quoted[i]
+                table.append(dict(build_signals(result, i), rank=rank, code=quote.code, name=quote.name,
+                                  price=quote.price, change_percent=quote.change_percent))
+            return table
+
+        return {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'universe': len(self.codes) + len(self.skipped),
+            'scored': len(rows),
+            'top': ranked(top),
+            'bottom': ranked(bottom),
+            'seconds': time.perf_counter() - start,
+        }
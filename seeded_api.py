@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+可复现的模拟数据源
+同一种子、同一股票代码在任何时候生成的K线序列都相同，用于基准测试、回测与本地模拟服务器
+"""
+
+import time
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from stock_monitor import TongHuaShunAPI
+from bar_store import date_to_int, previous_trading_day
+from records import Quote, MarketInfo
+
+# 所有K线序列从该交易日开始生成，保证同一日期的数据与请求窗口无关
+ANCHOR_DATE = np.datetime64('2000-01-03')
+DEFAULT_SEED = 42
+
+
+def code_seed(stock_code: str) -> int:
+    """股票代码转换为随机种子"""
+    return int(stock_code) if stock_code.isdigit() else zlib.crc32(stock_code.encode('utf-8'))
+
+
+def generate_bars(stock_code: str, days: int, end: date, seed: int = DEFAULT_SEED) -> Dict[str, np.ndarray]:
+    """生成截至end（含）的最近days根日K线，返回 列名 -> 数组（列与BarStore一致）"""
+    end_index = int(np.busday_count(ANCHOR_DATE, np.datetime64(end)))
+    if not np.is_busday(np.datetime64(end)):
+        end_index -= 1
+    n_total = end_index + 1
+    start_index = max(n_total - days, 0)
+
+    rng = np.random.default_rng([seed, code_seed(stock_code)])
+    base_price = 10.0 + rng.random() * 90
+    returns = rng.normal(0, 0.015, size=n_total)
+    ranges = rng.uniform(0, 0.02, size=(2, n_total))
+    gaps = rng.normal(0, 0.005, size=n_total)
+    volumes = rng.integers(1_000_000, 100_000_000, size=n_total)
+
+    close = base_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([base_price], close[:-1])) * (1 + gaps)
+    high = np.maximum(open_, close) * (1 + ranges[0])
+    low = np.minimum(open_, close) * (1 - ranges[1])
+
+    window = slice(start_index, n_total)
+    dates = np.busday_offset(ANCHOR_DATE, np.arange(start_index, n_total), roll='forward')
+    months = dates.astype('datetime64[M]')
+    date_ints = ((dates.astype('datetime64[Y]').astype(np.int64) + 1970) * 10000
+                 + (months.astype(np.int64) % 12 + 1) * 100
+                 + (dates - months).astype(np.int64) + 1)
+    return {
+        'date': date_ints.astype(np.int32),
+        'open': open_[window],
+        'high': high[window],
+        'low': low[window],
+        'close': close[window],
+        'volume': volumes[window].astype(np.float64),
+    }
+
+
+class SeededAPI(TongHuaShunAPI):
+    """基于固定种子的模拟API，替代 TongHuaShunAPI 中基于 random 的模拟数据"""
+
+    def __init__(self, seed: int = DEFAULT_SEED, **kwargs):
+        super().__init__(**kwargs)
+        self.seed = seed
+        self._prev_closes: Dict[tuple, float] = {}
+
+    def _rng(self, *parts) -> np.random.Generator:
+        return np.random.default_rng([self.seed] + [code_seed(str(part)) for part in parts])
+
+    def get_historical_bars(self, stock_code: str, days: int = 30, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """获取截至end（默认上一交易日）的最近days根日K线"""
+        end = end or previous_trading_day(datetime.now().date())
+        columns = generate_bars(stock_code, days, end, self.seed)
+        return [
+            {name: (int(values[i]) if name == 'date' else float(values[i])) for name, values in columns.items()}
+            for i in range(len(columns['date']))
+        ]
+
+    def _request_quotes(self, stock_codes: List[str]) -> Dict[str, Quote]:
+        """行情：以上一交易日收盘价为基准，按当日日期生成确定的盘中价格"""
+        now = datetime.now()
+        prev_day = previous_trading_day(now.date())
+        timestamp = int(now.timestamp())
+        quotes = {}
+        for stock_code in stock_codes:
+            key = (stock_code, prev_day)
+            if key not in self._prev_closes:
+                self._prev_closes[key] = float(generate_bars(stock_code, 1, prev_day, self.seed)['close'][-1])
+            prev_close = self._prev_closes[key]
+            rng = self._rng(stock_code, date_to_int(now.date()))
+            change_percent = float(np.clip(rng.normal(0, 2.5), -10, 10))
+            price = prev_close * (1 + change_percent / 100)
+            volume = int(rng.integers(1_000_000, 100_000_000))
+            quotes[stock_code] = Quote(
+                stock_code,
+                f'股票{stock_code}',
+                price,
+                price - prev_close,
+                change_percent,
+                volume,
+                price * volume,
+                max(price, prev_close) * 1.01,
+                min(price, prev_close) * 0.99,
+                prev_close,
+                prev_close,
+                timestamp
+            )
+        return quotes
+
+    def _request_market_infos(self, stock_codes: List[str]) -> Dict[str, MarketInfo]:
+        """盘面信息：每只股票固定"""
+        timestamp = int(time.time())
+        infos = {}
+        for stock_code in stock_codes:
+            rng = self._rng('info', stock_code)
+            total_shares = int(rng.integers(100_000_000, 10_000_000_000))
+            circulation_shares = int(total_shares * rng.uniform(0.5, 1.0))
+            price = 10.0 + rng.random() * 90
+            infos[stock_code] = MarketInfo(
+                stock_code,
+                float(rng.uniform(5, 80)),
+                float(rng.uniform(0.5, 10)),
+                price * total_shares,
+                price * circulation_shares,
+                total_shares,
+                circulation_shares,
+                timestamp
+            )
+        return infos
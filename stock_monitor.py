@@ -5,29 +5,96 @@
 实时监控自选股的价格、盘面信息、新闻，并分析买卖点
 """
 
+import os
 import time
 import json
-import requests
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, date
+from typing import List, Dict, Any, Optional, Sequence
+from collections import deque
+from functools import partial
 import threading
+import queue
 import sys
 
-# 尝试导入tkinter，如果失败则使用命令行模式
-try:
-    import tkinter as tk
-    from tkinter import messagebox, scrolledtext
-    TKINTER_AVAILABLE = True
-except ImportError:
-    TKINTER_AVAILABLE = False
-    print("警告: tkinter未安装，将使用命令行模式")
+from metrics import MetricsRegistry
+from records import Quote, MarketInfo, NewsItem, format_timestamp, quote_snapshot
+from news_feed import NewsFeed, DEFAULT_KEYWORDS, DEFAULT_MAX_SEEN, DEFAULT_NEWS_LIMIT
+from scheduler import ScanScheduler, build_tiers, DEFAULT_MAX_BATCH
+from market_calendar import MarketCalendar
+from config_reload import (ConfigWatcher, DEFAULT_RELOAD_INTERVAL, diff_watchlist, restart_required,
+                           schedule_changed, validate_config)
+from indicators import (IndicatorEngine, enabled_indicators, MA_PERIODS, RSI_PERIOD, KDJ_PERIOD, MIN_BARS,
+                        MACD_SIGNAL as MACD_SIGNAL_PERIOD)
+
+# tkinter 在首次创建图形界面时才导入（命令行模式、--once 和测试不加载GUI依赖），见 load_tkinter
+tk = None
+scrolledtext = None
+
+# 监控指标说明（Prometheus HELP）
+METRIC_HELP = {
+    'stage_seconds': '每轮扫描中各阶段(fetch/analyze/display/alert)的累计耗时',
+    'api_seconds': '单次API调用耗时（按接口）',
+    'api_errors_total': 'API调用失败次数（按接口和错误类型）',
+    'symbol_errors_total': '扫描单只股票出错次数（按阶段和错误类型）',
+    'scan_seconds': '整轮扫描耗时',
+    'last_scan_seconds': '最近一轮扫描耗时',
+    'scan_interval_seconds': '配置的扫描间隔',
+    'scan_utilization_ratio': '最近一轮扫描耗时 / 扫描间隔',
+    'scan_overruns_total': '扫描耗时超过扫描间隔的次数',
+    'scans_total': '已完成的扫描轮数',
+    'watchlist_symbols': '自选股数量',
+    'loop_errors_total': '监控循环异常次数',
+    'stream_ticks_total': '已处理的推送行情条数',
+    'stream_queue_depth': '待处理的推送行情队列长度',
+    'tick_seconds': '单条推送行情的分析与提醒检查耗时',
+    'schedule_missed_ticks': '因扫描超时而跳过的调度周期数（按档位）',
+    'alerts_total': '提交到分发队列的提醒数（合并、限流前）',
+    'config_reload_errors_total': '配置文件热加载失败（读取或校验出错，保留原配置）的次数',
+    'api_cache_events': '接口缓存累计命中(hits)、过期命中(stale_hits)、未命中(misses)、淘汰(evictions)等次数',
+    'api_cache_entries': '接口缓存当前条目数',
+    'scan_store_pending': '等待写入扫描结果库的扫描轮数',
+    'scan_store_dropped_total': '因写入队列已满而未保存的扫描轮数',
+    'screen_seconds': '一轮全市场选股耗时',
+    'screen_symbols': '最近一轮全市场选股参与打分的股票数',
+}
+
+# 技术指标参数见 indicators.py
+STATE_INDICATORS = ('ma', 'rsi', 'macd', 'kdj')  # IndicatorState 增量计算的指标，其余启用的指标按日K线计算
+HISTORY_DAYS = 30  # 技术分析默认使用的历史K线数
+
+# API调用默认参数（可在 config.json 的 api_config 中覆盖）
+DEFAULT_API_TIMEOUT = 10
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_BATCH_SIZE = 50
+RETRY_BACKOFF = 0.2
+LOOP_ERROR_RETRY = 1.0  # 监控循环出错后等待多久再继续（秒）
+MOCK_NEWS_INTERVAL = 600  # 模拟新闻的发布间隔（秒）
+# 模拟的上市A股代码段 (起始代码, 数量)：沪市主板、科创板，深市主板、中小板、创业板，共5000只
+MOCK_STOCK_RANGES = ((600000, 1700), (603000, 800), (688000, 500), (1, 800), (2001, 700), (300001, 500))
+
+# --once 模式的输出与退出码
+DEFAULT_ONCE_OUTPUT = 'data/last_scan.json'
+EXIT_OK = 0        # 全部股票扫描成功
+EXIT_PARTIAL = 1   # 部分股票获取或分析失败
+EXIT_FAILED = 2    # 扫描无法进行（配置错误、整轮出错等）
+SIGNAL_SUMMARY_FIELDS = ('score', 'recommendation', 'buy_signals', 'sell_signals')
+
+# GUI日志参数
+LOG_FLUSH_INTERVAL_MS = 100  # 主线程刷新日志的间隔
+LOG_MAX_LINES = 5000         # 日志区域最多保留的行数
+ALERT_POLL_INTERVAL_MS = 200  # 主线程检查待显示弹窗提醒的间隔
 
 
 class StockAnalyzer:
-    """股票技术分析类"""
+    """股票技术分析类
     
-    def __init__(self):
-        pass
+    enabled 为参与计算和打分的指标（见 indicators.INDICATORS），默认为 MA、RSI、MACD、KDJ；
+    calculate_ma 等方法单独计算一个指标，综合分析由指标注册表按启用的指标计算。
+    """
+    
+    def __init__(self, enabled: Optional[Sequence[str]] = None):
+        self.engine = IndicatorEngine(enabled)
+        self.enabled = self.engine.enabled
     
     def calculate_ma(self, prices: List[float], period: int = 5) -> float:
         """计算移动平均线"""
@@ -36,7 +103,7 @@ class StockAnalyzer:
         return sum(prices[-period:]) / period
     
     def calculate_rsi(self, prices: List[float], period: int = 14) -> float:
-        """计算相对强弱指标RSI"""
+        """计算相对强弱指标RSI（Wilder平滑）"""
         if len(prices) < period + 1:
             return 50
         
@@ -52,11 +119,12 @@ class StockAnalyzer:
                 gains.append(0)
                 losses.append(abs(diff))
         
-        if len(gains) < period:
-            return 50
-        
-        avg_gain = sum(gains[-period:]) / period
-        avg_loss = sum(losses[-period:]) / period
+        # 首个平均值取简单平均，之后按Wilder方式平滑
+        avg_gain = sum(gains[:period]) / period
+        avg_loss = sum(losses[:period]) / period
+        for gain, loss in zip(gains[period:], losses[period:]):
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
         
         if avg_loss == 0:
             return 100
@@ -70,12 +138,18 @@ class StockAnalyzer:
         if len(prices) < 26:
             return {'macd': 0, 'signal': 0, 'histogram': 0}
         
-        ema_12 = self._calculate_ema(prices, 12)
-        ema_26 = self._calculate_ema(prices, 26)
-        macd_line = ema_12 - ema_26
+        ema_12 = self._calculate_ema_series(prices, 12)
+        ema_26 = self._calculate_ema_series(prices, 26)
+        # ema_12 从第12根K线开始，ema_26 从第26根开始，对齐后相减
+        macd_series = [e12 - e26 for e12, e26 in zip(ema_12[14:], ema_26)]
+        
+        # 信号线为MACD线的9日EMA，以第一个MACD值为初始值
+        multiplier = 2 / (MACD_SIGNAL_PERIOD + 1)
+        signal_line = macd_series[0]
+        for value in macd_series[1:]:
+            signal_line = (value - signal_line) * multiplier + signal_line
         
-        # 简化版本，实际应计算MACD的EMA
-        signal_line = macd_line * 0.9
+        macd_line = macd_series[-1]
         histogram = macd_line - signal_line
         
         return {
@@ -89,268 +163,1048 @@ class StockAnalyzer:
         if len(prices) < period:
             return prices[-1] if prices else 0
         
+        return self._calculate_ema_series(prices, period)[-1]
+    
+    def _calculate_ema_series(self, prices: List[float], period: int) -> List[float]:
+        """计算指数移动平均序列（从第period根K线开始）"""
+        if len(prices) < period:
+            return []
+        
         multiplier = 2 / (period + 1)
         ema = sum(prices[:period]) / period
+        series = [ema]
         
         for price in prices[period:]:
             ema = (price - ema) * multiplier + ema
+            series.append(ema)
         
-        return ema
+        return series
     
     def calculate_kdj(self, highs: List[float], lows: List[float], closes: List[float], period: int = 9) -> Dict[str, float]:
-        """计算KDJ指标"""
+        """计算KDJ指标（K、D为RSV的递推平滑，初始值50）"""
         if len(closes) < period:
             return {'k': 50, 'd': 50, 'j': 50}
         
-        lowest_low = min(lows[-period:])
-        highest_high = max(highs[-period:])
-        
-        if highest_high == lowest_low:
-            rsv = 50
-        else:
-            rsv = (closes[-1] - lowest_low) / (highest_high - lowest_low) * 100
+        k = 50
+        d = 50
+        for t in range(period - 1, len(closes)):
+            lowest_low = min(lows[t - period + 1:t + 1])
+            highest_high = max(highs[t - period + 1:t + 1])
+            
+            if highest_high == lowest_low:
+                rsv = 50
+            else:
+                rsv = (closes[t] - lowest_low) / (highest_high - lowest_low) * 100
+            
+            k = k * 2 / 3 + rsv / 3
+            d = d * 2 / 3 + k / 3
         
-        # 简化计算
-        k = rsv * 0.67 + 33
-        d = k * 0.67 + 33
         j = 3 * k - 2 * d
         
         return {'k': k, 'd': d, 'j': j}
     
+    def calculate_indicators(self, stock_data: Dict[str, Any]) -> Dict[str, float]:
+        """计算启用的全部指标，返回 字段名 -> 数值（共用的中间量每个只计算一次）"""
+        prices = stock_data.get('prices', [])
+        return self.engine.compute(prices, stock_data.get('highs', prices), stock_data.get('lows', prices),
+                                   stock_data.get('volumes'))
+    
     def analyze_buy_sell_signals(self, stock_data: Dict[str, Any]) -> Dict[str, Any]:
-        """综合分析买卖信号"""
-        signals = {
-            'buy_signals': [],
-            'sell_signals': [],
-            'score': 0,
-            'recommendation': 'HOLD'
-        }
+        """综合分析买卖信号（只计算和打分启用的指标）"""
+        if len(stock_data.get('prices', [])) < MIN_BARS:
+            return self.evaluate_signals(None)
+        return self.evaluate_signals(self.calculate_indicators(stock_data))
+    
+    def evaluate_signals(self, indicators: Optional[Dict[str, float]]) -> Dict[str, Any]:
+        """根据已计算好的指标值按启用指标的规则打分，indicators为None表示数据不足
         
-        prices = stock_data.get('prices', [])
-        if len(prices) < 30:
-            return signals
-        
-        # MA分析
-        ma5 = self.calculate_ma(prices, 5)
-        ma10 = self.calculate_ma(prices, 10)
-        ma20 = self.calculate_ma(prices, 20)
-        current_price = prices[-1]
-        
-        if ma5 > ma10 > ma20 and current_price > ma5:
-            signals['buy_signals'].append('均线多头排列')
-            signals['score'] += 2
-        elif ma5 < ma10 < ma20 and current_price < ma5:
-            signals['sell_signals'].append('均线空头排列')
-            signals['score'] -= 2
-        
-        # RSI分析
-        rsi = self.calculate_rsi(prices)
-        if rsi < 30:
-            signals['buy_signals'].append(f'RSI超卖({rsi:.2f})')
-            signals['score'] += 3
-        elif rsi > 70:
-            signals['sell_signals'].append(f'RSI超买({rsi:.2f})')
-            signals['score'] -= 3
-        
-        # MACD分析
-        macd = self.calculate_macd(prices)
-        if macd['histogram'] > 0 and macd['macd'] > macd['signal']:
-            signals['buy_signals'].append('MACD金叉')
-            signals['score'] += 2
-        elif macd['histogram'] < 0 and macd['macd'] < macd['signal']:
-            signals['sell_signals'].append('MACD死叉')
-            signals['score'] -= 2
-        
-        # KDJ分析（需要高低价数据）
-        highs = stock_data.get('highs', prices)
-        lows = stock_data.get('lows', prices)
-        kdj = self.calculate_kdj(highs, lows, prices)
-        
-        if kdj['j'] < 20:
-            signals['buy_signals'].append(f'KDJ超卖(J={kdj["j"]:.2f})')
-            signals['score'] += 2
-        elif kdj['j'] > 80:
-            signals['sell_signals'].append(f'KDJ超买(J={kdj["j"]:.2f})')
-            signals['score'] -= 2
-        
-        # 综合建议
-        if signals['score'] >= 5:
-            signals['recommendation'] = 'STRONG BUY'
-        elif signals['score'] >= 2:
-            signals['recommendation'] = 'BUY'
-        elif signals['score'] <= -5:
-            signals['recommendation'] = 'STRONG SELL'
-        elif signals['score'] <= -2:
-            signals['recommendation'] = 'SELL'
+        启用了只输出数值的指标（ATR、OBV）时，结果中的 indicators 字段为这些指标的值。
+        """
+        return self.engine.evaluate(indicators)
+    
+    def analyze_buy_sell_signals_batch(self, closes, highs=None, lows=None, volumes=None) -> List[Dict[str, Any]]:
+        """批量综合分析买卖信号
+        
+        closes/highs/lows/volumes 为 股票数 × K线数 的二维矩阵，所有指标和评分一次向量化计算，
+        返回与 analyze_buy_sell_signals 相同格式的结果列表（顺序与矩阵行一致）
+        """
+        from batch_indicators import analyze_matrix, build_signals
+        
+        result = analyze_matrix(closes, highs, lows, self.enabled, volumes)
+        return [build_signals(result, row) for row in range(len(result['score']))]
+
+
+class IndicatorState:
+    """单只股票的滚动指标状态
+    
+    每根新K线只做常数次浮点运算：均线用滑动和，RSI用Wilder平均，
+    MACD和信号线用EMA递推，KDJ的K、D值递推平滑。结果与StockAnalyzer全量计算一致。
+    """
+    
+    def __init__(self):
+        self.bar_count = 0
+        self.prev_close = None
+        self._closes = deque(maxlen=max(MA_PERIODS))
+        self._ma_sums = {period: 0.0 for period in MA_PERIODS}
+        # RSI
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        # EMA / MACD
+        self._ema = {period: 0.0 for period in (12, 26)}
+        self._signal = 0.0
+        # KDJ：只保留前period-1根，加上新K线正好是一个窗口
+        self._highs = deque(maxlen=KDJ_PERIOD - 1)
+        self._lows = deque(maxlen=KDJ_PERIOD - 1)
+        self._k = 50.0
+        self._d = 50.0
+        self._last = None
+    
+    @staticmethod
+    def _parse_bar(bar) -> tuple:
+        """K线可以是收盘价、(收盘, 最高, 最低) 元组、实时行情Quote，或含close/price、high、low的字典"""
+        if isinstance(bar, tuple):
+            return bar
+        if isinstance(bar, Quote):
+            return bar.price, bar.high, bar.low
+        if isinstance(bar, dict):
+            close = bar['close'] if 'close' in bar else bar['price']
+            return close, bar.get('high', close), bar.get('low', close)
+        return bar, bar, bar
+    
+    def _step(self, bar) -> tuple:
+        """计算加入一根K线后的新状态与指标值，不修改自身"""
+        close, high, low = self._parse_bar(bar)
+        n = self.bar_count + 1
+        new = {}
+        indicators = {'price': close}
+        
+        # 均线：滑动窗口求和
+        ma_sums = {}
+        for period in MA_PERIODS:
+            total = self._ma_sums[period] + close
+            if len(self._closes) >= period:
+                total -= self._closes[-period]
+            ma_sums[period] = total
+            indicators[f'ma{period}'] = total / period if n >= period else 0
+        new['_ma_sums'] = ma_sums
+        
+        # RSI：前RSI_PERIOD个涨跌取简单平均，之后Wilder平滑
+        gain_sum, loss_sum = self._gain_sum, self._loss_sum
+        avg_gain, avg_loss = self._avg_gain, self._avg_loss
+        if self.prev_close is not None:
+            diff = close - self.prev_close
+            gain = diff if diff > 0 else 0
+            loss = 0 if diff > 0 else -diff
+            n_diffs = n - 1
+            if n_diffs <= RSI_PERIOD:
+                gain_sum += gain
+                loss_sum += loss
+                if n_diffs == RSI_PERIOD:
+                    avg_gain = gain_sum / RSI_PERIOD
+                    avg_loss = loss_sum / RSI_PERIOD
+            else:
+                avg_gain = (avg_gain * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+                avg_loss = (avg_loss * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+        new.update(_gain_sum=gain_sum, _loss_sum=loss_sum, _avg_gain=avg_gain, _avg_loss=avg_loss)
+        if n < RSI_PERIOD + 1:
+            indicators['rsi'] = 50
+        elif avg_loss == 0:
+            indicators['rsi'] = 100
         else:
-            signals['recommendation'] = 'HOLD'
+            indicators['rsi'] = 100 - (100 / (1 + avg_gain / avg_loss))
         
-        return signals
+        # EMA：前period根累加求简单平均作为初值（未满period时暂存累加和）
+        ema = {}
+        for period, value in self._ema.items():
+            if n < period:
+                ema[period] = value + close
+            elif n == period:
+                ema[period] = (value + close) / period
+            else:
+                ema[period] = (close - value) * (2 / (period + 1)) + value
+        new['_ema'] = ema
+        
+        # MACD：信号线为MACD线的EMA，以第一个MACD值为初值
+        signal = self._signal
+        if n < 26:
+            indicators.update(macd=0, signal=0, histogram=0)
+        else:
+            macd_line = ema[12] - ema[26]
+            if n == 26:
+                signal = macd_line
+            else:
+                signal = (macd_line - signal) * (2 / (MACD_SIGNAL_PERIOD + 1)) + signal
+            indicators.update(macd=macd_line, signal=signal, histogram=macd_line - signal)
+        new['_signal'] = signal
+        
+        # KDJ
+        k, d = self._k, self._d
+        if n < KDJ_PERIOD:
+            indicators.update(k=50, d=50, j=50)
+        else:
+            highest_high = max(max(self._highs), high)
+            lowest_low = min(min(self._lows), low)
+            if highest_high == lowest_low:
+                rsv = 50
+            else:
+                rsv = (close - lowest_low) / (highest_high - lowest_low) * 100
+            k = k * 2 / 3 + rsv / 3
+            d = d * 2 / 3 + k / 3
+            indicators.update(k=k, d=d, j=3 * k - 2 * d)
+        new.update(_k=k, _d=d)
+        
+        return (close, high, low), new, indicators
+    
+    def update(self, bar) -> Dict[str, float]:
+        """追加一根已完成的K线，返回最新指标值"""
+        (close, high, low), new, indicators = self._step(bar)
+        for name, value in new.items():
+            setattr(self, name, value)
+        self._closes.append(close)
+        self._highs.append(high)
+        self._lows.append(low)
+        self.prev_close = close
+        self.bar_count += 1
+        self._last = indicators
+        return indicators
+    
+    def peek(self, bar) -> Dict[str, float]:
+        """计算假设追加该K线后的指标值，但不改变状态（用于盘中未完成的K线）"""
+        return self._step(bar)[2]
+    
+    def indicators(self) -> Optional[Dict[str, float]]:
+        """最近一次update后的指标值"""
+        return self._last
 
 
 class TongHuaShunAPI:
     """同花顺API接口类"""
     
-    def __init__(self):
-        # 注意：这里使用模拟数据，实际使用需要真实的同花顺API密钥
-        self.base_url = "http://api.mock.com"  # 模拟API地址
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
+    def __init__(self, timeout: float = DEFAULT_API_TIMEOUT, batch_size: int = DEFAULT_BATCH_SIZE,
+                 bar_store=None, mode: str = 'mock', base_url: Optional[str] = None,
+                 pool_size: int = DEFAULT_MAX_WORKERS):
+        # 注意：mock模式使用进程内模拟数据；http模式请求base_url（例如 mock_server.py 启动的本地服务器）
+        self.mode = mode
+        self.base_url = (base_url or "http://api.mock.com").rstrip('/')  # 模拟API地址
+        self.timeout = timeout  # 单次HTTP请求超时（秒）
+        self.batch_size = batch_size  # 批量接口每次请求的股票数
+        self.bar_store = bar_store  # 本地K线库（BarStore），为None时每次全量获取历史数据
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """HTTP会话，首次发起请求时创建（mock模式不导入requests）"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    session = requests.Session()
+                    session.headers.update({
+                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+                    })
+                    # 连接池大小与并发线程数一致，保证并发请求都能复用长连接
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+    
+    def _get(self, path: str, params: Dict[str, Any]) -> Any:
+        """发起HTTP GET请求，返回响应中的data字段"""
+        response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['data']
+    
+    def chunk_codes(self, stock_codes: List[str], chunk_size: Optional[int] = None) -> List[List[str]]:
+        """将股票代码按批量大小分组（去重并保持顺序）"""
+        size = chunk_size or self.batch_size
+        codes = list(dict.fromkeys(stock_codes))
+        return [codes[i:i + size] for i in range(0, len(codes), size)]
     
     def get_realtime_price(self, stock_code: str) -> Dict[str, Any]:
         """获取实时股价"""
+        return self.get_realtime_prices([stock_code])[stock_code]
+    
+    def get_realtime_prices(self, stock_codes: List[str], chunk_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """批量获取实时股价，每批一次请求，返回 股票代码 -> 行情"""
+        result = {}
+        for chunk in self.chunk_codes(stock_codes, chunk_size):
+            result.update(self._request_quotes(chunk))
+        return result
+    
+    def _request_quotes(self, stock_codes: List[str]) -> Dict[str, Quote]:
+        """一次请求获取一批股票的行情"""
+        if self.mode == 'http':
+            data = self._get('/quotes', {'codes': ','.join(stock_codes)})
+            return {code: Quote.from_dict(quote) for code, quote in data.items()}
+        
         # 模拟数据
         import random
-        base_price = 10.0 + random.random() * 90
-        
-        return {
-            'code': stock_code,
-            'name': f'股票{stock_code}',
-            'price': base_price,
-            'change': random.uniform(-5, 5),
-            'change_percent': random.uniform(-10, 10),
-            'volume': random.randint(1000000, 100000000),
-            'turnover': base_price * random.randint(1000000, 100000000),
-            'high': base_price * 1.05,
-            'low': base_price * 0.95,
-            'open': base_price * 0.98,
-            'prev_close': base_price * 0.97,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        timestamp = int(time.time())
+        quotes = {}
+        for stock_code in stock_codes:
+            base_price = 10.0 + random.random() * 90
+            quotes[stock_code] = Quote(
+                stock_code,
+                f'股票{stock_code}',
+                base_price,
+                random.uniform(-5, 5),
+                random.uniform(-10, 10),
+                random.randint(1000000, 100000000),
+                base_price * random.randint(1000000, 100000000),
+                base_price * 1.05,
+                base_price * 0.95,
+                base_price * 0.98,
+                base_price * 0.97,
+                timestamp
+            )
+        return quotes
+    
+    def get_stock_list(self) -> List[str]:
+        """获取全部上市A股的代码"""
+        if self.mode == 'http':
+            return self._get('/stocks', {})
+        return [f'{code:06d}' for start, count in MOCK_STOCK_RANGES for code in range(start, start + count)]
     
     def get_market_info(self, stock_code: str) -> Dict[str, Any]:
         """获取盘面信息"""
+        return self.get_market_infos([stock_code])[stock_code]
+    
+    def get_market_infos(self, stock_codes: List[str], chunk_size: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """批量获取盘面信息，每批一次请求，返回 股票代码 -> 盘面信息"""
+        result = {}
+        for chunk in self.chunk_codes(stock_codes, chunk_size):
+            result.update(self._request_market_infos(chunk))
+        return result
+    
+    def _request_market_infos(self, stock_codes: List[str]) -> Dict[str, MarketInfo]:
+        """一次请求获取一批股票的盘面信息"""
+        if self.mode == 'http':
+            data = self._get('/market_info', {'codes': ','.join(stock_codes)})
+            return {code: MarketInfo.from_dict(info) for code, info in data.items()}
+        
+        timestamp = int(time.time())
         return {
-            'code': stock_code,
-            'pe_ratio': 15.5,
-            'pb_ratio': 2.3,
-            'market_cap': 1000000000,
-            'circulation_market_cap': 800000000,
-            'total_shares': 100000000,
-            'circulation_shares': 80000000,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            stock_code: MarketInfo(stock_code, 15.5, 2.3, 1000000000, 800000000,
+                                   100000000, 80000000, timestamp)
+            for stock_code in stock_codes
         }
     
-    def get_news(self, stock_code: str, limit: int = 5) -> List[Dict[str, str]]:
-        """获取股票新闻"""
-        # 模拟新闻数据
-        news_list = []
-        for i in range(limit):
-            news_list.append({
-                'title': f'股票{stock_code}相关新闻标题{i+1}',
-                'content': '这是新闻内容摘要...',
-                'source': '财经网',
-                'publish_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'url': f'http://news.example.com/{stock_code}/{i}'
-            })
-        return news_list
+    def get_news(self, stock_code: str, limit: int = 5, since: Optional[int] = None) -> List[NewsItem]:
+        """获取股票新闻（最新的在前）；指定since时只返回发布时间不早于since的新闻"""
+        if self.mode == 'http':
+            params = {'code': stock_code, 'limit': limit}
+            if since is not None:
+                params['since'] = since
+            return [NewsItem.from_dict(item) for item in self._get('/news', params)]
+        
+        # 模拟新闻数据：每 MOCK_NEWS_INTERVAL 秒发布一条
+        latest = int(time.time()) // MOCK_NEWS_INTERVAL
+        news = []
+        for n in range(latest, latest - limit, -1):
+            publish_time = n * MOCK_NEWS_INTERVAL
+            if since is not None and publish_time < since:
+                break
+            news.append(NewsItem(f'股票{stock_code}相关新闻标题{n}', '这是新闻内容摘要...', '财经网',
+                                 publish_time, f'http://news.example.com/{stock_code}/{n}'))
+        return news
+    
+    def get_historical_prices(self, stock_code: str, days: int = 30) -> Sequence[float]:
+        """获取历史价格数据（截至上一交易日的收盘价）
+        
+        配置了本地K线库时，只向接口请求库中缺少的最新几根K线，其余直接从本地文件内存映射返回。
+        """
+        if self.bar_store is None:
+            return [bar['close'] for bar in self.get_historical_bars(stock_code, days)]
+        
+        self.sync_history(stock_code, days)
+        return self.bar_store.read(stock_code, 'close', days)
+
+    def get_historical_ohlcv(self, stock_code: str, days: int = 30) -> Dict[str, Sequence[float]]:
+        """获取截至上一交易日的最近days根日K线，返回 列名(date/open/high/low/close/volume) -> 数组
+
+        配置了本地K线库时返回内存映射视图。
+        """
+        if self.bar_store is None:
+            from bar_store import COLUMNS
+            bars = self.get_historical_bars(stock_code, days)
+            return {column: [bar[column] for bar in bars] for column in COLUMNS}
+
+        self.sync_history(stock_code, days)
+        return self.bar_store.read_bars(stock_code, days)
+
+    def sync_history(self, stock_code: str, days: int):
+        """把本地K线库补齐到上一交易日，且至少包含days根K线"""
+        from bar_store import previous_trading_day, trading_days_between
+        
+        store = self.bar_store
+        end = previous_trading_day(datetime.now().date())
+        last = store.last_date(stock_code)
+        
+        if last is None or store.bar_count(stock_code) < days:
+            # 首次获取或回看窗口变长：整体重新下载
+            store.replace(stock_code, self.get_historical_bars(stock_code, days, end))
+        elif last < end:
+            missing = len(trading_days_between(last, end))
+            store.append(stock_code, self.get_historical_bars(stock_code, missing, end))
+    
+    def get_average_volume(self, stock_code: str, days: int = 20) -> float:
+        """截至上一交易日最近days根日K线的平均成交量"""
+        if self.bar_store is None:
+            volumes = [bar['volume'] for bar in self.get_historical_bars(stock_code, days)]
+        else:
+            self.sync_history(stock_code, days)
+            volumes = self.bar_store.read(stock_code, 'volume', days)
+        return float(sum(volumes) / len(volumes)) if len(volumes) else 0.0
     
-    def get_historical_prices(self, stock_code: str, days: int = 30) -> List[float]:
-        """获取历史价格数据"""
+    def get_historical_bars(self, stock_code: str, days: int = 30, end: Optional[date] = None) -> List[Dict[str, Any]]:
+        """获取截至end（默认上一交易日）的最近days根日K线，每根含date(YYYYMMDD)与OHLCV"""
+        from bar_store import date_to_int, previous_trading_day
+        
+        day = end or previous_trading_day(datetime.now().date())
+        if self.mode == 'http':
+            return self._get('/history', {'code': stock_code, 'days': days, 'end': date_to_int(day)})
+        
         import random
+        trading_days = []
+        while len(trading_days) < days:
+            trading_days.append(day)
+            day = previous_trading_day(day)
+        
         base_price = 10.0 + random.random() * 90
-        prices = []
-        for i in range(days):
+        bars = []
+        for day in reversed(trading_days):
             price = base_price * (1 + random.uniform(-0.05, 0.05))
-            prices.append(price)
+            bars.append({
+                'date': date_to_int(day),
+                'open': base_price,
+                'high': max(base_price, price) * (1 + random.uniform(0, 0.02)),
+                'low': min(base_price, price) * (1 - random.uniform(0, 0.02)),
+                'close': price,
+                'volume': float(random.randint(1000000, 100000000))
+            })
             base_price = price
-        return prices
+        return bars
 
 
 class StockMonitor:
     """股票监控主类"""
     
     def __init__(self, config_file: str = 'config.json'):
+        self.config_file = config_file
         self.config = self.load_config(config_file)
-        self.api = TongHuaShunAPI()
-        self.analyzer = StockAnalyzer()
+        self.config_version = 0  # 每次热加载配置后加1（GUI据此刷新自选股列表）
+        api_config = self.config.get('api_config', {})
+        self.api = self.create_api(TongHuaShunAPI(timeout=api_config.get('timeout', DEFAULT_API_TIMEOUT),
+                                                  batch_size=api_config.get('batch_size', DEFAULT_BATCH_SIZE),
+                                                  bar_store=self.create_bar_store(),
+                                                  mode=api_config.get('mode', 'mock'),
+                                                  base_url=api_config.get('base_url'),
+                                                  pool_size=api_config.get('max_workers', DEFAULT_MAX_WORKERS)))
+        self.configure_indicators(self.config)
         self.running = False
         self.monitor_thread = None
-        self.alert_window = None
+        self.stop_event = threading.Event()  # 停止时立即唤醒等待中的监控循环
+        self.tick_subscriber = None  # stream.enabled 时订阅行情推送
+        # 每只股票的滚动指标状态，历史K线每个交易日只载入一次
+        self.indicator_states: Dict[str, IndicatorState] = {}
+        self.states_date = None
+        self.fetch_executor = None
+        # 行情聚合的1分钟、5分钟和日K线（日K线含载入的历史K线），技术分析从这里读取
+        self.bars = self.create_bar_aggregator()
+        self.analysis_pool = None  # 多进程分析（analysis.workers > 1）时使用的进程池
+        self.snapshot = None  # 最近一轮扫描的行情快照（结构化数组）
+        self.screener = None  # screener.enabled 时的全市场选股器，首次选股时创建
+        self.scan_store = None  # scan_store.enabled 时保存每轮扫描结果，首次保存时打开
+        # 自选股1分钟收益率的滚动相关矩阵与板块联动信号（correlation.enabled），首次检查时创建
+        self.correlation = None
+        self.correlation_minute = None  # 最近一次计入相关矩阵的分钟
+        self.sector_monitor = None
+        self.avg_volumes: Dict[tuple, float] = {}  # (股票代码, 天数) -> 平均成交量，每个交易日载入一次
+        self.calendar = MarketCalendar(self.config.get('schedule', {}).get('holidays', []))
+        news_config = self.config.get('news', {})
+        self.news_feed = NewsFeed(news_config.get('keywords', DEFAULT_KEYWORDS),
+                                  news_config.get('max_seen', DEFAULT_MAX_SEEN))
+        self.alert_rules = self.load_alert_rules()
+        self.alert_dispatcher = self.create_alert_dispatcher()
+        self.metrics = MetricsRegistry(help_texts=METRIC_HELP)
+        metrics_port = self.config.get('metrics', {}).get('port')
+        if metrics_port:
+            self.metrics.serve(metrics_port)
         
-    def load_config(self, config_file: str) -> Dict[str, Any]:
-        """加载配置文件"""
-        default_config = {
+    def create_api(self, api: 'TongHuaShunAPI'):
+        """按 cache 配置为盘面信息和新闻接口加上TTL缓存"""
+        cache_config = self.config.get('cache', {})
+        if not cache_config.get('enabled', True):
+            return api
+        from api_cache import CachedAPI, DEFAULT_STALE_TTL, DEFAULT_MAX_ENTRIES
+        ttls = {endpoint: cache_config[f'{endpoint}_ttl']
+                for endpoint in ('market_info', 'news') if f'{endpoint}_ttl' in cache_config}
+        return CachedAPI(api, ttls=ttls,
+                         stale_ttl=cache_config.get('stale_ttl', DEFAULT_STALE_TTL),
+                         max_entries=cache_config.get('max_entries', DEFAULT_MAX_ENTRIES))
+    
+    def create_alert_dispatcher(self, config: Optional[Dict[str, Any]] = None):
+        """按 alert_dispatch 配置创建提醒分发器（popup 渠道由GUI启动时加入），config 默认为当前配置"""
+        from alert_dispatch import (AlertDispatcher, ConsoleSink, FileSink, WebhookSink,
+                                    DEFAULT_COALESCE_SECONDS, DEFAULT_SYMBOL_INTERVAL, DEFAULT_MAX_PER_MINUTE)
+        dispatch_config = (self.config if config is None else config).get('alert_dispatch', {})
+        sinks = []
+        for name in dispatch_config.get('sinks', ['console', 'popup']):
+            if name == 'console':
+                sinks.append(ConsoleSink())
+            elif name == 'file' and dispatch_config.get('file'):
+                sinks.append(FileSink(self.data_path(dispatch_config['file'])))
+            elif name == 'webhook' and dispatch_config.get('webhook_url'):
+                sinks.append(WebhookSink(dispatch_config['webhook_url']))
+        return AlertDispatcher(sinks,
+                               coalesce_seconds=dispatch_config.get('coalesce_seconds', DEFAULT_COALESCE_SECONDS),
+                               symbol_interval=dispatch_config.get('symbol_interval', DEFAULT_SYMBOL_INTERVAL),
+                               max_per_minute=dispatch_config.get('max_per_minute', DEFAULT_MAX_PER_MINUTE))
+    
+    def create_bar_aggregator(self):
+        """按 bars.capacity 配置创建K线聚合器；日K线容量至少能放下历史K线和当日K线"""
+        from bar_aggregator import BarAggregator
+        capacities = dict(self.config.get('bars', {}).get('capacity', {}))
+        capacities['1d'] = max(capacities.get('1d', 0), self.history_days() + 1)
+        return BarAggregator(capacities)
+    
+    def data_path(self, path: str) -> str:
+        """配置中的数据文件路径：相对路径相对于配置文件所在目录，而不是当前工作目录"""
+        return os.path.join(os.path.dirname(os.path.abspath(self.config_file)), path)
+    
+    def create_bar_store(self):
+        """按 data_store.bar_path 创建本地K线库，未配置时返回None"""
+        bar_path = self.config.get('data_store', {}).get('bar_path')
+        if not bar_path:
+            return None
+        from bar_store import BarStore
+        return BarStore(self.data_path(bar_path))
+    
+    def default_config(self) -> Dict[str, Any]:
+        """默认配置（配置文件中缺少的配置段用它补全）"""
+        return {
             'watchlist': ['600000', '000001', '000002'],  # 自选股列表
             'scan_interval': 60,  # 扫描间隔（秒）
             'alert_conditions': {
                 'price_change_threshold': 3.0,  # 价格变动阈值(%)
                 'volume_threshold': 200,  # 成交量阈值（%）
                 'buy_signal_threshold': 5,  # 买入信号阈值
-                'sell_signal_threshold': -5  # 卖出信号阈值
+                'sell_signal_threshold': -5,  # 卖出信号阈值
+                'cooldown': 600  # 同一提醒对同一股票的最小间隔（秒）
             },
+            'alert_rules': [],  # 自定义提醒规则，如 {"name": "放量上涨", "when": "change_percent > 3 and volume > 2x avg_volume_20"}
             'technical_analysis': {
                 'enable_ma': True,
                 'enable_rsi': True,
                 'enable_macd': True,
-                'enable_kdj': True
+                'enable_kdj': True,
+                'enable_boll': False,  # 布林线（参与评分）
+                'enable_atr': False,  # 平均真实波幅（只显示数值）
+                'enable_obv': False,  # 能量潮（只显示数值）
+                'history_days': HISTORY_DAYS  # 技术分析使用的历史K线数（至少30）
+            },
+            'api_config': {
+                'timeout': DEFAULT_API_TIMEOUT,  # 单次调用超时（秒）
+                'retry_times': 3,  # 失败重试次数
+                'max_workers': DEFAULT_MAX_WORKERS,  # 并发获取数据的线程数
+                'batch_size': DEFAULT_BATCH_SIZE,  # 批量行情接口每次请求的股票数
+                'mode': 'mock',  # mock: 进程内模拟数据; http: 请求 base_url
+                'base_url': 'http://127.0.0.1:8900'  # http模式的接口地址（可用 mock_server.py 在本地启动）
+            },
+            'data_store': {
+                'bar_path': 'data/bars'  # 本地K线库目录（相对于配置文件所在目录），留空则不缓存历史数据
+            },
+            'cache': {
+                'enabled': True,
+                'market_info_ttl': 3600,  # 盘面信息缓存时间（秒）
+                'news_ttl': 300,  # 新闻缓存时间（秒）
+                'stale_ttl': 600,  # 过期后仍可先返回旧值并后台刷新的时间（秒）
+                'max_entries': 10000  # 每个接口最多缓存的条目数
+            },
+            'metrics': {
+                'file': '',  # Prometheus文本格式指标文件（相对路径相对于配置文件所在目录），留空则不写
+                'port': None  # 本地 /metrics HTTP端点端口，为空则不启动
+            },
+            'analysis': {
+                'workers': 1  # 技术分析进程数，1表示在监控线程内增量计算
+            },
+            'news': {
+                'keywords': list(DEFAULT_KEYWORDS),  # 重要新闻关键词（标题含任一即为重要）
+                'limit': DEFAULT_NEWS_LIMIT,  # 每次最多请求的新闻条数（只请求上次之后发布的）
+                'max_seen': DEFAULT_MAX_SEEN  # 新闻去重索引最多保留的条目数
+            },
+            'bars': {
+                'capacity': {'1m': 480, '5m': 480}  # 每只股票各周期K线环形缓冲区的容量（根）
+            },
+            'screener': {
+                'enabled': False,  # 监控运行时定期对全部A股打分选股
+                'top_n': 20,  # 保留评分最高的股票数
+                'bottom_n': 20,  # 保留评分最低的股票数
+                'interval': None,  # 两轮选股的间隔（秒），为空时等于 scan_interval
+                'output': 'data/screener.json'  # 最近一轮选股结果（排名表），相对于配置文件所在目录，留空则不写
+            },
+            'correlation': {
+                'enabled': True,  # 维护自选股1分钟收益率的滚动相关矩阵，检查板块联动
+                'window': 120,  # 滚动窗口（1分钟K线根数）
+                'sectors': {},  # 板块 -> 股票代码，如 {"白酒": ["600519", "000858"]}
+                'min_correlation': 0.6,  # 板块内两两平均相关系数阈值
+                'min_move': 2.0,  # 板块成员同向涨跌、平均涨跌幅达到该值(%)时提醒
+                'discover': False  # 按相关系数自动发现联动的股票组并一起检查
+            },
+            'scan_store': {
+                'enabled': False,  # 每轮扫描的行情、信号、提醒追加写入本地SQLite库（后台线程批量写入）
+                'path': 'data/scans.db',  # 扫描结果库路径，相对于配置文件所在目录（可用 scan_store.py 按股票和时间查询）
+                'queue_size': 100  # 等待写入的扫描轮数上限，超出时丢弃，不阻塞扫描
+            },
+            'reload': {
+                'enabled': True,  # 监控运行时检测到配置文件修改后自动重新加载
+                'interval': DEFAULT_RELOAD_INTERVAL  # 检查配置文件是否修改的间隔（秒）
+            },
+            'stream': {
+                'enabled': False,  # 订阅实时行情推送（与定时扫描同时运行）
+                'host': '127.0.0.1',  # 推送服务器地址（可用 tick_stream.py 在本地启动）
+                'port': 8901,
+                'queue_size': 1000  # 待处理行情队列长度，满时暂停读取（背压）
+            },
+            'schedule': {
+                'market_hours_only': True,  # 只在A股交易时段内扫描
+                'holidays': [],  # 追加的休市日期（YYYY-MM-DD），内置日历之外的
+                'tiers': [],  # 优先级档位，如 {"name": "持仓", "interval": 3, "codes": ["600000"]}；其余股票按 scan_interval
+                'max_batch': DEFAULT_MAX_BATCH  # 档位内每个分片的股票数，分片在扫描间隔内错开
+            },
+            'alert_dispatch': {
+                'sinks': ['console', 'popup'],  # 提醒渠道: console / popup（GUI弹窗）/ file / webhook
+                'file': 'data/alerts.jsonl',  # file 渠道写入的文件（相对于配置文件所在目录）
+                'webhook_url': None,  # webhook 渠道的地址（本地可用 mock_server.py 的 /webhook）
+                'coalesce_seconds': 2.0,  # 同一股票的提醒合并等待时间（秒）
+                'symbol_interval': 60,  # 同一股票两次提醒的最小间隔（秒）
+                'max_per_minute': 20  # 每分钟最多提醒数，超出部分汇总为一条
             }
         }
-        
+    
+    def read_config(self, config_file: str) -> Dict[str, Any]:
+        """读取配置文件并合并默认配置；文件不存在或格式错误时抛出异常，不写文件"""
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError("配置文件的顶层必须是对象")
+        # 合并默认配置
+        for key, value in self.default_config().items():
+            if key not in config:
+                config[key] = value
+        return config
+    
+    def load_config(self, config_file: str) -> Dict[str, Any]:
+        """加载配置文件（不存在时写入默认配置）"""
         try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # 合并默认配置
-                for key, value in default_config.items():
-                    if key not in config:
-                        config[key] = value
-                return config
+            return self.read_config(config_file)
         except FileNotFoundError:
             print(f"配置文件 {config_file} 不存在，使用默认配置")
+            default_config = self.default_config()
             # 创建默认配置文件
             with open(config_file, 'w', encoding='utf-8') as f:
                 json.dump(default_config, f, ensure_ascii=False, indent=2)
             return default_config
     
-    def scan_stocks(self):
-        """扫描股票"""
+    def scan_stocks(self, stock_codes: Optional[List[str]] = None) -> Dict[str, Any]:
+        """扫描股票（默认扫描全部自选股，调度器按档位传入本次到期的股票）
+        
+        返回本轮结果: results（每只股票的行情与信号）、alerts（股票代码 -> 提醒文字）、errors（股票代码 -> 错误）。
+        """
+        scan_start = time.perf_counter()
+        summary = {'time': datetime.now().isoformat(timespec='seconds'), 'results': [], 'alerts': {}, 'errors': {}}
         print(f"\n{'='*60}")
         print(f"开始扫描 - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
         
-        for stock_code in self.config['watchlist']:
+        self._reset_states_if_new_day()
+        watchlist = self.config['watchlist'] if stock_codes is None else stock_codes
+        with self.metrics.timer('stage_seconds', stage='fetch'):
+            results = self.fetch_all(watchlist)
+        
+        # 各阶段耗时按整轮累计后记录
+        stage_seconds = {'analyze': 0.0, 'display': 0.0, 'alert': 0.0}
+        
+        # 本轮行情的结构化数组快照（按自选股顺序，获取失败的股票不在其中）
+        self.snapshot = quote_snapshot(data['price_data'] for data in results.values()
+                                       if not isinstance(data, Exception))
+        
+        # 多进程模式下先一次性分析全部股票
+        pooled_signals = None
+        if self.analysis_workers() > 1:
+            t0 = time.perf_counter()
+            pooled_signals = self.analyze_all(watchlist, results)
+            stage_seconds['analyze'] += time.perf_counter() - t0
+        
+        # 按自选股顺序依次分析和显示，保证输出顺序确定；提醒规则最后对全部股票一次性求值
+        alert_entries = []
+        for stock_code in watchlist:
+            stage = 'fetch'
             try:
-                # 获取实时数据
-                price_data = self.api.get_realtime_price(stock_code)
-                market_info = self.api.get_market_info(stock_code)
-                news = self.api.get_news(stock_code, limit=3)
-                
-                # 获取历史数据用于技术分析
-                historical_prices = self.api.get_historical_prices(stock_code, days=30)
-                
-                # 构建分析数据
-                stock_data = {
-                    'prices': historical_prices,
-                    'highs': [p * 1.02 for p in historical_prices],
-                    'lows': [p * 0.98 for p in historical_prices]
-                }
+                data = results[stock_code]
+                if isinstance(data, Exception):
+                    raise data
                 
                 # 技术分析
-                signals = self.analyzer.analyze_buy_sell_signals(stock_data)
+                stage = 'analyze'
+                t0 = time.perf_counter()
+                if pooled_signals is None:
+                    signals = self.analyze_stock(stock_code, data['price_data'], data['history'])
+                else:
+                    signals = pooled_signals[stock_code]
+                    if isinstance(signals, Exception):
+                        raise signals
                 
                 # 显示信息
-                self.display_stock_info(price_data, market_info, signals, news)
+                stage = 'display'
+                t1 = time.perf_counter()
+                self.display_stock_info(data['price_data'], data['market_info'], signals,
+                                        self.news_feed.recent(stock_code))
                 
-                # 检查是否需要弹窗提醒
-                self.check_alert_conditions(price_data, signals, news)
+                stage_seconds['analyze'] += t1 - t0
+                stage_seconds['display'] += time.perf_counter() - t1
+                alert_entries.append((data['price_data'], signals, data['news']))
+                summary['results'].append(dict(data['price_data'].to_dict(),
+                                               **{key: signals[key] for key in SIGNAL_SUMMARY_FIELDS}))
                 
             except Exception as e:
+                self.metrics.inc('symbol_errors_total', stage=stage, error=type(e).__name__)
+                summary['errors'][stock_code] = f"{type(e).__name__}: {str(e)}"
                 print(f"扫描股票 {stock_code} 时出错: {str(e)}")
         
+        # 检查是否需要弹窗提醒
+        t0 = time.perf_counter()
+        try:
+            summary['alerts'] = self.check_alerts(alert_entries)
+        except Exception as e:
+            self.metrics.inc('symbol_errors_total', stage='alert', error=type(e).__name__)
+            print(f"检查提醒条件时出错: {str(e)}")
+        try:
+            summary['alerts'].update(self.check_sectors())
+        except Exception as e:
+            self.metrics.inc('symbol_errors_total', stage='sector', error=type(e).__name__)
+            print(f"检查板块联动时出错: {str(e)}")
+        stage_seconds['alert'] += time.perf_counter() - t0
+        
         print(f"{'='*60}\n")
+        self.record_cache_metrics()
+        
+        for stage, seconds in stage_seconds.items():
+            self.metrics.observe('stage_seconds', seconds, stage=stage)
+        summary['seconds'] = time.perf_counter() - scan_start
+        self.record_scan_metrics(summary['seconds'], len(watchlist))
+        self.persist_scan(summary)
+        return summary
     
-    def display_stock_info(self, price_data: Dict, market_info: Dict, signals: Dict, news: List[Dict]):
+    def persist_scan(self, summary: Dict[str, Any]):
+        """把本轮结果交给扫描结果库的后台写入线程（不等待写入完成）"""
+        store_config = self.config.get('scan_store', {})
+        if not store_config.get('enabled', False):
+            return
+        try:
+            if self.scan_store is None:
+                from scan_store import ScanStore, DEFAULT_SCAN_DB, DEFAULT_QUEUE_SIZE
+                self.scan_store = ScanStore(self.data_path(store_config.get('path', DEFAULT_SCAN_DB)),
+                                            store_config.get('queue_size', DEFAULT_QUEUE_SIZE))
+            if not self.scan_store.submit(summary):
+                self.metrics.inc('scan_store_dropped_total')
+                print("扫描结果库写入队列已满，本轮结果未保存")
+            self.metrics.set('scan_store_pending', self.scan_store.pending())
+        except Exception as e:
+            print(f"保存扫描结果失败: {str(e)}")
+    
+    def close_scan_store(self):
+        """写完队列中的扫描结果后关闭写入线程"""
+        if self.scan_store is not None:
+            self.scan_store.close()
+    
+    def close_api(self):
+        """停止接口缓存的后台刷新线程（未启用缓存时无操作）"""
+        from api_cache import CachedAPI
+        if isinstance(self.api, CachedAPI):
+            self.api.close()
+    
+    def record_cache_metrics(self):
+        """把接口缓存的累计命中、未命中等计数和条目数记入监控指标（不打印，避免每轮刷屏）"""
+        if not hasattr(self.api, 'cache_stats'):
+            return
+        for endpoint, stats in self.api.cache_stats().items():
+            for event, count in stats.items():
+                if event == 'size':
+                    self.metrics.set('api_cache_entries', count, endpoint=endpoint)
+                else:
+                    self.metrics.set('api_cache_events', count, endpoint=endpoint, event=event)
+    
+    def record_scan_metrics(self, duration: float, n_symbols: int):
+        """记录整轮扫描耗时与扫描间隔的比例，并按 metrics 配置导出"""
+        interval = self.config['scan_interval']
+        self.metrics.observe('scan_seconds', duration)
+        self.metrics.set('last_scan_seconds', duration)
+        self.metrics.set('scan_interval_seconds', interval)
+        self.metrics.set('scan_utilization_ratio', duration / interval if interval else 0)
+        self.metrics.set('watchlist_symbols', n_symbols)
+        self.metrics.inc('scans_total')
+        if duration > interval:
+            self.metrics.inc('scan_overruns_total')
+        
+        metrics_file = self.config.get('metrics', {}).get('file')
+        if metrics_file:
+            try:
+                self.metrics.write(self.data_path(metrics_file))
+            except OSError as e:
+                print(f"写入监控指标失败: {str(e)}")
+    
+    def fetch_all(self, stock_codes: List[str]) -> Dict[str, Any]:
+        """并发获取多只股票的数据
+        
+        行情和盘面信息按 api_config.batch_size 分批走批量接口，新闻和历史数据逐只获取，
+        所有请求在同一个线程池中并发执行（api_config.max_workers 为1时顺序执行）。
+        返回 股票代码 -> 数据字典；获取失败或超时的股票对应值为异常对象。
+        """
+        tasks = {}
+        for i, chunk in enumerate(self.api.chunk_codes(stock_codes)):
+            tasks[('quotes', i)] = (partial(self.call_api, self.api.get_realtime_prices), chunk)
+            tasks[('market_info', i)] = (partial(self.call_api, self.api.get_market_infos), chunk)
+        for stock_code in dict.fromkeys(stock_codes):
+            tasks[('stock', stock_code)] = (self.fetch_stock_data, stock_code)
+        
+        task_results = self._run_tasks(tasks)
+        
+        # 合并批量结果与逐只结果
+        batch_results = {'quotes': {}, 'market_info': {}}
+        batch_errors = {'quotes': {}, 'market_info': {}}
+        for (kind, key), value in task_results.items():
+            if kind == 'stock':
+                continue
+            if isinstance(value, Exception):
+                batch_errors[kind].update({code: value for code in tasks[(kind, key)][1]})
+            else:
+                batch_results[kind].update(value)
+        
+        results: Dict[str, Any] = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            data = task_results[('stock', stock_code)]
+            if not isinstance(data, Exception):
+                for kind, field in (('quotes', 'price_data'), ('market_info', 'market_info')):
+                    if stock_code in batch_results[kind]:
+                        data[field] = batch_results[kind][stock_code]
+                    else:
+                        data = batch_errors[kind].get(stock_code) or KeyError(f"未获取到{stock_code}的{kind}数据")
+                        break
+            results[stock_code] = data
+        return results
+    
+    def _run_tasks(self, tasks: Dict[Any, tuple]) -> Dict[Any, Any]:
+        """执行一组 (函数, 参数) 任务
+        
+        返回 任务键 -> 结果；失败或超时的任务对应值为异常对象。
+        """
+        api_config = self.config.get('api_config', {})
+        max_workers = api_config.get('max_workers', DEFAULT_MAX_WORKERS)
+        results: Dict[Any, Any] = {}
+        
+        if max_workers <= 1:
+            for key, (func, arg) in tasks.items():
+                try:
+                    results[key] = func(arg)
+                except Exception as e:
+                    results[key] = e
+            return results
+        
+        from concurrent.futures import ThreadPoolExecutor, wait
+        if self.fetch_executor is None:
+            self.fetch_executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                     thread_name_prefix='stock-fetch')
+        futures = {key: self.fetch_executor.submit(func, arg)
+                   for key, (func, arg) in tasks.items()}
+        
+        # 整轮扫描的截止时间默认等于扫描间隔，超时未完成的请求本轮放弃
+        scan_timeout = api_config.get('scan_timeout', self.config['scan_interval'])
+        wait(futures.values(), timeout=scan_timeout)
+        for key, future in futures.items():
+            if not future.done():
+                future.cancel()
+                results[key] = TimeoutError(f"获取数据超时({scan_timeout}秒)")
+            elif future.exception() is not None:
+                results[key] = future.exception()
+            else:
+                results[key] = future.result()
+        return results
+    
+    def fetch_stock_data(self, stock_code: str) -> Dict[str, Any]:
+        """获取单只股票的新闻，以及尚未载入时的历史数据（行情与盘面信息走批量接口）
+        
+        新闻只请求游标之后发布的，data['news'] 为去重后的新条目。
+        """
+        news_limit = self.config.get('news', {}).get('limit', DEFAULT_NEWS_LIMIT)
+        news = self.call_api(self.api.get_news, stock_code, limit=news_limit,
+                             since=self.news_feed.cursor(stock_code))
+        data = {
+            'news': self.news_feed.add(stock_code, news),
+            'history': None
+        }
+        if not self.bars.has_daily(stock_code):
+            data['history'] = self.call_api(self.api.get_historical_ohlcv, stock_code, days=self.history_days())
+        self.load_average_volumes(stock_code)
+        return data
+    
+    def load_average_volumes(self, stock_code: str):
+        """载入提醒规则用到的平均成交量（每个交易日一次）"""
+        for days in self.alert_rules.volume_windows:
+            if (stock_code, days) not in self.avg_volumes:
+                self.avg_volumes[(stock_code, days)] = self.call_api(self.api.get_average_volume, stock_code, days)
+    
+    def call_api(self, func, *args, **kwargs):
+        """调用API，失败时按 api_config.retry_times 重试
+        
+        每次调用的截止时间为 api_config.timeout 秒：超过截止时间后不再发起重试
+        （单次HTTP请求的超时由 TongHuaShunAPI 使用同一配置控制）。
+        """
+        api_config = self.config.get('api_config', {})
+        retry_times = api_config.get('retry_times', 0)
+        deadline = time.monotonic() + api_config.get('timeout', DEFAULT_API_TIMEOUT)
+        
+        endpoint = getattr(func, '__name__', 'unknown')
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                self.metrics.observe('api_seconds', time.perf_counter() - start, endpoint=endpoint)
+                return result
+            except Exception as e:
+                self.metrics.observe('api_seconds', time.perf_counter() - start, endpoint=endpoint)
+                self.metrics.inc('api_errors_total', endpoint=endpoint, error=type(e).__name__)
+                attempt += 1
+                backoff = min(RETRY_BACKOFF * 2 ** (attempt - 1), 2.0)
+                if attempt > retry_times or time.monotonic() + backoff >= deadline:
+                    raise
+                time.sleep(backoff)
+    
+    def history_days(self) -> int:
+        """技术分析使用的历史K线数（technical_analysis.history_days）"""
+        return self.config['technical_analysis'].get('history_days', HISTORY_DAYS)
+    
+    def _reset_states_if_new_day(self):
+        """跨交易日时清空滚动指标状态，重新载入历史数据"""
+        today = datetime.now().date()
+        if self.states_date != today:
+            self.indicator_states.clear()
+            self.bars.clear_daily()
+            self.avg_volumes.clear()
+            self.states_date = today
+    
+    def update_bars(self, stock_code: str, price_data: Quote, history: Optional[Dict] = None):
+        """行情计入K线聚合器；该股票的历史日K线尚未载入时先载入（history为None时请求接口）"""
+        if not self.bars.has_daily(stock_code):
+            if history is None:
+                history = self.call_api(self.api.get_historical_ohlcv, stock_code, days=self.history_days())
+            self.bars.load_daily(stock_code, history)
+        self.bars.update(price_data)
+    
+    def configure_indicators(self, config: Dict[str, Any]):
+        """按 technical_analysis.enable_* 创建分析器；IndicatorState 不覆盖的启用指标（BOLL、ATR、OBV）按日K线计算"""
+        enabled = enabled_indicators(config['technical_analysis'])
+        self.analyzer = StockAnalyzer(enabled)
+        self.daily_engine = IndicatorEngine([name for name in enabled if name not in STATE_INDICATORS])
+    
+    def analyze_stock(self, stock_code: str, price_data: Quote,
+                      history: Optional[Dict] = None) -> Dict[str, Any]:
+        """技术分析：已完成的日K线载入滚动状态，当日K线（由实时行情聚合）增量计入"""
+        self._reset_states_if_new_day()
+        self.update_bars(stock_code, price_data, history)
+        
+        with self.bars.lock:
+            daily = self.bars.bars(stock_code, '1d')
+            state = self.indicator_states.get(stock_code)
+            if state is None:
+                state = IndicatorState()
+                for bar in zip(daily['close'][:-1], daily['high'][:-1], daily['low'][:-1]):
+                    state.update(bar)
+                self.indicator_states[stock_code] = state
+            today = (daily['close'][-1], daily['high'][-1], daily['low'][-1])
+            if self.daily_engine.indicators:
+                columns = [daily[field].tolist() for field in ('close', 'high', 'low', 'volume')]
+        
+        if state.bar_count + 1 < MIN_BARS:
+            return self.analyzer.evaluate_signals(None)
+        indicators = state.peek(today)
+        if self.daily_engine.indicators:
+            indicators.update(self.daily_engine.compute(*columns))
+        return self.analyzer.evaluate_signals(indicators)
+    
+    def analysis_workers(self) -> int:
+        """技术分析进程数（analysis.workers）"""
+        return self.config.get('analysis', {}).get('workers', 1)
+    
+    def analyze_all(self, stock_codes: List[str], results: Dict[str, Any]) -> Dict[str, Any]:
+        """多进程批量分析
+        
+        每只股票的日K线（历史K线 + 实时行情聚合的当日K线）组成一行，按K线数分组写入共享内存，
+        由 AnalysisPool 按行分片交给工作进程计算。返回 股票代码 -> 信号（失败时为异常对象）。
+        """
+        import numpy as np
+        from analysis_pool import AnalysisPool
+        from batch_indicators import build_signals
+        
+        workers = self.analysis_workers()
+        if self.analysis_pool is None or self.analysis_pool.workers != workers:
+            if self.analysis_pool is not None:
+                self.analysis_pool.shutdown()
+            self.analysis_pool = AnalysisPool(workers)
+        
+        signals: Dict[str, Any] = {}
+        groups: Dict[int, List[str]] = {}
+        for stock_code in dict.fromkeys(stock_codes):
+            data = results.get(stock_code)
+            if data is None or isinstance(data, Exception):
+                continue
+            try:
+                self.update_bars(stock_code, data['price_data'], data['history'])
+            except Exception as e:
+                signals[stock_code] = e
+                continue
+            groups.setdefault(len(self.bars.buffer(stock_code, '1d')), []).append(stock_code)
+        
+        for n_bars, codes in groups.items():
+            if n_bars < MIN_BARS:
+                signals.update((code, self.analyzer.evaluate_signals(None)) for code in codes)
+                continue
+            closes = np.empty((len(codes), n_bars))
+            highs = np.empty((len(codes), n_bars))
+            lows = np.empty((len(codes), n_bars))
+            volumes = np.empty((len(codes), n_bars)) if 'obv' in self.analyzer.enabled else None
+            with self.bars.lock:
+                for row, code in enumerate(codes):
+                    daily = self.bars.bars(code, '1d', n_bars)
+                    closes[row] = daily['close']
+                    highs[row] = daily['high']
+                    lows[row] = daily['low']
+                    if volumes is not None:
+                        volumes[row] = daily['volume']
+            try:
+                result = self.analysis_pool.analyze(closes, highs, lows, self.analyzer.enabled, volumes)
+            except Exception as e:
+                signals.update((code, e) for code in codes)
+                continue
+            signals.update((code, build_signals(result, row)) for row, code in enumerate(codes))
+        return signals
+    
+    def display_stock_info(self, price_data: Quote, market_info: MarketInfo, signals: Dict, news: List[NewsItem]):
         """显示股票信息"""
-        print(f"\n【{price_data['name']} ({price_data['code']})】")
-        print(f"当前价: {price_data['price']:.2f}  "
-              f"涨跌: {price_data['change']:+.2f} ({price_data['change_percent']:+.2f}%)")
-        print(f"成交量: {price_data['volume']:,}  "
-              f"成交额: {price_data['turnover']:,.2f}")
-        print(f"今开: {price_data['open']:.2f}  "
-              f"最高: {price_data['high']:.2f}  "
-              f"最低: {price_data['low']:.2f}")
+        print(f"\n【{price_data.name} ({price_data.code})】  {format_timestamp(price_data.timestamp)}")
+        print(f"当前价: {price_data.price:.2f}  "
+              f"涨跌: {price_data.change:+.2f} ({price_data.change_percent:+.2f}%)")
+        print(f"成交量: {price_data.volume:,}  "
+              f"成交额: {price_data.turnover:,.2f}")
+        print(f"今开: {price_data.open:.2f}  "
+              f"最高: {price_data.high:.2f}  "
+              f"最低: {price_data.low:.2f}")
         
         print(f"\n技术分析:")
         print(f"  建议: {signals['recommendation']} (评分: {signals['score']})")
@@ -358,104 +1212,354 @@ class StockMonitor:
             print(f"  买入信号: {', '.join(signals['buy_signals'])}")
         if signals['sell_signals']:
             print(f"  卖出信号: {', '.join(signals['sell_signals'])}")
+        if signals.get('indicators'):
+            print(f"  {'  '.join(f'{name.upper()}: {value:,.2f}' for name, value in signals['indicators'].items())}")
         
         print(f"\n最新新闻:")
         for i, item in enumerate(news[:3], 1):
-            print(f"  {i}. {item['title']} ({item['source']})")
+            print(f"  {i}. {item.title} ({item.source})")
     
-    def check_alert_conditions(self, price_data: Dict, signals: Dict, news: List[Dict]):
-        """检查是否满足弹窗提醒条件"""
-        alerts = []
+    def load_alert_rules(self, config: Optional[Dict[str, Any]] = None, strict: bool = False):
+        """编译提醒规则：alert_conditions 生成的内置规则加上 alert_rules 中的自定义规则
         
-        # 检查价格变动
-        threshold = self.config['alert_conditions']['price_change_threshold']
-        if abs(price_data['change_percent']) >= threshold:
-            alerts.append(f"价格异动: {price_data['change_percent']:+.2f}%")
+        表达式只在这里解析一次；无效的规则打印原因后跳过（strict 时抛出ValueError，用于热加载）。
+        config 默认为当前配置。
+        """
+        from alert_rules import AlertRuleSet, compile_rule, default_rules
+        
+        config = self.config if config is None else config
+        rules = []
+        for rule_config in default_rules(config['alert_conditions']) + config.get('alert_rules', []):
+            try:
+                rules.append(compile_rule(rule_config))
+            except ValueError as e:
+                if strict:
+                    raise
+                print(f"忽略无效的提醒规则: {str(e)}")
+        return AlertRuleSet(rules)
+    
+    def check_alerts(self, entries: List[tuple]) -> Dict[str, List[str]]:
+        """对本轮全部股票一次性求值提醒规则
         
-        # 检查买卖信号
-        buy_threshold = self.config['alert_conditions']['buy_signal_threshold']
-        sell_threshold = self.config['alert_conditions']['sell_signal_threshold']
+        entries 为 (行情, 信号, 本轮新增新闻) 列表；满足规则且不在冷却时间内的股票弹窗提醒。
+        返回 股票代码 -> 提醒文字。
+        """
+        alert_rules = self.alert_rules  # 热加载可能在推送线程检查期间替换规则，本次检查始终用同一套
+        if not entries or not alert_rules.rules:
+            return {}
+        import numpy as np
+        from alert_rules import DETAIL_FIELDS, VOLUME_RATIO_DAYS
         
-        if signals['score'] >= buy_threshold:
-            alerts.append(f"强烈买入信号! 评分: {signals['score']}")
-            alerts.extend([f"  - {sig}" for sig in signals['buy_signals']])
-        elif signals['score'] <= sell_threshold:
-            alerts.append(f"强烈卖出信号! 评分: {signals['score']}")
-            alerts.extend([f"  - {sig}" for sig in signals['sell_signals']])
+        quotes = [price_data for price_data, _, _ in entries]
+        snapshot = quote_snapshot(quotes)
+        columns = {name: snapshot[name] for name in snapshot.dtype.names}
+        columns['score'] = np.array([signals['score'] for _, signals, _ in entries])
+        fields = alert_rules.fields
+        if 'news_important' in fields:
+            columns['news_important'] = np.array([
+                any(self.news_feed.is_important(item) for item in news) for _, _, news in entries
+            ], dtype=bool)
+        for name in DETAIL_FIELDS:
+            if name in fields:
+                columns[name] = [signals[name] for _, signals, _ in entries]
+        for days in alert_rules.volume_windows:
+            columns[f'avg_volume_{days}'] = np.array([self.avg_volumes.get((quote.code, days), np.nan)
+                                                      for quote in quotes])
+        if 'volume_ratio' in fields:
+            # 量比 = 开盘以来平均每分钟成交量 / 最近几个交易日平均每分钟成交量
+            elapsed = np.array([max(self.calendar.elapsed_minutes(datetime.fromtimestamp(quote.timestamp)), 1)
+                                for quote in quotes])
+            baseline = columns[f'avg_volume_{VOLUME_RATIO_DAYS}'] / self.calendar.session_minutes()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns['volume_ratio'] = columns['volume'] / elapsed / baseline
         
-        # 如果有重要新闻（这里简化处理，实际应分析新闻重要性）
-        if any('重大' in item['title'] or '公告' in item['title'] for item in news):
-            alerts.append("发现重要新闻!")
+        fired = {}
+        for row, alerts in alert_rules.evaluate(columns, time.monotonic()).items():
+            self.show_alert(quotes[row].name, quotes[row].code, alerts)
+            fired[quotes[row].code] = alerts
+        return fired
+    
+    def update_correlation(self, now: Optional[float] = None):
+        """把自选股最新的1分钟K线收盘价计入滚动相关矩阵（每分钟一次，同一分钟内的多次扫描只计一次）"""
+        import numpy as np
+        from correlation import RollingCorrelation, DEFAULT_WINDOW, DEFAULT_REFRESH
+        watchlist = self.config['watchlist']
+        if self.correlation is None:
+            correlation_config = self.config.get('correlation', {})
+            self.correlation = RollingCorrelation(watchlist, correlation_config.get('window', DEFAULT_WINDOW),
+                                                  correlation_config.get('refresh', DEFAULT_REFRESH))
+        elif self.correlation.codes != watchlist:
+            self.correlation = self.correlation.reindex(watchlist)
         
-        # 如果有提醒，显示弹窗
-        if alerts:
-            self.show_alert(price_data['name'], price_data['code'], alerts)
+        minute = int((time.time() if now is None else now) // 60)
+        if minute == self.correlation_minute:
+            return
+        self.correlation_minute = minute
+        prices = np.full(len(watchlist), np.nan)
+        with self.bars.lock:
+            for i, stock_code in enumerate(watchlist):
+                buffer = self.bars.buffer(stock_code, '1m')
+                if buffer is not None and len(buffer):
+                    prices[i] = buffer.last('close')
+        self.correlation.update_prices(prices)
+    
+    def create_sector_monitor(self):
+        """按 correlation 配置创建板块联动检查，冷却时间与提醒规则相同"""
+        from correlation import SectorMonitor, DEFAULT_MIN_CORRELATION, DEFAULT_MIN_MOVE
+        correlation_config = self.config.get('correlation', {})
+        return SectorMonitor(correlation_config.get('sectors', {}),
+                             min_correlation=correlation_config.get('min_correlation', DEFAULT_MIN_CORRELATION),
+                             min_move=correlation_config.get('min_move', DEFAULT_MIN_MOVE),
+                             cooldown=self.config['alert_conditions'].get('cooldown', 600),
+                             discover=correlation_config.get('discover', False))
+    
+    def check_sectors(self, now: Optional[float] = None) -> Dict[str, List[str]]:
+        """更新相关矩阵并检查板块联动，联动的板块弹窗提醒；返回 板块名 -> 提醒文字"""
+        if not self.config.get('correlation', {}).get('enabled', True):
+            return {}
+        from bar_store import date_to_int
+        self.update_correlation(now)
+        if self.sector_monitor is None:
+            self.sector_monitor = self.create_sector_monitor()
+        
+        # 当日涨跌幅取自日K线（当日K线由实时行情聚合，前一根为上一交易日）
+        today = date_to_int(datetime.now().date())
+        changes = {}
+        with self.bars.lock:
+            for stock_code in self.correlation.codes:
+                daily = self.bars.bars(stock_code, '1d', 2)
+                if len(daily['close']) == 2 and daily['time'][-1] == today and daily['close'][0] > 0:
+                    changes[stock_code] = (daily['close'][1] / daily['close'][0] - 1) * 100
+        
+        fired = {}
+        for name, codes, message in self.sector_monitor.signals(self.correlation, changes, now):
+            self.show_alert(f'{name}板块', ','.join(codes), [message])
+            fired[name] = [message]
+        return fired
+    
+    def check_alert_conditions(self, price_data: Quote, signals: Dict, news: List[NewsItem]):
+        """检查单只股票是否满足弹窗提醒条件（旧接口，规则与 check_alerts 相同）"""
+        self.check_alerts([(price_data, signals, news)])
     
     def show_alert(self, stock_name: str, stock_code: str, alerts: List[str]):
-        """显示弹窗提醒"""
-        alert_msg = f"【{stock_name} ({stock_code})】\n\n" + "\n".join(alerts)
-        print(f"\n!!! 提醒 !!!\n{alert_msg}\n")
+        """提交提醒到分发队列（不阻塞扫描），由分发线程合并、限流后投递到各渠道"""
+        self.metrics.inc('alerts_total')
+        self.alert_dispatcher.submit(stock_name, stock_code, alerts)
+    
+    def create_config_watcher(self) -> Optional[ConfigWatcher]:
+        """按 reload 配置创建配置文件监视器（关闭热加载时返回None）"""
+        reload_config = self.config.get('reload', {})
+        if not reload_config.get('enabled', True):
+            return None
+        return ConfigWatcher(self.config_file, reload_config.get('interval', DEFAULT_RELOAD_INTERVAL))
+    
+    def reload_config(self) -> bool:
+        """重新读取配置文件并应用；读取、校验、编译规则或应用时出错都保留原配置，返回是否已应用
         
-        # 如果tkinter可用，在主线程中显示弹窗
-        if TKINTER_AVAILABLE:
-            try:
-                if self.alert_window and self.alert_window.winfo_exists():
-                    self.alert_window.lift()
-                else:
-                    self.create_alert_window(stock_name, stock_code, alerts)
-            except:
-                pass
+        直接读取文件而不经过 load_config，文件暂时不存在时不会用默认配置覆盖用户的文件。
+        """
+        old_config, old_rules = self.config, self.alert_rules
+        try:
+            config = self.read_config(self.config_file)
+            errors = validate_config(config)
+            if not errors:
+                alert_rules = self.load_alert_rules(config, strict=True)
+                self.apply_config(config, alert_rules)
+                return True
+        except Exception as e:
+            errors = [f"{type(e).__name__}: {e}"]
+            self.config, self.alert_rules = old_config, old_rules
+        self.metrics.inc('config_reload_errors_total')
+        print("配置文件无效，保留原配置: " + "; ".join(errors))
+        return False
     
-    def create_alert_window(self, stock_name: str, stock_code: str, alerts: List[str]):
-        """创建提醒窗口"""
-        if not TKINTER_AVAILABLE:
-            return
-            
+    def apply_config(self, config: Dict[str, Any], alert_rules=None):
+        """应用新配置（在两轮扫描之间调用）
+        
+        新的提醒规则、分发器等先创建好再整体替换（alert_rules 为已编译的规则，默认按 config 编译）；
+        自选股按差异处理：移除的股票释放滚动指标、K线、平均成交量、新闻游标、接口缓存和提醒冷却状态，
+        新增的股票在下一轮扫描时获取历史数据，其余股票的状态保留。
+        """
+        old = self.config
+        added, removed = diff_watchlist(old['watchlist'], config['watchlist'])
+        
+        if alert_rules is None:
+            alert_rules = self.load_alert_rules(config)
+        alert_rules.inherit_cooldowns(self.alert_rules, removed)
+        history_days = config['technical_analysis'].get('history_days', HISTORY_DAYS)
+        dispatcher = None
+        if config.get('alert_dispatch') != old.get('alert_dispatch'):
+            from alert_dispatch import MainThreadSink
+            dispatcher = self.create_alert_dispatcher(config)
+            for sink in self.alert_dispatcher.sinks:
+                if isinstance(sink, MainThreadSink):  # GUI弹窗渠道
+                    dispatcher.add_sink(sink)
+        
+        # 替换配置和规则
+        self.config = config
+        self.alert_rules = alert_rules
+        if dispatcher is not None:
+            dispatcher, self.alert_dispatcher = self.alert_dispatcher, dispatcher
+            dispatcher.close()
+        news_config = config.get('news', {})
+        if news_config.get('keywords') != old.get('news', {}).get('keywords'):
+            self.news_feed.set_keywords(news_config.get('keywords', DEFAULT_KEYWORDS))
+        if config.get('schedule', {}).get('holidays') != old.get('schedule', {}).get('holidays'):
+            self.calendar = MarketCalendar(config.get('schedule', {}).get('holidays', []))
+        if enabled_indicators(config['technical_analysis']) != self.analyzer.enabled:
+            self.configure_indicators(config)
+            self.screener = None
+        if history_days != old['technical_analysis'].get('history_days', HISTORY_DAYS):
+            self.bars.capacities['1d'] = max(self.bars.capacities['1d'], history_days + 1)
+            self.bars.clear_daily()
+            self.indicator_states.clear()
+            self.screener = None
+        if config.get('screener') != old.get('screener'):
+            self.screener = None  # 下一轮选股时按新配置重新创建
+        correlation_config, old_correlation = config.get('correlation', {}), old.get('correlation', {})
+        if correlation_config != old_correlation or config['alert_conditions'] != old['alert_conditions']:
+            self.sector_monitor = None
+        if any(correlation_config.get(key) != old_correlation.get(key) for key in ('window', 'refresh')):
+            self.correlation = None  # 窗口变化后重新累计；自选股增减时保留其余股票的窗口数据
+        
+        # 先停止推送，避免推送线程处理仍在队列中的已移除股票行情，重新创建刚释放的状态
+        if self.tick_subscriber and (added or removed or config.get('stream') != old.get('stream')):
+            self.tick_subscriber.stop()
+            self.tick_subscriber = None
+        
+        # 释放移除股票的状态
+        if removed:
+            removed_set = set(removed)
+            for stock_code in removed:
+                self.indicator_states.pop(stock_code, None)
+                self.bars.drop(stock_code)
+                self.news_feed.drop(stock_code)
+                if hasattr(self.api, 'invalidate'):
+                    self.api.invalidate(stock_code)  # 盘面信息和新闻缓存
+            self.avg_volumes = {key: value for key, value in self.avg_volumes.items() if key[0] not in removed_set}
+        
+        if config.get('stream', {}).get('enabled') and self.tick_subscriber is None:
+            self.start_stream()
+        
+        self.config_version += 1
+        print(f"配置已重新加载: 自选股 {len(config['watchlist'])} 只（新增 {len(added)}，移除 {len(removed)}）")
+        changed = restart_required(old, config)
+        if changed:
+            print(f"以下配置需要重启后生效: {', '.join(changed)}")
+    
+    def create_screener(self):
+        """按 screener 配置创建全市场选股器，共用获取数据的线程池和API重试逻辑"""
+        from screener import Screener, DEFAULT_TOP_N, DEFAULT_BOTTOM_N
+        screener_config = self.config.get('screener', {})
+        return Screener(self.api, self.history_days(),
+                        top_n=screener_config.get('top_n', DEFAULT_TOP_N),
+                        bottom_n=screener_config.get('bottom_n', DEFAULT_BOTTOM_N),
+                        interval=screener_config.get('interval') or self.config['scan_interval'],
+                        run_tasks=self._run_tasks, call_api=self.call_api, enabled=self.analyzer.enabled)
+    
+    def screen_market(self) -> Dict[str, Any]:
+        """全市场选股一次：打印评分前N名和后N名的排名表，并按 screener.output 写入JSON"""
+        from screener import format_table
+        if self.screener is None:
+            self.screener = self.create_screener()
+        result = self.screener.screen()
+        print(format_table(result['top'], f"\n全市场评分前{len(result['top'])}名 "
+                                          f"（{result['scored']}/{result['universe']} 只, {result['seconds']:.2f} 秒）"))
+        print(format_table(result['bottom'], f"\n全市场评分后{len(result['bottom'])}名"))
+        self.metrics.observe('screen_seconds', result['seconds'])
+        self.metrics.set('screen_symbols', result['scored'])
+        
+        output = self.config.get('screener', {}).get('output')
+        if output:
+            output = self.data_path(output)
+            directory = os.path.dirname(output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        return result
+    
+    def run_screen(self):
+        """执行一次全市场选股，出错时记录而不中断监控循环"""
         try:
-            window = tk.Toplevel()
-            window.title(f"股票提醒 - {stock_name}")
-            window.geometry("500x300")
-            
-            # 标题
-            title_label = tk.Label(window, 
-                                  text=f"{stock_name} ({stock_code})",
-                                  font=('Arial', 14, 'bold'),
-                                  fg='red')
-            title_label.pack(pady=10)
-            
-            # 提醒内容
-            text_area = scrolledtext.ScrolledText(window, 
-                                                  width=60, 
-                                                  height=12,
-                                                  font=('Arial', 10))
-            text_area.pack(padx=10, pady=5)
-            text_area.insert('1.0', '\n'.join(alerts))
-            text_area.config(state='disabled')
-            
-            # 关闭按钮
-            close_btn = tk.Button(window, 
-                                 text="知道了",
-                                 command=window.destroy,
-                                 width=20)
-            close_btn.pack(pady=10)
-            
-            # 置顶显示
-            window.lift()
-            window.attributes('-topmost', True)
-            
-            self.alert_window = window
+            self.screen_market()
         except Exception as e:
-            print(f"创建提醒窗口失败: {str(e)}")
+            self.metrics.inc('loop_errors_total', error=type(e).__name__)
+            print(f"全市场选股出错: {str(e)}")
+    
+    def create_scheduler(self) -> ScanScheduler:
+        """按 schedule 配置创建扫描调度器"""
+        schedule = self.config.get('schedule', {})
+        calendar = self.calendar if schedule.get('market_hours_only', True) else None
+        tiers = build_tiers(self.config['watchlist'], schedule.get('tiers', []), self.config['scan_interval'])
+        return ScanScheduler(tiers, calendar, max_batch=schedule.get('max_batch', DEFAULT_MAX_BATCH))
     
     def monitor_loop(self):
-        """监控循环"""
-        while self.running:
+        """监控循环：按固定频率扫描到期的股票，休市期间等待开盘
+        
+        启动时如果正在休市，先对全部自选股扫描一次，之后只在交易时段内扫描。
+        开启 screener 时，交易时段内每隔 screener.interval 秒在两轮扫描之间做一次全市场选股。
+        """
+        scheduler = self.create_scheduler()
+        watcher = self.create_config_watcher()
+        if not scheduler.is_open():
+            print(f"当前休市，下次开盘: {scheduler.calendar.next_open(datetime.now()):%Y-%m-%d %H:%M}")
+            self.run_scan()
+            if self.config.get('screener', {}).get('enabled'):
+                self.run_screen()
+        while not self.stop_event.is_set():
             try:
-                self.scan_stocks()
-                time.sleep(self.config['scan_interval'])
+                if watcher is not None and watcher.changed():
+                    previous = self.config
+                    if self.reload_config() and schedule_changed(previous, self.config):
+                        scheduler = self.create_scheduler()
+                stock_codes = scheduler.due()
+                if stock_codes:
+                    self.run_scan(stock_codes)
+                    for tier, stats in scheduler.stats.items():
+                        self.metrics.set('schedule_missed_ticks', stats['missed'], tier=tier)
+                screening = self.config.get('screener', {}).get('enabled') and scheduler.is_open()
+                if screening and (self.screener is None or self.screener.due()):
+                    self.run_screen()
+                wakeup = scheduler.next_wakeup()
+                if screening and self.screener is not None:
+                    wakeup = min(wakeup, self.screener.seconds_until_due())
+                if watcher is not None:
+                    wakeup = min(wakeup, watcher.interval)
             except Exception as e:
+                # 调度、热加载等出错时记录后继续，下一轮重试
+                self.metrics.inc('loop_errors_total', error=type(e).__name__)
                 print(f"监控循环出错: {str(e)}")
-                time.sleep(10)
+                wakeup = LOOP_ERROR_RETRY
+            self.stop_event.wait(wakeup)
+    
+    def process_tick(self, quote: Quote):
+        """处理一条推送行情：增量技术分析后立即检查提醒（在推送处理线程中调用）"""
+        start = time.perf_counter()
+        signals = self.analyze_stock(quote.code, quote)
+        self.load_average_volumes(quote.code)
+        self.check_alerts([(quote, signals, [])])
+        self.metrics.observe('tick_seconds', time.perf_counter() - start)
+        self.metrics.inc('stream_ticks_total')
+        self.metrics.set('stream_queue_depth', self.tick_subscriber.queue.qsize() if self.tick_subscriber else 0)
+    
+    def start_stream(self):
+        """按 stream 配置订阅自选股的行情推送"""
+        from tick_stream import TickSubscriber, DEFAULT_QUEUE_SIZE
+        stream = self.config.get('stream', {})
+        self.tick_subscriber = TickSubscriber(stream.get('host', '127.0.0.1'), stream.get('port', 8901),
+                                              self.config['watchlist'], self.process_tick,
+                                              stream.get('queue_size', DEFAULT_QUEUE_SIZE))
+        self.tick_subscriber.start()
+        print(f"行情推送: {self.tick_subscriber.host}:{self.tick_subscriber.port}")
+    
+    def run_scan(self, stock_codes: Optional[List[str]] = None):
+        """执行一次扫描，出错时记录而不中断监控循环"""
+        try:
+            self.scan_stocks(stock_codes)
+        except Exception as e:
+            self.metrics.inc('loop_errors_total', error=type(e).__name__)
+            print(f"监控循环出错: {str(e)}")
     
     def start(self):
         """启动监控"""
@@ -466,10 +1570,15 @@ class StockMonitor:
         print("启动股票监控程序...")
         print(f"监控股票: {', '.join(self.config['watchlist'])}")
         print(f"扫描间隔: {self.config['scan_interval']} 秒")
+        for tier in self.config.get('schedule', {}).get('tiers', []):
+            print(f"  {tier.get('name', '')}: 每 {tier['interval']} 秒扫描 {', '.join(tier.get('codes', []))}")
         
         self.running = True
+        self.stop_event.clear()
         self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
         self.monitor_thread.start()
+        if self.config.get('stream', {}).get('enabled'):
+            self.start_stream()
         
         print("监控已启动!")
     
@@ -477,21 +1586,56 @@ class StockMonitor:
         """停止监控"""
         print("停止监控...")
         self.running = False
+        self.stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
+        if self.tick_subscriber:
+            self.tick_subscriber.stop()
+            self.tick_subscriber = None
+        self.stop_executors()
+        self.alert_dispatcher.close()
+        self.close_scan_store()
+        self.close_api()
+        self.metrics.shutdown()
         print("监控已停止")
+    
+    def stop_executors(self):
+        """关闭获取数据的线程池和分析进程池（下次扫描时会重新创建）"""
+        if self.fetch_executor:
+            self.fetch_executor.shutdown(wait=False)
+            self.fetch_executor = None
+        if self.analysis_pool:
+            self.analysis_pool.shutdown()
+            self.analysis_pool = None
+
+
+def load_tkinter() -> bool:
+    """导入tkinter（只在启动图形界面时调用），返回是否可用"""
+    global tk, scrolledtext
+    if tk is None:
+        try:
+            import tkinter
+            from tkinter import scrolledtext as tk_scrolledtext
+        except ImportError:
+            return False
+        tk, scrolledtext = tkinter, tk_scrolledtext
+    return True
 
 
 class StockMonitorGUI:
     """股票监控图形界面"""
     
-    def __init__(self):
+    def __init__(self, config_file: str = 'config.json'):
+        if not load_tkinter():
+            raise RuntimeError("tkinter未安装")
         self.root = tk.Tk()
         self.root.title("股票监控系统")
         self.root.geometry("800x600")
         
-        self.monitor = StockMonitor()
+        self.monitor = StockMonitor(config_file)
+        self.alert_windows = {}  # 股票代码 -> (窗口, 文本框)，同一股票的新提醒追加到已有窗口
         self.setup_ui()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
     
     def setup_ui(self):
         """设置界面"""
@@ -532,9 +1676,8 @@ class StockMonitorGUI:
                                                         font=('Courier', 10))
         self.watchlist_text.pack(fill=tk.BOTH, expand=True)
         
-        # 显示当前自选股
-        watchlist = '\n'.join(self.monitor.config['watchlist'])
-        self.watchlist_text.insert('1.0', f"当前监控股票:\n{watchlist}")
+        # 显示当前自选股（配置热加载后在 flush_log 中刷新）
+        self.show_watchlist()
         
         # 日志区域
         log_frame = tk.LabelFrame(self.root, text="监控日志", padx=10, pady=10)
@@ -546,8 +1689,94 @@ class StockMonitorGUI:
                                                   font=('Courier', 9))
         self.log_text.pack(fill=tk.BOTH, expand=True)
         
-        # 重定向标准输出到日志区域
-        sys.stdout = TextRedirector(self.log_text)
+        # 重定向标准输出到队列，由主线程定时批量写入日志区域
+        self.stdout = sys.stdout
+        self.log_redirector = TextRedirector()
+        sys.stdout = self.log_redirector
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log)
+        
+        # 弹窗提醒由分发线程放入队列，主线程定时取出显示
+        self.popup_sink = None
+        if 'popup' in self.monitor.config.get('alert_dispatch', {}).get('sinks', ['popup']):
+            from alert_dispatch import MainThreadSink
+            self.popup_sink = MainThreadSink(self.show_alert_window)
+            self.monitor.alert_dispatcher.add_sink(self.popup_sink)
+            self.root.after(ALERT_POLL_INTERVAL_MS, self.poll_alerts)
+    
+    def show_watchlist(self):
+        """显示当前自选股"""
+        self.watchlist_version = self.monitor.config_version
+        watchlist = '\n'.join(self.monitor.config['watchlist'])
+        self.watchlist_text.delete('1.0', tk.END)
+        self.watchlist_text.insert('1.0', f"当前监控股票:\n{watchlist}")
+    
+    def poll_alerts(self):
+        """在主线程中显示分发队列投递的弹窗提醒"""
+        self.popup_sink.poll()
+        self.root.after(ALERT_POLL_INTERVAL_MS, self.poll_alerts)
+    
+    def show_alert_window(self, alert):
+        """显示提醒窗口；该股票的窗口仍打开时追加内容并置前"""
+        window, text_area = self.alert_windows.get(alert.stock_code, (None, None))
+        if window is not None and window.winfo_exists():
+            text_area.config(state='normal')
+            text_area.insert(tk.END, '\n' + '\n'.join(alert.messages))
+            text_area.config(state='disabled')
+            text_area.see(tk.END)
+            window.lift()
+            return
+        
+        try:
+            window = tk.Toplevel(self.root)
+            window.title(f"股票提醒 - {alert.stock_name}")
+            window.geometry("500x300")
+            
+            # 标题
+            title_label = tk.Label(window, 
+                                  text=f"{alert.stock_name} ({alert.stock_code})",
+                                  font=('Arial', 14, 'bold'),
+                                  fg='red')
+            title_label.pack(pady=10)
+            
+            # 提醒内容
+            text_area = scrolledtext.ScrolledText(window, 
+                                                  width=60, 
+                                                  height=12,
+                                                  font=('Arial', 10))
+            text_area.pack(padx=10, pady=5)
+            text_area.insert('1.0', '\n'.join(alert.messages))
+            text_area.config(state='disabled')
+            
+            # 关闭按钮
+            close_btn = tk.Button(window, 
+                                 text="知道了",
+                                 command=window.destroy,
+                                 width=20)
+            close_btn.pack(pady=10)
+            
+            # 置顶显示
+            window.lift()
+            window.attributes('-topmost', True)
+            
+            self.alert_windows[alert.stock_code] = (window, text_area)
+        except Exception as e:
+            print(f"创建提醒窗口失败: {str(e)}")
+    
+    def flush_log(self):
+        """取出队列中的全部输出，一次性写入日志区域，并只保留最近 LOG_MAX_LINES 行"""
+        text = self.log_redirector.drain()
+        if text:
+            lines = text.splitlines(keepends=True)
+            if len(lines) > LOG_MAX_LINES:
+                text = ''.join(lines[-LOG_MAX_LINES:])
+            self.log_text.insert(tk.END, text)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - LOG_MAX_LINES
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
+        if self.watchlist_version != self.monitor.config_version:
+            self.show_watchlist()
+        self.root.after(LOG_FLUSH_INTERVAL_MS, self.flush_log)
     
     def start_monitoring(self):
         """启动监控"""
@@ -563,27 +1792,113 @@ class StockMonitorGUI:
         self.stop_btn.config(state='disabled')
         self.status_label.config(text="状态: 已停止", fg='red')
     
+    def on_close(self):
+        """关闭窗口：停止监控并恢复标准输出"""
+        self.monitor.stop()
+        sys.stdout = self.stdout
+        self.root.destroy()
+    
     def run(self):
         """运行界面"""
         self.root.mainloop()
 
 
 class TextRedirector:
-    """文本重定向器，用于将print输出重定向到GUI"""
+    """文本重定向器，用于将print输出重定向到GUI
+    
+    write可在任意线程调用，只把文本放入队列；由Tk主线程调用drain取出后批量写入控件
+    """
     
-    def __init__(self, widget):
-        self.widget = widget
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
     
     def write(self, string):
-        self.widget.insert(tk.END, string)
-        self.widget.see(tk.END)
+        if string:
+            self.queue.put(string)
+    
+    def drain(self) -> str:
+        """取出当前队列中的全部文本"""
+        parts = []
+        try:
+            while True:
+                parts.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return ''.join(parts)
     
     def flush(self):
         pass
 
 
-def main():
-    """主函数"""
+def run_once(config_file: str = 'config.json', output: str = DEFAULT_ONCE_OUTPUT) -> int:
+    """扫描一次全部自选股，把结果写入output（JSON）后返回退出码（供cron等定时任务调用）"""
+    try:
+        monitor = StockMonitor(config_file)
+    except Exception as e:
+        print(f"加载配置失败: {str(e)}")
+        return EXIT_FAILED
+    try:
+        summary = monitor.scan_stocks()
+    except Exception as e:
+        print(f"扫描失败: {str(e)}")
+        return EXIT_FAILED
+    finally:
+        monitor.alert_dispatcher.close()
+        monitor.stop_executors()
+        monitor.close_scan_store()
+        monitor.close_api()
+        monitor.metrics.shutdown()
+    
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"扫描结果已写入 {output}: {len(summary['results'])} 只成功, {len(summary['errors'])} 只失败, "
+          f"{len(summary['alerts'])} 只触发提醒")
+    return EXIT_PARTIAL if summary['errors'] else EXIT_OK
+
+
+def run_screen_once(config_file: str = 'config.json', output: Optional[str] = None) -> int:
+    """全市场选股一次后退出，排名表写入output（默认 screener.output），返回退出码"""
+    try:
+        monitor = StockMonitor(config_file)
+    except Exception as e:
+        print(f"加载配置失败: {str(e)}")
+        return EXIT_FAILED
+    if output:
+        # 命令行指定的路径按当前目录解析
+        monitor.config.setdefault('screener', {})['output'] = os.path.abspath(output)
+    try:
+        result = monitor.screen_market()
+    except Exception as e:
+        print(f"全市场选股失败: {str(e)}")
+        return EXIT_FAILED
+    finally:
+        monitor.alert_dispatcher.close()
+        monitor.stop_executors()
+        monitor.close_api()
+        monitor.metrics.shutdown()
+    return EXIT_PARTIAL if result['scored'] < result['universe'] else EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """主函数，返回退出码"""
+    import argparse
+    parser = argparse.ArgumentParser(description='股票监控系统')
+    parser.add_argument('--cli', action='store_true', help='命令行模式持续监控')
+    parser.add_argument('--once', action='store_true', help='扫描一次后退出（退出码: 0成功, 1部分股票失败, 2扫描失败）')
+    parser.add_argument('--screen', action='store_true', help='全市场选股一次后退出，输出评分前N名和后N名')
+    parser.add_argument('--config', default='config.json', help='配置文件路径')
+    parser.add_argument('--output', help=f'--once 模式的结果文件（默认 {DEFAULT_ONCE_OUTPUT}）'
+                                         f'或 --screen 模式的排名表文件（默认 screener.output）')
+    args = parser.parse_args(argv)
+    
+    if args.once:
+        return run_once(args.config, args.output or DEFAULT_ONCE_OUTPUT)
+    if args.screen:
+        return run_screen_once(args.config, args.output)
+    
     print("""
     ╔══════════════════════════════════════════════════════════╗
     ║          股票监控系统 - Stock Monitor System             ║
@@ -591,11 +1906,10 @@ def main():
     ╚══════════════════════════════════════════════════════════╝
     """)
     
-    # 检查是否有命令行参数
-    if len(sys.argv) > 1 and sys.argv[1] == '--cli':
+    if args.cli:
         # 命令行模式
         print("以命令行模式运行...")
-        monitor = StockMonitor()
+        monitor = StockMonitor(args.config)
         try:
             monitor.start()
             # 保持运行
@@ -606,19 +1920,22 @@ def main():
             print("\n程序已退出")
     else:
         # 尝试启动GUI
-        if TKINTER_AVAILABLE:
+        if load_tkinter():
             try:
-                gui = StockMonitorGUI()
+                gui = StockMonitorGUI(args.config)
                 gui.run()
             except KeyboardInterrupt:
                 print("\n程序已退出")
             except Exception as e:
                 print(f"GUI启动失败: {str(e)}")
                 print("请使用 --cli 参数以命令行模式运行")
+                return EXIT_FAILED
         else:
             print("tkinter未安装，请使用 --cli 参数以命令行模式运行:")
             print("  python stock_monitor.py --cli")
+            return EXIT_FAILED
+    return EXIT_OK
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提醒分发测试脚本
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from alert_dispatch import AlertDispatcher, FileSink, MainThreadSink, WebhookSink, SUMMARY_CODE
+from mock_server import MockQuoteServer
+from seeded_api import SeededAPI
+
+
+class ListSink:
+    """记录收到的提醒，delay模拟慢速渠道"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.alerts = []
+
+    def deliver(self, alert):
+        time.sleep(self.delay)
+        self.alerts.append(alert)
+
+
+class BrokenSink:
+    def deliver(self, alert):
+        raise IOError("渠道不可用")
+
+
+def test_coalesce():
+    """测试同一股票的提醒合并与单只股票限流"""
+    print("=" * 60)
+    print("测试提醒合并")
+    print("=" * 60)
+
+    sink = ListSink()
+    dispatcher = AlertDispatcher([sink], coalesce_seconds=0.1, symbol_interval=1.0, max_per_minute=0)
+    dispatcher.submit('浦发银行', '600000', ['价格异动: +4.00%'])
+    dispatcher.submit('浦发银行', '600000', ['价格异动: +4.00%', '强烈买入信号! 评分: 5'])
+    dispatcher.submit('平安银行', '000001', ['发现重要新闻!'])
+    time.sleep(0.5)
+    assert [(a.stock_code, a.messages) for a in sink.alerts] == [
+        ('600000', ['价格异动: +4.00%', '强烈买入信号! 评分: 5']),
+        ('000001', ['发现重要新闻!']),
+    ]
+
+    # 距上次投递不足 symbol_interval，新提醒继续合并等待
+    dispatcher.submit('浦发银行', '600000', ['放量'])
+    dispatcher.submit('浦发银行', '600000', ['缩量'])
+    time.sleep(0.3)
+    assert len(sink.alerts) == 2
+    dispatcher.close()  # 关闭时投递剩余提醒
+    assert sink.alerts[-1].messages == ['放量', '缩量']
+    assert dispatcher.stats['submitted'] == 5 and dispatcher.stats['coalesced'] == 2
+    assert dispatcher.stats['delivered'] == 3
+
+    print("\n✓ 提醒合并测试通过")
+
+
+def test_global_limit():
+    """测试全局限流：超出部分汇总为一条提醒"""
+    sink = ListSink()
+    dispatcher = AlertDispatcher([sink], coalesce_seconds=0.05, max_per_minute=3)
+    for i in range(10):
+        dispatcher.submit(f'股票{i}', f'{600000 + i}', [f'价格异动: +{i}.00%'])
+    time.sleep(0.3)
+    assert len(sink.alerts) == 3
+    dispatcher.close()
+
+    summary = sink.alerts[-1]
+    print(f"\n汇总提醒:\n{summary.text()}")
+    assert summary.stock_code == SUMMARY_CODE and len(summary.messages) == 7
+    assert dispatcher.stats['summarized'] == 7 and dispatcher.stats['delivered'] == 4
+
+    print("\n✓ 全局限流测试通过")
+
+
+def test_non_blocking():
+    """测试提交不阻塞：慢速或出错的渠道不影响调用方"""
+    slow = ListSink(delay=0.05)
+    dispatcher = AlertDispatcher([BrokenSink(), slow], coalesce_seconds=0, max_per_minute=0)
+    start = time.perf_counter()
+    for i in range(50):
+        dispatcher.submit(f'股票{i}', f'{600000 + i}', ['提醒'])
+    elapsed = time.perf_counter() - start
+    print(f"\n提交50条提醒耗时: {elapsed * 1000:.2f} ms")
+    assert elapsed < 0.5
+
+    dispatcher.close(timeout=10)
+    assert len(slow.alerts) == 50
+    assert dispatcher.stats['sink_errors'] == 50
+
+    print("\n✓ 非阻塞提交测试通过")
+
+
+def test_sinks():
+    """测试文件、Webhook和主线程渠道"""
+    server = MockQuoteServer()
+    url = server.start() + '/webhook'
+    popups = []
+    main_thread = MainThreadSink(popups.append)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alerts', 'alerts.jsonl')
+        dispatcher = AlertDispatcher([FileSink(path), WebhookSink(url), main_thread], coalesce_seconds=0)
+        dispatcher.submit('浦发银行', '600000', ['价格异动: +4.00%'])
+        dispatcher.close()
+        server.stop()
+
+        with open(path, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+    assert lines[0]['code'] == '600000' and lines[0]['messages'] == ['价格异动: +4.00%']
+    assert server.webhooks == lines and server.stats['webhooks'] == 1
+
+    assert popups == []
+    main_thread.poll()  # GUI主线程中调用
+    assert [alert.stock_code for alert in popups] == ['600000']
+
+    print("\n✓ 提醒渠道测试通过")
+
+
+def test_monitor_dispatch():
+    """测试监控扫描把提醒交给分发队列"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alerts.jsonl')
+        monitor = StockMonitor(os.path.join(tmp, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001', '600519']
+        monitor.config['alert_rules'] = [{'name': '放量', 'when': 'volume > 0.01x avg_volume_20'}]
+        # 相对路径相对于配置文件所在目录
+        monitor.config['alert_dispatch'] = {'sinks': ['file'], 'file': 'alerts.jsonl', 'coalesce_seconds': 0}
+        monitor.api = SeededAPI()
+        monitor.alert_rules = monitor.load_alert_rules()
+        monitor.alert_dispatcher = monitor.create_alert_dispatcher()
+        monitor.scan_stocks()
+        monitor.stop_executors()
+        monitor.alert_dispatcher.close()
+
+        with open(path, encoding='utf-8') as f:
+            codes = [json.loads(line)['code'] for line in f]
+    assert codes == ['600000', '000001', '600519']
+
+    print("\n✓ 监控提醒分发测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_coalesce()
+        test_global_limit()
+        test_non_blocking()
+        test_sinks()
+        test_monitor_dispatch()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
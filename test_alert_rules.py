@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+声明式提醒规则测试脚本
+"""
+
+import sys
+import os
+import tempfile
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from stock_monitor import StockMonitor
+from alert_rules import AlertRule, AlertRuleSet, compile_rule, default_rules
+from seeded_api import SeededAPI
+
+
+def _columns():
+    return {
+        'code': np.array(['600000', '000001', '600519']),
+        'change_percent': np.array([4.0, -5.0, 1.0]),
+        'volume': np.array([300.0, 100.0, 50.0]),
+        'avg_volume_20': np.array([100.0, 100.0, np.nan]),
+        'score': np.array([5, 2, -6]),
+        'news_important': np.array([False, True, False]),
+        'buy_signals': [['MACD金叉'], [], []],
+        'sell_signals': [[], [], ['均线空头排列']],
+    }
+
+
+def test_rule_expressions():
+    """测试表达式编译与整列求值"""
+    print("=" * 60)
+    print("测试提醒规则")
+    print("=" * 60)
+
+    columns = _columns()
+    cases = {
+        'change_percent > 3 and score >= 4': [True, False, False],
+        'volume > 2x avg_volume_20': [True, False, False],
+        'abs(change_percent) >= 3 or news_important': [True, True, False],
+        "code in ['600519'] and not news_important": [False, False, True],
+        '0 < score <= 5': [True, True, False],
+        'max(score, 3) == 3': [False, True, True],
+    }
+    for expression, expected in cases.items():
+        rule = AlertRule(expression, expression)
+        assert rule.matches(columns, 3).tolist() == expected, expression
+    assert AlertRule('r', 'volume > 2x avg_volume_20').fields == {'volume', 'avg_volume_20'}
+    # 倍数写法只改写独立的数字，不改写标识符和十六进制数中的 x
+    assert AlertRule('r', 'volume >= 1.5x avg_volume_20').matches(columns, 3).tolist() == [True, False, False]
+    assert AlertRule('r', 'score > 0x4').matches(columns, 3).tolist() == [True, False, False]
+    try:
+        AlertRule('r', 'abc2x > 1')
+        assert False, "应当拒绝未知字段 abc2x"
+    except ValueError as e:
+        assert 'abc2x' in str(e), e
+
+    for bad in ["__import__('os')", 'price.real', 'unknown > 1', 'price >', 'min(price)']:
+        try:
+            AlertRule(bad, bad)
+            assert False, f"应当拒绝: {bad}"
+        except ValueError as e:
+            print(f"  拒绝: {e}")
+    try:
+        compile_rule({'when': 'price > 1', 'message': '{unknown}'})
+        assert False, "应当拒绝未知的消息字段"
+    except ValueError:
+        pass
+
+    print("\n✓ 表达式测试通过")
+
+
+def test_rule_set_cooldown():
+    """测试内置规则的提醒文字与冷却时间"""
+    conditions = {'price_change_threshold': 3.0, 'buy_signal_threshold': 5,
+                  'sell_signal_threshold': -5, 'cooldown': 600}
+    rules = AlertRuleSet(compile_rule(config) for config in default_rules(conditions))
+    columns = _columns()
+
+    alerts = rules.evaluate(columns, now=1000)
+    assert alerts == {
+        0: ['价格异动: +4.00%', '强烈买入信号! 评分: 5', '  - MACD金叉'],
+        1: ['价格异动: -5.00%', '发现重要新闻!'],
+        2: ['强烈卖出信号! 评分: -6', '  - 均线空头排列'],
+    }
+    assert rules.evaluate(columns, now=1300) == {}        # 冷却中
+    assert rules.evaluate(columns, now=1600) == alerts    # 冷却结束
+
+    print("\n✓ 冷却时间测试通过")
+
+
+def test_monitor_rules():
+    """测试监控扫描使用自定义规则（含平均成交量）"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001', '600519']
+        monitor.config['alert_conditions'] = {'price_change_threshold': 100, 'buy_signal_threshold': 100,
+                                              'sell_signal_threshold': -100}
+        monitor.config['alert_rules'] = [
+            {'name': '放量', 'when': 'volume > 0.01x avg_volume_20', 'cooldown': 3600,
+             'message': '放量: {volume} / {avg_volume_20:.0f}'},
+            {'name': '巨量', 'when': 'volume > 1000x avg_volume_20'},
+            {'name': '无效规则', 'when': 'volume >'},
+        ]
+        monitor.api = SeededAPI()
+        monitor.alert_rules = monitor.load_alert_rules()
+        assert [rule.name for rule in monitor.alert_rules.rules][-2:] == ['放量', '巨量']
+        assert monitor.alert_rules.volume_windows == [20]
+
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append((code, alerts))
+        monitor.scan_stocks()
+        assert len(monitor.avg_volumes) == 3
+        assert [code for code, _ in fired] == ['600000', '000001', '600519']
+        for code, alerts in fired:
+            quote = monitor.snapshot[monitor.snapshot['code'] == code][0]
+            assert alerts == [f"放量: {quote['volume']} / {monitor.avg_volumes[(code, 20)]:.0f}"]
+
+        fired.clear()
+        monitor.scan_stocks()
+        monitor.stop_executors()
+        assert fired == []  # 冷却时间内不重复提醒
+
+        print("\n✓ 监控规则测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_rule_expressions()
+        test_rule_set_cooldown()
+        test_monitor_rules()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
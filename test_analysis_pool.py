@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程技术分析测试脚本
+"""
+
+import sys
+import os
+import tempfile
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from stock_monitor import StockMonitor
+from analysis_pool import AnalysisPool, RESULT_FIELDS
+from batch_indicators import analyze_matrix
+from seeded_api import SeededAPI
+from benchmark import make_codes, make_matrices
+
+
+def test_pool_matches_inline():
+    """测试共享内存分片计算与单进程批量计算结果一致"""
+    print("=" * 60)
+    print("测试多进程技术分析")
+    print("=" * 60)
+
+    matrices = make_matrices(make_codes(50), 60)
+    expected = analyze_matrix(matrices['close'], matrices['high'], matrices['low'])
+
+    pool = AnalysisPool(workers=3, min_shard_rows=10)
+    try:
+        for _ in range(2):  # 第二轮复用共享内存块和工作进程
+            result = pool.analyze(matrices['close'], matrices['high'], matrices['low'])
+            assert set(result) == set(RESULT_FIELDS)
+            for name in RESULT_FIELDS:
+                assert np.array_equal(result[name], expected[name]), name
+        # 启用 ATR、OBV 时分片结果带上其数值（OBV 使用共享内存中的成交量矩阵）
+        enabled = ('ma', 'rsi', 'atr', 'obv')
+        volumes = np.random.default_rng(0).integers(1000, 100000, matrices['close'].shape).astype(float)
+        expected = analyze_matrix(matrices['close'], matrices['high'], matrices['low'], enabled, volumes)
+        result = pool.analyze(matrices['close'], matrices['high'], matrices['low'], enabled, volumes)
+        assert set(result) == set(RESULT_FIELDS) | {'atr', 'obv'}
+        for name in ('atr', 'obv', 'score'):
+            assert np.array_equal(result[name], expected[name]), name
+        assert pool._executor is not None
+    finally:
+        pool.shutdown()
+    assert pool._shm is None
+
+    print("\n✓ 分片计算测试通过")
+
+
+def test_monitor_pooled_analysis():
+    """测试多进程模式的信号与监控线程内增量计算一致"""
+    codes = make_codes(150)
+    with tempfile.TemporaryDirectory() as root:
+        single = StockMonitor(os.path.join(root, 'config.json'))
+        single.api = SeededAPI(batch_size=50)
+        single.config['api_config'] = {'max_workers': 1}
+        results = single.fetch_all(codes)
+
+        pooled = StockMonitor(os.path.join(root, 'config.json'))
+        pooled.api = single.api
+        pooled.config['analysis'] = {'workers': 2}
+        try:
+            signals = pooled.analyze_all(codes, results)
+            assert pooled.analysis_pool._executor is not None  # 150只分成了2个分片
+            for code in codes:
+                data = results[code]
+                assert signals[code] == single.analyze_stock(code, data['price_data'], data['history'])
+            # 历史数据当天只获取一次
+            assert pooled.fetch_stock_data(codes[0])['history'] is None
+        finally:
+            pooled.stop_executors()
+
+        scores = [signals[code]['score'] for code in codes]
+        print(f"\n150只股票多进程分析: 最高评分 {max(scores)}  最低评分 {min(scores)}")
+        print("\n✓ 多进程分析测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_pool_matches_inline()
+        test_monitor_pooled_analysis()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
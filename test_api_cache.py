@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API缓存层测试脚本
+"""
+
+import sys
+import os
+import io
+import json
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, TongHuaShunAPI
+from api_cache import TTLCache, CachedAPI, FRESH, STALE, MISS
+
+
+class CountingAPI(TongHuaShunAPI):
+    """记录请求的API"""
+
+    def __init__(self):
+        super().__init__()
+        self.market_requests = []
+        self.news_requests = 0
+
+    def get_market_infos(self, stock_codes, chunk_size=None):
+        self.market_requests.append(list(stock_codes))
+        return super().get_market_infos(stock_codes, chunk_size)
+
+    def get_news(self, stock_code, limit=5, since=None):
+        self.news_requests += 1
+        return super().get_news(stock_code, limit, since)
+
+
+def test_ttl_lru():
+    """测试TTL过期与LRU淘汰"""
+    print("=" * 60)
+    print("测试API缓存")
+    print("=" * 60)
+
+    cache = TTLCache(ttl=0.05, stale_ttl=0.05, max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == (1, FRESH)
+    cache.set('c', 3)  # 淘汰最久未使用的 b
+    assert cache.get('b') == (None, MISS)
+    assert cache.stats['evictions'] == 1
+
+    time.sleep(0.07)
+    assert cache.get('a') == (1, STALE)
+    time.sleep(0.05)
+    assert cache.get('a') == (None, MISS)
+
+    print(f"\n计数: {cache.stats}")
+    print("\n✓ TTL/LRU测试通过")
+
+
+def test_cached_api():
+    """测试批量只请求未命中部分、陈旧数据后台刷新"""
+    api = CountingAPI()
+    cached = CachedAPI(api, ttls={'market_info': 0.05, 'news': 60}, stale_ttl=60)
+
+    cached.get_market_infos(['600000', '000001'])
+    infos = cached.get_market_infos(['600000', '000001', '000002'])
+    assert api.market_requests == [['600000', '000001'], ['000002']]
+    assert list(infos) == ['600000', '000001', '000002']
+
+    # 过期后先返回旧值，后台刷新
+    time.sleep(0.07)
+    assert cached.get_market_info('600000')['code'] == '600000'
+    for _ in range(50):
+        if len(api.market_requests) == 3:
+            break
+        time.sleep(0.01)
+    assert api.market_requests[-1] == ['600000']
+
+    cached.get_news('600000', limit=3)
+    cached.get_news('600000', limit=3)
+    assert api.news_requests == 1
+
+    # 未缓存的方法直接转发
+    assert cached.get_realtime_price('600000')['code'] == '600000'
+
+    stats = cached.cache_stats()
+    assert stats['news']['hits'] == 1 and stats['news']['misses'] == 1
+    # 游标前进后只保留新游标的条目
+    for since in (100, 200, 300):
+        cached.get_news('000001', limit=3, since=since)
+    assert [key for key in cached.caches['news']._data if key[0] == '000001'] == [('000001', 3, 300)]
+    cached.invalidate('000001')
+    cached.invalidate('600000')
+    assert cached.cache_stats()['news']['size'] == 0
+    cached.close()
+    assert cached._refresh_executor is None
+
+    # close 之后再刷新会重新创建线程；刷新失败只计数，保留旧值
+    def failing(codes):
+        raise ConnectionError("刷新失败")
+    cached.caches['market_info'].set('000001', {'code': '000001'})
+    cached._refresh('market_info', ['000001'], failing)
+    for _ in range(50):
+        if cached.caches['market_info'].stats['refresh_errors']:
+            break
+        time.sleep(0.01)
+    assert cached.caches['market_info'].stats['refresh_errors'] == 1
+    assert cached.caches['market_info'].get('000001')[0] == {'code': '000001'}
+    cached.close()
+
+    print(f"\n缓存统计: {stats}")
+    print("\n✓ 缓存API测试通过")
+
+
+def test_monitor_cache_metrics():
+    """测试扫描后缓存命中计数记入监控指标，不逐轮打印"""
+    with tempfile.TemporaryDirectory() as root:
+        config_file = os.path.join(root, 'config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'watchlist': ['600000', '000001'], 'alert_rules': [], 'data_store': {'bar_path': ''},
+                       'metrics': {'file': ''}, 'scan_store': {'enabled': False}}, f)
+        monitor = StockMonitor(config_file)
+        assert isinstance(monitor.api, CachedAPI)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            for _ in range(2):
+                monitor.scan_stocks()
+        monitor.stop_executors()
+
+        # 移出自选股的股票删除其缓存，停止监控时关闭后台刷新线程
+        monitor.apply_config(dict(monitor.config, watchlist=['600000']))
+        assert len(monitor.api.caches['market_info']) == 1
+        assert all(key[0] == '600000' for key in monitor.api.caches['news']._data)
+        monitor.api.get_market_infos(['600000'])
+        monitor.api._refresh('market_info', ['600000'], monitor.api.api.get_market_infos)
+        assert monitor.api._refresh_executor is not None
+        monitor.stop()
+        assert monitor.api._refresh_executor is None
+
+    assert '缓存命中' not in output.getvalue()
+    assert monitor.metrics.get('api_cache_events', endpoint='market_info', event='misses') == 2
+    assert monitor.metrics.get('api_cache_events', endpoint='market_info', event='hits') == 2
+    assert monitor.metrics.get('api_cache_entries', endpoint='market_info') == 2
+
+    print("\n✓ 缓存指标测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_ttl_lru()
+        test_cached_api()
+        test_monitor_cache_metrics()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+信号回测引擎测试脚本
+"""
+
+import sys
+import os
+import tempfile
+from datetime import date
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from bar_store import BarStore
+from backtest import (trading_calendar, align_bars, positions_from_scores, daily_returns,
+                      extract_trades, run_backtest, max_drawdown)
+
+
+def test_positions_and_trades():
+    """测试信号到持仓、收益和交易明细的换算"""
+    print("=" * 60)
+    print("测试信号回测")
+    print("=" * 60)
+
+    scores = np.array([[0, 5, 0, 0, -2, 0, 6, 0]])
+    held = positions_from_scores(scores, buy_score=5, sell_score=-2)
+    # 收盘出信号，次日开盘成交
+    assert held.tolist() == [[0, 0, 1, 1, 1, 0, 0, 1]]
+
+    calendar = trading_calendar(8, date(2024, 1, 12))
+    assert len(calendar) == 8 and calendar[-1] == 20240112 and calendar[0] == 20240103
+    close = np.array([[10.0, 10.0, 11.0, 12.0, 12.0, 13.0, 13.0, 14.0]])
+    matrices = {'open': close - 0.5, 'high': close, 'low': close - 1, 'close': close}
+
+    returns = daily_returns(held, matrices, cost=0.0)
+    assert np.isclose(returns[0, 2], 11.0 / 10.5 - 1)                # 买入当天只计日内段
+    assert np.isclose(returns[0, 3], 12.0 / 11.0 - 1)                # 持有：隔夜段 + 日内段
+    assert np.isclose(returns[0, 5], 12.5 / 12.0 - 1)                # 卖出当天只计隔夜段
+    assert returns[0, 6] == 0
+
+    trades = extract_trades(['600000'], calendar, held, matrices, cost=0.001)
+    assert len(trades) == 2
+    first, last = trades
+    assert (first['entry_date'], first['exit_date']) == ('2024-01-05', '2024-01-10')
+    assert (first['entry_price'], first['exit_price'], first['bars']) == (10.5, 12.5, 3)
+    assert np.isclose(first['return'], 12.5 / 10.5 - 1 - 0.002)
+    assert last['open'] and last['exit_price'] == 14.0                # 未平仓按最后收盘价
+    assert np.isclose(last['return'], 14.0 / 13.5 - 1 - 0.001)
+
+    assert np.isclose(max_drawdown(np.array([1.0, 1.2, 0.9, 1.3])), 0.25)
+
+    print("\n✓ 持仓与交易测试通过")
+
+
+def test_align_bars():
+    """测试按交易日历对齐（上市前为NaN，停牌以前收盘价填充）"""
+    calendar = trading_calendar(6, date(2024, 1, 12))
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BarStore(tmp)
+        bar = lambda day, price: {'date': day, 'open': price, 'high': price, 'low': price,
+                                  'close': price, 'volume': 1.0}
+        store.append('600000', [bar(20240108, 10.0), bar(20240109, 11.0), bar(20240112, 12.0)])
+        store.append('000001', [bar(day, 5.0) for day in calendar.tolist()])
+        matrices = align_bars({code: store.read_bars(code) for code in ('600000', '000001')}, calendar)
+
+    close = matrices['close']
+    assert np.isnan(close[0, 0])
+    assert close[0, 1:].tolist() == [10.0, 11.0, 11.0, 11.0, 12.0]
+    assert matrices['open'][0, 3] == 11.0
+    assert np.all(close[1] == 5.0)
+
+    print("\n✓ 交易日对齐测试通过")
+
+
+def test_run_backtest():
+    """测试完整回测，多进程分片结果与单进程一致"""
+    codes = [f'{600000 + i:06d}' for i in range(12)]
+    end = date(2024, 6, 28)
+    single = run_backtest(codes, days=300, end=end, buy_score=4, workers=1)
+    sharded = run_backtest(codes, days=300, end=end, buy_score=4, workers=2, shard_size=5)
+
+    assert single['summary'] == sharded['summary']
+    assert single['trades'] == sharded['trades']
+    summary = single['summary']
+    print(f"\n{summary['symbols']}只股票 {summary['days']}天: 交易 {summary['trades']} 笔, "
+          f"胜率 {summary['hit_rate']:.2%}, 总收益 {summary['total_return']:.2%}, "
+          f"最大回撤 {summary['max_drawdown']:.2%}")
+    assert summary['symbols'] == 12 and summary['days'] == 300
+    assert summary['trades'] > 0
+    assert 0 <= summary['hit_rate'] <= 1
+    assert 0 <= summary['max_drawdown'] < 1
+    assert len(single['equity']) == len(single['dates']) == 300
+    assert all(trade['bars'] > 0 for trade in single['trades'])
+
+    print("\n✓ 完整回测测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_positions_and_trades()
+        test_align_bars()
+        test_run_backtest()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情聚合K线测试脚本
+"""
+
+import sys
+import os
+import tempfile
+from datetime import date, datetime, time
+
+import numpy as np
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, IndicatorState
+from bar_aggregator import BarAggregator, RingBuffer
+from bar_store import date_to_int
+from market_calendar import MarketCalendar
+from records import Quote
+from seeded_api import SeededAPI
+
+DAY_START = int(datetime.combine(date.today(), time(9, 30)).timestamp())
+
+
+def _quote(code, seconds, price, volume, high=None, low=None):
+    return Quote(code, f'股票{code}', price, 0.0, 0.0, volume, 0.0, high or price, low or price,
+                 10.0, 10.0, DAY_START + seconds)
+
+
+def test_ring_buffer():
+    """测试环形缓冲区覆盖最旧记录，视图连续且不复制"""
+    print("=" * 60)
+    print("测试环形缓冲区")
+    print("=" * 60)
+
+    buffer = RingBuffer(4, fields=('time', 'close'))
+    for i in range(10):
+        buffer.append((i, i * 1.5))
+        assert len(buffer) == min(i + 1, 4)
+        assert list(buffer.view('time')) == list(range(max(0, i - 3), i + 1))
+
+    closes = buffer.view('close')
+    assert np.shares_memory(closes, buffer._data)
+    assert closes.flags.c_contiguous and not closes.flags.writeable
+    assert list(buffer.view('time', 2)) == [8, 9]
+    assert buffer.view(n=2).shape == (2, 2)
+
+    buffer.replace_last((9, 100.0))
+    assert buffer.last('close') == 100.0
+    assert closes[-1] == 100.0  # 视图随写入变化
+    assert buffer._data.shape == (2, 8)
+
+    print("\n✓ 环形缓冲区测试通过")
+
+
+def test_intraday_bars():
+    """测试分钟K线的OHLC与累计成交量差值"""
+    bars = BarAggregator({'1m': 3})
+    ticks = [(0, 10.0, 1000), (20, 10.5, 1500), (50, 9.8, 1700),   # 09:30
+             (65, 10.1, 2000), (119, 10.2, 2600),                   # 09:31
+             (130, 10.3, 2600), (190, 10.4, 3000), (250, 10.6, 3100)]
+    for seconds, price, volume in ticks:
+        bars.update(_quote('600000', seconds, price, volume))
+
+    minute = bars.bars('600000', '1m')
+    assert len(minute['time']) == 3  # 容量为3，最早的两根已被覆盖
+    assert list(minute['close']) == [10.3, 10.4, 10.6]
+    assert list(minute['volume']) == [0, 400, 100]
+
+    five = bars.bars('600000', '5m')
+    assert list(five['time']) == [DAY_START]
+    assert (five['open'][0], five['high'][0], five['low'][0], five['close'][0]) == (10.0, 10.6, 9.8, 10.6)
+    assert five['volume'][0] == 3100 - 1000  # 第一条行情只作为成交量基准
+
+    bars.update(_quote('600000', -400, 99.0, 1600))  # 乱序的旧行情不改动已有K线
+    assert bars.stats['stale'] == 2 and bars.bars('600000', '5m')['close'][-1] == 10.6
+
+    print(f"\nK线统计: {bars.stats}")
+    print("\n✓ 分钟K线测试通过")
+
+
+def test_daily_bars():
+    """测试历史日K线载入后由实时行情更新当日K线"""
+    history = SeededAPI().get_historical_ohlcv('600000', days=30)
+    bars = BarAggregator({'1d': 31})
+    bars.update(_quote('600000', 0, 10.0, 1000))
+    assert not bars.has_daily('600000')  # 没有历史K线时不建日K线
+
+    bars.load_daily('600000', history)
+    quote = _quote('600000', 60, 10.2, 5000, high=10.5, low=9.9)
+    bars.update(quote)
+    bars.update(_quote('600000', 120, 10.3, 6000, high=10.5, low=9.9))
+
+    daily = bars.bars('600000', '1d')
+    assert len(daily['close']) == 31
+    assert np.array_equal(daily['high'][:-1], history['high'])
+    assert daily['time'][-1] == date_to_int(datetime.fromtimestamp(quote.timestamp).date())
+    assert (daily['close'][-1], daily['high'][-1], daily['volume'][-1]) == (10.3, 10.5, 6000)
+
+    bars.clear_daily()
+    assert not bars.has_daily('600000') and bars.buffer('600000', '1m') is not None
+
+    print("\n✓ 日K线测试通过")
+
+
+def test_monitor_bars():
+    """测试技术分析使用真实的最高价、最低价，量比规则按交易时间折算"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000']
+        monitor.config['api_config'] = {'max_workers': 1}
+        monitor.api = SeededAPI()
+        results = monitor.fetch_all(['600000'])
+        quote = results['600000']['price_data']
+        monitor.analyze_stock('600000', quote, results['600000']['history'])
+
+        history = monitor.api.get_historical_ohlcv('600000', days=monitor.history_days())
+        expected = IndicatorState()
+        for bar in zip(history['close'], history['high'], history['low']):
+            expected.update(bar)
+        assert monitor.indicator_states['600000'].peek(quote) == expected.peek(quote)
+        assert monitor.fetch_stock_data('600000')['history'] is None
+
+        calendar = MarketCalendar()
+        assert calendar.session_minutes() == 240
+        assert calendar.elapsed_minutes(datetime(2026, 10, 16, 10, 0)) == 30
+        assert calendar.elapsed_minutes(datetime(2026, 10, 16, 13, 30)) == 150
+        assert calendar.elapsed_minutes(datetime(2026, 10, 17, 10, 0)) == 240  # 周六
+
+        monitor.config['alert_conditions'] = {'price_change_threshold': 100, 'buy_signal_threshold': 100,
+                                              'sell_signal_threshold': -100, 'volume_threshold': 200}
+        monitor.config['alert_rules'] = []
+        monitor.alert_rules = monitor.load_alert_rules()
+        assert monitor.alert_rules.volume_windows == [5]
+        monitor.avg_volumes[('600000', 5)] = 240 * 1000.0  # 平均每分钟1000股
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append(alerts)
+        morning = int(datetime(2026, 10, 16, 10, 0).timestamp())
+        for volume in (50_000, 70_000):  # 30分钟: 量比 1.67、2.33
+            monitor.check_alerts([(Quote('600000', '浦发银行', 10.0, 0.0, 0.0, volume, 0.0, 10.0, 10.0, 10.0, 10.0,
+                                         morning), {'score': 0, 'buy_signals': [], 'sell_signals': []}, [])])
+        assert fired == [['成交量异动: 量比 2.33']]
+
+        print("\n✓ 监控K线测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_ring_buffer()
+        test_intraday_bars()
+        test_daily_bars()
+        test_monitor_bars()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
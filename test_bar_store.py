@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地K线库测试脚本
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from stock_monitor import TongHuaShunAPI
+from bar_store import BarStore, previous_trading_day, date_to_int
+
+
+class CountingAPI(TongHuaShunAPI):
+    """记录历史K线请求数量的API"""
+
+    def __init__(self, bar_store):
+        super().__init__(bar_store=bar_store)
+        self.requested_days = []
+
+    def get_historical_bars(self, stock_code, days=30, end=None):
+        self.requested_days.append(days)
+        return super().get_historical_bars(stock_code, days, end)
+
+
+def test_append_and_read():
+    """测试追加写入与内存映射读取"""
+    print("=" * 60)
+    print("测试本地K线库")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+        api = TongHuaShunAPI()
+        bars = api.get_historical_bars('600000', 40)
+
+        assert store.append('600000', bars[:30]) == 30
+        assert store.append('600000', bars[25:]) == 10  # 重叠部分被忽略
+        assert store.bar_count('600000') == 40
+        assert store.last_date('600000') == previous_trading_day(datetime.now().date())
+
+        closes = store.read('600000', 'close', 30)
+        assert isinstance(closes, np.memmap)
+        assert np.allclose(closes, [bar['close'] for bar in bars[-30:]])
+
+        # 模拟写入中断：close列多出半行，读取时按最短列对齐
+        with open(os.path.join(root, '600000', 'close.bin'), 'ab') as f:
+            f.write(b'\x00' * 4)
+        assert store.bar_count('600000') == 40
+
+        print(f"\n已存储 {store.bar_count('600000')} 根K线，最新日期 {store.last_date('600000')}")
+    print("\n✓ 本地K线库测试通过")
+
+
+def test_incremental_history():
+    """测试只补齐缺少的最新K线"""
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(root)
+        api = CountingAPI(store)
+
+        # 预先写入截至3个交易日前的数据
+        end = datetime.now().date()
+        for _ in range(4):
+            end = previous_trading_day(end)
+        store.append('000001', api.get_historical_bars('000001', 60, end))
+        api.requested_days.clear()
+
+        prices = api.get_historical_prices('000001', days=30)
+        assert api.requested_days == [3]
+        assert len(prices) == 30
+        assert store.read('000001', 'date', 1)[0] == date_to_int(previous_trading_day(datetime.now().date()))
+
+        # 已是最新：不再请求接口
+        api.get_historical_prices('000001', days=30)
+        assert api.requested_days == [3]
+
+        # 回看窗口变长：整体重新下载
+        assert len(api.get_historical_prices('000001', days=250)) == 250
+        assert api.requested_days == [3, 250]
+
+    print("\n✓ 增量历史数据测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_append_and_read()
+        test_incremental_history()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
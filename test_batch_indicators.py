@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量技术指标引擎测试脚本
+"""
+
+import sys
+import os
+import random
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from stock_monitor import StockAnalyzer
+from batch_indicators import compute_indicators, analyze_matrix, indicator_series, score_series
+
+
+def _random_walks(n_symbols, n_bars, seed=7):
+    """生成随机游走价格矩阵"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n_symbols):
+        price = 10.0 + rng.random() * 90
+        row = []
+        for _ in range(n_bars):
+            price *= 1 + rng.uniform(-0.05, 0.05)
+            row.append(price)
+        rows.append(row)
+    return rows
+
+
+def test_batch_matches_scalar():
+    """测试批量指标与逐只计算结果一致"""
+    print("=" * 60)
+    print("测试批量指标引擎")
+    print("=" * 60)
+
+    analyzer = StockAnalyzer()
+    closes = _random_walks(50, 60)
+    highs = [[p * 1.02 for p in row] for row in closes]
+    lows = [[p * 0.98 for p in row] for row in closes]
+
+    indicators = compute_indicators(closes, highs, lows)
+    batch_signals = analyzer.analyze_buy_sell_signals_batch(closes, highs, lows)
+
+    for row, prices in enumerate(closes):
+        assert abs(indicators['ma5'][row] - analyzer.calculate_ma(prices, 5)) < 1e-9
+        assert abs(indicators['ma20'][row] - analyzer.calculate_ma(prices, 20)) < 1e-9
+        assert abs(indicators['rsi'][row] - analyzer.calculate_rsi(prices)) < 1e-9
+        macd = analyzer.calculate_macd(prices)
+        assert abs(indicators['macd'][row] - macd['macd']) < 1e-9
+        assert abs(indicators['signal'][row] - macd['signal']) < 1e-9
+        kdj = analyzer.calculate_kdj(highs[row], lows[row], prices)
+        assert abs(indicators['j'][row] - kdj['j']) < 1e-9
+
+        expected = analyzer.analyze_buy_sell_signals({
+            'prices': prices, 'highs': highs[row], 'lows': lows[row]
+        })
+        assert batch_signals[row] == expected
+
+    scores = [s['score'] for s in batch_signals]
+    print(f"\n50只股票批量评分: 最高 {max(scores)}  最低 {min(scores)}")
+    print("\n✓ 批量指标测试通过")
+
+
+def test_batch_short_history():
+    """测试历史数据不足时的默认值"""
+    analyzer = StockAnalyzer()
+    closes = np.array(_random_walks(3, 8))
+    indicators = compute_indicators(closes)
+
+    assert np.all(indicators['ma20'] == 0)
+    assert np.all(indicators['rsi'] == 50)
+    assert np.all(indicators['macd'] == 0)
+    assert np.all(indicators['k'] == 50)
+    for signals in analyzer.analyze_buy_sell_signals_batch(closes):
+        assert signals['recommendation'] == 'HOLD'
+        assert signals['score'] == 0
+
+    print("\n✓ 数据不足测试通过")
+
+
+def test_indicator_series():
+    """测试逐K线指标序列与截至每根K线的全量计算一致"""
+    closes = np.array(_random_walks(6, 60, seed=11))
+    highs = closes * 1.01
+    lows = closes * 0.99
+    series = indicator_series(closes, highs, lows)
+    scores = score_series(series)['score']
+
+    for t in (0, 8, 13, 14, 25, 26, 28, 29, 45, 59):
+        result = analyze_matrix(closes[:, :t + 1], highs[:, :t + 1], lows[:, :t + 1])
+        for name, values in series.items():
+            assert np.allclose(values[:, t], result[name]), (name, t)
+        assert np.array_equal(scores[:, t], result['score'])
+
+    print("\n✓ 指标序列测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_batch_matches_scalar()
+        test_batch_short_history()
+        test_indicator_series()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
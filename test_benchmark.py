@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试工具的测试脚本
+"""
+
+import sys
+import os
+import copy
+import json
+import subprocess
+import tempfile
+from datetime import date
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import numpy as np
+
+from benchmark import run_benchmarks, compare_results, bench_startup
+from stock_monitor import main as monitor_main, EXIT_OK, EXIT_FAILED
+from seeded_api import SeededAPI, generate_bars
+
+
+def test_seeded_data():
+    """测试模拟数据可复现，且与请求窗口无关"""
+    print("=" * 60)
+    print("测试可复现模拟数据")
+    print("=" * 60)
+
+    long = generate_bars('600519', 250, date(2024, 6, 28))
+    short = generate_bars('600519', 10, date(2024, 6, 28))
+    assert np.array_equal(long['close'][-10:], short['close'])
+    assert long['date'][-1] == 20240628
+    assert np.all(long['high'] >= long['low'])
+
+    api_a, api_b = SeededAPI(seed=1), SeededAPI(seed=1)
+    assert api_a.get_historical_prices('000001', 30) == api_b.get_historical_prices('000001', 30)
+    assert api_a.get_realtime_price('000001')['price'] == api_b.get_realtime_price('000001')['price']
+    assert SeededAPI(seed=2).get_historical_prices('000001', 30) != api_a.get_historical_prices('000001', 30)
+
+    print("\n✓ 模拟数据测试通过")
+
+
+def test_run_and_compare():
+    """测试小规模基准运行与回退对比"""
+    report = run_benchmarks(symbol_sizes=(3,), bar_sizes=(30,), verbose=False, startup=False)
+    names = {r['name'] for r in report['results']}
+    assert {'calculate_rsi', 'batch.analyze_matrix', 'scan_stocks.warm'} <= names
+    assert report['meta']['seed'] == 42
+
+    slower = copy.deepcopy(report)
+    for r in slower['results']:
+        r['seconds'] = r['seconds'] * 2 + 0.01
+    assert compare_results(report, report) == []
+    regressions = compare_results(slower, report)
+    assert len(regressions) == len(report['results'])
+
+    print(f"\n共 {len(report['results'])} 项基准用例")
+    print("\n✓ 基准测试工具测试通过")
+
+
+def test_startup():
+    """测试导入时不加载GUI和HTTP依赖，--once 扫描一次后按结果返回退出码"""
+    loaded = subprocess.run([sys.executable, '-c', 'import sys, stock_monitor; '
+                             'print(sorted({"tkinter", "requests", "numpy"} & set(sys.modules)))'],
+                            cwd=current_dir, capture_output=True, text=True, check=True).stdout.strip()
+    assert loaded == '[]', loaded
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_file = os.path.join(tmp, 'config.json')
+        output = os.path.join(tmp, 'out', 'scan.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'watchlist': ['600000', '000001'], 'scan_interval': 3600, 'data_store': {'bar_path': ''},
+                       'metrics': {'file': ''}, 'alert_dispatch': {'sinks': []}}, f)
+        assert monitor_main(['--once', '--config', config_file, '--output', output]) == EXIT_OK
+        with open(output, encoding='utf-8') as f:
+            summary = json.load(f)
+        assert [r['code'] for r in summary['results']] == ['600000', '000001']
+        assert summary['errors'] == {} and 'score' in summary['results'][0]
+
+        with open(config_file, 'w', encoding='utf-8') as f:
+            f.write('{')
+        assert monitor_main(['--once', '--config', config_file, '--output', output]) == EXIT_FAILED
+
+    cases = {case['name']: case for case in bench_startup(repeat=1)}
+    assert set(cases) == {'startup.python', 'startup.import', 'startup.once'}
+    print("\n启动耗时: " + "  ".join(f"{name} {case['seconds'] * 1000:.0f} ms" for name, case in cases.items()))
+
+    print("\n✓ 启动测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_seeded_data()
+        test_run_and_compare()
+        test_startup()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
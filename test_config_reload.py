@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置热加载测试脚本
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from config_reload import ConfigWatcher, diff_watchlist, restart_required, validate_config
+from seeded_api import SeededAPI
+
+
+def _config(watchlist, **overrides):
+    config = {
+        'watchlist': watchlist,
+        'scan_interval': 60,
+        'alert_conditions': {'price_change_threshold': 100, 'buy_signal_threshold': 100,
+                             'sell_signal_threshold': -100, 'cooldown': 600},
+        'alert_rules': [{'name': '上涨', 'when': 'change_percent > -100', 'message': '价格 {price:.2f}'}],
+        'api_config': {'max_workers': 1},
+        'data_store': {'bar_path': ''},
+        'cache': {'enabled': False},
+        'metrics': {'file': '', 'port': None},
+        'alert_dispatch': {'sinks': []},
+        'schedule': {'market_hours_only': False},
+        'reload': {'enabled': True, 'interval': 0.05},
+    }
+    config.update(overrides)
+    return config
+
+
+def _write(path, config):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("等待超时")
+        time.sleep(0.01)
+
+
+def test_validate_and_diff():
+    """测试配置校验、自选股差异和文件修改检测"""
+    print("=" * 60)
+    print("测试配置校验与自选股差异")
+    print("=" * 60)
+
+    assert validate_config(_config(['600000'])) == []
+    errors = validate_config(_config(['600000', '60001', 600002], scan_interval=0,
+                                     alert_conditions={'price_change_threshold': '3'}))
+    assert len(errors) == 5, errors
+    errors = validate_config(_config(['600000'], schedule=[], alert_rules=[{'when': 3}, 'volume > 0']))
+    assert len(errors) == 3, errors
+    errors = validate_config(_config(['600000'], schedule={'tiers': [['600000'], {'name': '持仓', 'interval': True}]}))
+    assert len(errors) == 2, errors
+    assert validate_config(_config(['600000'], schedule={'tiers': {}})) == ["schedule.tiers 必须是列表"]
+    assert diff_watchlist(['600000', '000001', '000002'], ['000002', '600519', '600000', '600519']) == (
+        ['600519'], ['000001'])
+    assert restart_required(_config([]), _config([], cache={'enabled': True}, scan_interval=3)) == ['cache']
+
+    codes = [f'{i:06d}' for i in range(10000)]
+    start = time.perf_counter()
+    assert validate_config(_config(codes)) == []
+    added, removed = diff_watchlist(codes, codes[5000:] + [f'{i:06d}' for i in range(10000, 15000)])
+    elapsed = time.perf_counter() - start
+    assert len(added) == len(removed) == 5000
+    print(f"\n1万只自选股校验 + 差异: {elapsed * 1000:.1f} ms")
+    assert elapsed < 0.5
+
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'config.json')
+        _write(path, _config(['600000']))
+        watcher = ConfigWatcher(path)
+        assert not watcher.changed()
+        _write(path, _config(['600000', '000001']))
+        assert watcher.changed() and not watcher.changed()
+
+    print("\n✓ 配置校验测试通过")
+
+
+def test_reload_state():
+    """测试热加载只为新增股票获取历史数据，释放移除股票的状态，阈值整体替换"""
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'config.json')
+        _write(path, _config(['600000', '000001', '000002']))
+        monitor = StockMonitor(path)
+        monitor.api = SeededAPI()
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append(code)
+        monitor.scan_stocks()
+        assert fired == ['600000', '000001', '000002']
+        state = monitor.indicator_states['600000']
+
+        _write(path, _config(['600000', '000002', '600519'],
+                             alert_rules=[{'name': '上涨', 'when': 'change_percent > -100'},
+                                          {'name': '下跌', 'when': 'change_percent < 100'}]))
+        assert monitor.reload_config()
+        assert monitor.config_version == 1
+        assert '000001' not in monitor.indicator_states and not monitor.bars.buffer('000001', '1m')
+        assert all(code != '000001' for code, _ in monitor.avg_volumes)
+        assert monitor.indicator_states['600000'] is state  # 保留的股票不重新载入
+        assert monitor.fetch_stock_data('600000')['history'] is None
+        assert monitor.fetch_stock_data('600519')['history'] is not None
+
+        fired.clear()
+        monitor.scan_stocks()
+        # "上涨"规则沿用冷却状态，只对新增股票提醒；新规则"下跌"对全部股票提醒
+        assert fired == ['600000', '000002', '600519']
+        assert [key for key in monitor.alert_rules._last_fired if key[0] == '上涨'] == [
+            ('上涨', '600000'), ('上涨', '000002'), ('上涨', '600519')]
+
+        # 无效的配置不应用
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('{"watchlist": [')
+        assert not monitor.reload_config()
+        _write(path, _config(['600000'], scan_interval=-1))
+        assert not monitor.reload_config()
+        # 规则无法编译或应用时出错：整体保留原配置和规则
+        rules = monitor.alert_rules
+        _write(path, _config(['600000'], alert_rules=[{'name': '坏规则', 'when': 'change_percent >'}]))
+        assert not monitor.reload_config()
+        _write(path, _config(['600000'], technical_analysis={'history_days': 'x'}))
+        assert not monitor.reload_config()
+        create_alert_dispatcher = monitor.create_alert_dispatcher
+        def broken_dispatcher(config=None):
+            raise RuntimeError("无法创建提醒渠道")
+        monitor.create_alert_dispatcher = broken_dispatcher
+        _write(path, _config(['600000'], alert_dispatch={'sinks': ['console']}))
+        assert not monitor.reload_config()
+        monitor.create_alert_dispatcher = create_alert_dispatcher
+        assert monitor.alert_rules is rules and monitor.config_version == 1
+        # 文件暂时被删除时不写入默认配置
+        os.remove(path)
+        assert not monitor.reload_config()
+        assert not os.path.exists(path)
+        assert monitor.config['watchlist'] == ['600000', '000002', '600519']
+        assert monitor.metrics.get('config_reload_errors_total') == 6
+        monitor.stop_executors()
+
+    print("\n✓ 热加载状态测试通过")
+
+
+def test_monitor_reload():
+    """测试监控运行中修改配置文件后自动应用"""
+    with tempfile.TemporaryDirectory() as root:
+        path = os.path.join(root, 'config.json')
+        _write(path, _config(['600000'], scan_interval=0.2))
+        monitor = StockMonitor(path)
+        monitor.api = SeededAPI()
+        scans = []
+        scan_stocks = monitor.scan_stocks
+        monitor.scan_stocks = lambda codes=None: (scans.append(codes), scan_stocks(codes))
+
+        monitor.start()
+        try:
+            _wait_until(lambda: scans)
+            _write(path, _config(['600000', '000001'], scan_interval=0.2))
+            _wait_until(lambda: any('000001' in codes for codes in scans))
+        finally:
+            monitor.stop()
+        assert monitor.config['watchlist'] == ['600000', '000001']
+        assert '000001' in monitor.indicator_states
+
+    print("\n✓ 监控热加载测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_validate_and_diff()
+        test_reload_state()
+        test_monitor_reload()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+滚动相关性与板块联动测试脚本
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import date, datetime
+from datetime import time as day_time
+
+import numpy as np
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from correlation import RollingCorrelation, SectorMonitor
+from records import Quote
+from seeded_api import SeededAPI
+
+LIQUOR = ['600519', '000858']
+DAY_START = int(datetime.combine(date.today(), day_time(9, 30)).timestamp())
+
+
+def _factor_returns(n_bars, seed=0):
+    """白酒两只股票共享一个因子，其余两只独立"""
+    rng = np.random.default_rng(seed)
+    factor = rng.normal(0.002, 0.004, n_bars)
+    noise = rng.normal(0, 0.001, (n_bars, 4))
+    returns = noise.copy()
+    returns[:, 0] += factor
+    returns[:, 1] += factor
+    returns[:, 2] += rng.normal(0, 0.004, n_bars)
+    returns[:, 3] += rng.normal(0, 0.004, n_bars)
+    return returns
+
+
+def _reference(correlation):
+    """按窗口数据整体重算的相关系数矩阵"""
+    expected = np.corrcoef(correlation.window_returns().T)
+    return np.nan_to_num(expected)
+
+
+def test_incremental_matches_recompute():
+    """测试增量更新的相关矩阵与整体重算一致（含缺失数据、窗口滑动和定期重算）"""
+    print("=" * 60)
+    print("测试滚动相关矩阵")
+    print("=" * 60)
+
+    rng = np.random.default_rng(1)
+    codes = [f'{i:06d}' for i in range(50)]
+    for refresh in (0, 7):
+        correlation = RollingCorrelation(codes, window=20, refresh=refresh)
+        prices = np.full(50, 10.0)
+        assert not correlation.update_prices(prices)
+        for step in range(100):
+            prices = prices * np.exp(rng.normal(0, 0.01, 50))
+            observed = prices.copy()
+            observed[rng.random(50) < 0.05] = np.nan  # 部分股票本分钟没有数据
+            correlation.update_prices(observed)
+            if step in (5, 19, 20, 63, 99):
+                assert np.allclose(correlation.matrix(), _reference(correlation), atol=1e-9)
+        assert correlation.count == 20
+        assert abs(correlation.pair('000003', '000007') - _reference(correlation)[3, 7]) < 1e-9
+
+    # 自选股变化后保留的股票窗口数据不变
+    before = correlation.submatrix(['000001', '000002'])
+    moved = correlation.reindex(['000002', '600519', '000001'])
+    assert np.allclose(moved.submatrix(['000001', '000002']), before)
+    assert moved.pair('600519', '000001') == 0.0
+
+    print("\n✓ 滚动相关矩阵测试通过")
+
+
+def test_incremental_speed():
+    """测试3000只股票时增量更新远快于整体重算"""
+    rng = np.random.default_rng(2)
+    correlation = RollingCorrelation([f'{i:06d}' for i in range(3000)], window=120)
+    returns = rng.normal(0, 0.01, (130, 3000))
+    for row in returns[:125]:
+        correlation.update(row)
+
+    incremental = []
+    for row in returns[125:]:
+        start = time.perf_counter()
+        correlation.update(row)
+        incremental.append(time.perf_counter() - start)
+    full = []
+    for _ in range(2):
+        start = time.perf_counter()
+        np.corrcoef(correlation.window_returns().T)
+        full.append(time.perf_counter() - start)
+    print(f"\n3000只股票: 增量更新 {min(incremental) * 1000:.1f} ms, 整体重算 {min(full) * 1000:.1f} ms")
+    assert min(incremental) * 3 < min(full)
+    assert abs(correlation.pair('000010', '000020') - np.corrcoef(returns[10:, 10], returns[10:, 20])[0, 1]) < 1e-9
+
+    print("\n✓ 增量更新耗时测试通过")
+
+
+def test_sector_signals():
+    """测试板块联动信号与自动发现联动组"""
+    codes = LIQUOR + ['600000', '000001']
+    correlation = RollingCorrelation(codes, window=60)
+    for row in _factor_returns(60):
+        correlation.update(row)
+    print(f"\n600519/000858 相关系数: {correlation.pair(*LIQUOR):.2f}, "
+          f"600000/000001: {correlation.pair('600000', '000001'):.2f}")
+    assert correlation.pair(*LIQUOR) > 0.8
+    assert abs(correlation.pair('600000', '000001')) < 0.5
+    assert correlation.clusters(0.6) == [LIQUOR]
+
+    sectors = SectorMonitor({'白酒': LIQUOR + ['000568'], '银行': ['600000', '000001']}, min_move=2.0, cooldown=600)
+    changes = {'600519': 3.1, '000858': 2.4, '600000': 2.5, '000001': 2.2}
+    fired = sectors.signals(correlation, changes, now=1000)
+    assert [(name, members) for name, members, _ in fired] == [('白酒', LIQUOR)]  # 银行两只相关性不足
+    print(fired[0][2])
+    assert sectors.signals(correlation, changes, now=1300) == []   # 冷却中
+    assert len(sectors.signals(correlation, changes, now=1700)) == 1
+    assert sectors.signals(correlation, {'600519': 3.1, '000858': -0.5}, now=5000) == []  # 不同向
+    assert sectors.signals(correlation, {'600519': 1.1, '000858': 0.5}, now=5000) == []   # 幅度不足
+
+    discovered = SectorMonitor(discover=True).signals(correlation, {'600519': -2.5, '000858': -3.0})
+    assert discovered[0][0] == '联动组(600519等2只)' and '下跌' in discovered[0][2]
+
+    print("\n✓ 板块联动测试通过")
+
+
+def test_monitor_sectors():
+    """测试监控程序用1分钟K线更新相关矩阵，白酒板块联动时提醒"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = LIQUOR + ['600000', '000001']
+        monitor.config['correlation'] = {'enabled': True, 'window': 60, 'sectors': {'白酒': LIQUOR}, 'min_move': 2.0}
+        monitor.config['alert_conditions']['cooldown'] = 3600
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append((name, code, alerts))
+
+        api = SeededAPI()
+        closes = {}
+        for stock_code in monitor.config['watchlist']:
+            history = api.get_historical_ohlcv(stock_code, days=30)
+            monitor.bars.load_daily(stock_code, history)
+            closes[stock_code] = history['close'][-1]
+
+        prices = np.array([closes[code] for code in monitor.config['watchlist']])
+        results = []
+        for minute, returns in enumerate(_factor_returns(40, seed=3)):
+            prices = prices * np.exp(returns)
+            timestamp = DAY_START + minute * 60
+            for stock_code, price in zip(monitor.config['watchlist'], prices):
+                monitor.bars.update(Quote(stock_code, f'股票{stock_code}', price, 0.0, 0.0, 1000 * (minute + 1), 0.0,
+                                          price, price, closes[stock_code], closes[stock_code], timestamp))
+            results.append(monitor.check_sectors(now=timestamp + 30))
+
+        assert monitor.correlation.count == 39
+        assert monitor.correlation.pair(*LIQUOR) > 0.8
+        assert [result for result in results if result] == [{'白酒': fired[0][2]}]  # 一小时冷却期内只提醒一次
+        assert len(fired) == 1
+        assert fired[0][:2] == ('白酒板块', '600519,000858')
+        print(f"\n{fired[0][2][0]}")
+
+        # 自选股变化后保留其余股票的窗口数据
+        monitor.config['watchlist'] = LIQUOR
+        monitor.check_sectors(now=timestamp + 30)
+        assert monitor.correlation.codes == LIQUOR and monitor.correlation.count == 39
+
+    print("\n✓ 监控板块联动测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_incremental_matches_recompute()
+        test_incremental_speed()
+        test_sector_signals()
+        test_monitor_sectors()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
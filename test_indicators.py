@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标注册表测试脚本
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import indicators
+from indicators import IndicatorEngine, INDICATORS, enabled_indicators
+from stock_monitor import StockMonitor, StockAnalyzer
+from seeded_api import SeededAPI
+from benchmark import make_codes, make_matrices
+
+ALL = tuple(INDICATORS)
+
+
+def _random_walk(n_bars, seed):
+    rng = np.random.default_rng(seed)
+    closes = 10 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    highs = closes * (1 + rng.uniform(0, 0.02, n_bars))
+    lows = closes * (1 - rng.uniform(0, 0.02, n_bars))
+    volumes = rng.integers(1000, 100000, n_bars).astype(float)
+    return closes, highs, lows, volumes
+
+
+def test_matches_reference():
+    """测试注册表的指标值与单项计算方法及NumPy参考实现一致"""
+    print("=" * 60)
+    print("测试技术指标注册表")
+    print("=" * 60)
+
+    analyzer = StockAnalyzer()
+    engine = IndicatorEngine(ALL)
+    for seed in range(20):
+        closes, highs, lows, volumes = _random_walk(40, seed)
+        prices, h, l = closes.tolist(), highs.tolist(), lows.tolist()
+        values = engine.compute(prices, h, l, volumes)
+
+        for period in (5, 10, 20):
+            assert abs(values[f'ma{period}'] - analyzer.calculate_ma(prices, period)) < 1e-9
+        assert abs(values['rsi'] - analyzer.calculate_rsi(prices)) < 1e-9
+        for name, expected in analyzer.calculate_macd(prices).items():
+            assert abs(values[name] - expected) < 1e-9
+        for name, expected in analyzer.calculate_kdj(h, l, prices).items():
+            assert abs(values[name] - expected) < 1e-9
+
+        window = closes[-20:]
+        assert abs(values['boll_mid'] - window.mean()) < 1e-9
+        assert abs(values['boll_upper'] - (window.mean() + 2 * window.std())) < 1e-9
+        ranges = np.maximum(highs[1:] - lows[1:], np.maximum(abs(highs[1:] - closes[:-1]), abs(lows[1:] - closes[:-1])))
+        ranges = np.concatenate(([highs[0] - lows[0]], ranges))
+        atr = ranges[:14].mean()
+        for value in ranges[14:]:
+            atr = (atr * 13 + value) / 14
+        assert abs(values['atr'] - atr) < 1e-9
+        assert values['obv'] == (np.sign(np.diff(closes)) * volumes[1:]).sum()
+
+    # 数据不足时的取值与单项计算方法相同
+    values = engine.compute([10.0, 10.5])
+    assert values['ma5'] == 0 and values['rsi'] == 50 and values['macd'] == 0
+    assert values['k'] == 50 and values['boll_mid'] == 0 and values['atr'] == 0 and values['obv'] == 0
+
+    print("\n✓ 指标值测试通过")
+
+
+def test_shared_intermediates():
+    """测试只计算启用指标需要的中间量，共用的中间量每只股票只计算一次"""
+    assert IndicatorEngine(['rsi']).plan == [('diffs',), ('wilder', 14)]
+    assert IndicatorEngine(['macd']).plan == [('ema', 12), ('ema', 26)]
+    plan = IndicatorEngine(['ma', 'boll']).plan
+    assert plan.count(('tail_sums', 20)) == 1 and plan.count(('mean', 20)) == 1
+    assert plan.index(('mean', 20)) < plan.index(('std', 20))
+    assert ('ema', 12) not in plan and ('diffs',) not in plan
+
+    calls = []
+    originals = dict(indicators._INTERMEDIATES)
+    try:
+        for name, (func, requires) in originals.items():
+            def counted(values, *args, _name=name, _func=func):
+                calls.append((_name,) + args)
+                return _func(values, *args)
+            indicators._INTERMEDIATES[name] = (counted, requires)
+        engine = IndicatorEngine(ALL)
+        closes, highs, lows, volumes = _random_walk(40, 0)
+        engine.compute(closes, highs, lows, volumes)
+    finally:
+        indicators._INTERMEDIATES.update(originals)
+    print(f"\n全部指标共计算 {len(calls)} 个中间量: {calls}")
+    assert len(calls) == len(set(calls)) == len(engine.plan)
+    assert calls.count(('diffs',)) == 1  # RSI 与 OBV 共用
+
+    try:
+        IndicatorEngine(['ma', 'vwap'])
+        assert False, "未知指标应报错"
+    except ValueError as e:
+        assert 'vwap' in str(e)
+
+    print("\n✓ 共享中间量测试通过")
+
+
+def test_enabled_flags():
+    """测试只对启用的指标打分，ATR、OBV 只输出数值，批量引擎结果（含 ATR、OBV 数值）一致"""
+    assert enabled_indicators({}) == ('ma', 'rsi', 'macd', 'kdj')
+    assert enabled_indicators({'enable_rsi': False, 'enable_boll': True, 'enable_obv': True}) == (
+        'ma', 'macd', 'kdj', 'boll', 'obv')
+
+    oversold = {'price': 8.0, 'ma5': 9.0, 'ma10': 10.0, 'ma20': 11.0, 'rsi': 20.0,
+                'macd': 0.0, 'signal': 0.0, 'histogram': 0.0, 'k': 50, 'd': 50, 'j': 50,
+                'boll_mid': 10.0, 'boll_upper': 11.0, 'boll_lower': 9.0, 'atr': 0.3, 'obv': 1e5}
+    assert StockAnalyzer().evaluate_signals(oversold)['score'] == -2 + 3
+    signals = StockAnalyzer(['ma', 'boll', 'atr']).evaluate_signals(oversold)
+    assert signals['buy_signals'] == ['跌破布林线下轨'] and signals['sell_signals'] == ['均线空头排列']
+    assert signals['score'] == 0 and signals['indicators'] == {'atr': 0.3}
+    assert StockAnalyzer(['rsi']).evaluate_signals(oversold)['recommendation'] == 'BUY'
+
+    matrices = make_matrices(make_codes(200), 40)
+    volumes = np.random.default_rng(0).integers(1000, 100000, matrices['close'].shape).astype(float)
+    for enabled in (('ma', 'rsi', 'macd', 'kdj', 'boll'), ('rsi', 'boll', 'atr', 'obv'), ('macd',)):
+        analyzer = StockAnalyzer(enabled)
+        batch = analyzer.analyze_buy_sell_signals_batch(matrices['close'], matrices['high'], matrices['low'],
+                                                        volumes)
+        for row in range(200):
+            assert batch[row] == analyzer.analyze_buy_sell_signals({
+                'prices': matrices['close'][row].tolist(),
+                'highs': matrices['high'][row].tolist(),
+                'lows': matrices['low'][row].tolist(),
+                'volumes': volumes[row].tolist(),
+            })
+    boll = StockAnalyzer(['boll']).analyze_buy_sell_signals_batch(matrices['close'], matrices['high'], matrices['low'])
+    print(f"\n200只股票中布林线信号 {sum(bool(s['buy_signals'] or s['sell_signals']) for s in boll)} 只")
+
+    print("\n✓ 启用指标测试通过")
+
+
+def test_monitor_flags():
+    """测试监控程序按 technical_analysis.enable_* 打分，增量计算与多进程批量计算一致，配置热加载后生效"""
+    codes = make_codes(20)
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.api = SeededAPI(batch_size=50)
+        monitor.config['api_config'] = {'max_workers': 1}
+        assert monitor.analyzer.enabled == ('ma', 'rsi', 'macd', 'kdj')
+        results = monitor.fetch_all(codes)
+
+        config = dict(monitor.config)
+        config['technical_analysis'] = dict(config['technical_analysis'], enable_rsi=False,
+                                            enable_boll=True, enable_atr=True, enable_obv=True)
+        monitor.apply_config(config)
+        assert monitor.analyzer.enabled == ('ma', 'macd', 'kdj', 'boll', 'atr', 'obv')
+        assert [indicator.name for indicator in monitor.daily_engine.indicators] == ['boll', 'atr', 'obv']
+
+        signals = {code: monitor.analyze_stock(code, results[code]['price_data'], results[code]['history'])
+                   for code in codes}
+        for code in codes:
+            assert not any('RSI' in message for message in signals[code]['buy_signals'] + signals[code]['sell_signals'])
+            assert signals[code]['indicators']['atr'] > 0 and signals[code]['indicators']['obv'] != 0
+        monitor.display_stock_info(results[codes[0]]['price_data'], results[codes[0]]['market_info'],
+                                   signals[codes[0]], [])
+
+        monitor.config['analysis'] = {'workers': 2}
+        try:
+            pooled = monitor.analyze_all(codes, results)
+        finally:
+            monitor.stop_executors()
+        for code in codes:
+            assert pooled[code] == signals[code]
+
+    print("\n✓ 监控指标配置测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_matches_reference()
+        test_shared_intermediates()
+        test_enabled_flags()
+        test_monitor_flags()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
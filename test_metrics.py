@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监控指标测试脚本
+"""
+
+import sys
+import os
+import tempfile
+import urllib.request
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, TongHuaShunAPI
+from metrics import MetricsRegistry
+
+
+class BrokenNewsAPI(TongHuaShunAPI):
+    """指定股票的新闻接口总是失败"""
+
+    def get_news(self, stock_code, limit=5, since=None):
+        if stock_code == '000001':
+            raise ConnectionError("模拟新闻接口故障")
+        return super().get_news(stock_code, limit, since)
+
+
+def test_registry_render():
+    """测试Prometheus文本格式输出"""
+    print("=" * 60)
+    print("测试监控指标")
+    print("=" * 60)
+
+    registry = MetricsRegistry(prefix='demo', help_texts={'requests_total': '请求数'})
+    registry.inc('requests_total', endpoint='quotes')
+    registry.inc('requests_total', 2, endpoint='quotes')
+    registry.set('queue_depth', 7)
+    registry.observe('latency_seconds', 0.003, endpoint='quotes')
+    registry.observe('latency_seconds', 200, endpoint='quotes')
+
+    text = registry.render()
+    assert '# HELP demo_requests_total 请求数' in text
+    assert 'demo_requests_total{endpoint="quotes"} 3' in text
+    assert 'demo_queue_depth 7' in text
+    assert 'demo_latency_seconds_bucket{endpoint="quotes",le="0.005"} 1' in text
+    assert 'demo_latency_seconds_bucket{endpoint="quotes",le="+Inf"} 2' in text
+    assert 'demo_latency_seconds_count{endpoint="quotes"} 2' in text
+
+    port = registry.serve(0)
+    try:
+        body = urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5).read().decode('utf-8')
+        assert 'demo_queue_depth 7' in body
+    finally:
+        registry.shutdown()
+
+    print("\n✓ 指标格式测试通过")
+
+
+def test_scan_instrumentation():
+    """测试扫描各阶段、接口与错误指标"""
+    with tempfile.TemporaryDirectory() as tmp:
+        monitor = StockMonitor(os.path.join(tmp, 'config.json'))
+        assert monitor.config['metrics']['file'] == ''  # 默认不写指标文件
+        monitor.api = BrokenNewsAPI()
+        monitor.config['api_config'] = {'retry_times': 0, 'max_workers': 2}
+        monitor.config['watchlist'] = ['600000', '000001']
+        monitor.config['metrics'] = {'file': 'metrics.prom'}  # 相对于配置文件所在目录
+        monitor.scan_stocks()
+        monitor.stop_executors()
+        with open(os.path.join(tmp, 'metrics.prom'), encoding='utf-8') as f:
+            text = f.read()
+
+    for stage in ('fetch', 'analyze', 'display', 'alert'):
+        assert monitor.metrics.get('stage_seconds', stage=stage).count == 1
+    assert monitor.metrics.get('api_seconds', endpoint='get_realtime_prices').count == 1
+    assert monitor.metrics.get('api_errors_total', endpoint='get_news', error='ConnectionError') == 1
+    assert monitor.metrics.get('symbol_errors_total', stage='fetch', error='ConnectionError') == 1
+    assert monitor.metrics.get('scans_total') == 1
+    assert 'stock_monitor_scan_utilization_ratio' in text
+
+    print("\n✓ 扫描埋点测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_registry_render()
+        test_scan_instrumentation()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟行情服务器测试脚本
+"""
+
+import sys
+import os
+import time
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+import requests
+
+from stock_monitor import TongHuaShunAPI
+from mock_server import MockQuoteServer
+from seeded_api import SeededAPI
+
+
+def test_http_mode():
+    """测试http模式通过本地服务器获取数据"""
+    print("=" * 60)
+    print("测试本地模拟行情服务器")
+    print("=" * 60)
+
+    server = MockQuoteServer()
+    base_url = server.start()
+    try:
+        api = TongHuaShunAPI(mode='http', base_url=base_url, batch_size=2, timeout=5)
+        codes = ['600000', '000001', '600519']
+
+        quotes = api.get_realtime_prices(codes)
+        assert list(quotes) == codes
+        assert quotes['600519']['price'] == SeededAPI().get_realtime_price('600519')['price']
+        assert api.get_market_info('000001')['code'] == '000001'
+        assert len(api.get_news('600000', limit=3)) == 3
+        history = api.get_historical_prices('600000', days=30)
+        assert history == SeededAPI().get_historical_prices('600000', days=30)
+        assert api.get_stock_list() == SeededAPI().get_stock_list()
+
+        stats = requests.get(f'{base_url}/stats', timeout=5).json()
+        print(f"\n服务器统计: {stats}")
+        assert stats['requests'] >= 7
+    finally:
+        server.stop()
+
+    print("\n✓ http模式测试通过")
+
+
+def test_fault_injection():
+    """测试错误注入、限流与超时"""
+    server = MockQuoteServer(error_rate=1.0)
+    base_url = server.start()
+    try:
+        api = TongHuaShunAPI(mode='http', base_url=base_url, timeout=5)
+        try:
+            api.get_realtime_price('600000')
+            assert False, "应当返回500错误"
+        except requests.HTTPError as e:
+            assert e.response.status_code == 500
+    finally:
+        server.stop()
+
+    server = MockQuoteServer(rate_limit=2)
+    base_url = server.start()
+    try:
+        statuses = [requests.get(f'{base_url}/quotes?codes=600000', timeout=5).status_code for _ in range(5)]
+        assert statuses.count(429) >= 2
+    finally:
+        server.stop()
+
+    server = MockQuoteServer(latency=0.5)
+    base_url = server.start()
+    try:
+        api = TongHuaShunAPI(mode='http', base_url=base_url, timeout=0.1)
+        start = time.monotonic()
+        try:
+            api.get_news('600000')
+            assert False, "应当超时"
+        except requests.Timeout:
+            pass
+        assert time.monotonic() - start < 0.4
+    finally:
+        server.stop()
+
+    print("\n✓ 故障注入测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_http_mode()
+        test_fault_injection()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量新闻测试脚本
+"""
+
+import sys
+import os
+import tempfile
+import random
+import time
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, TongHuaShunAPI, MOCK_NEWS_INTERVAL
+from news_feed import KeywordMatcher, NewsFeed
+from mock_server import MockQuoteServer
+from records import NewsItem
+
+
+def _item(title, publish_time, content='内容'):
+    return NewsItem(title, content, '财经网', publish_time, f'http://news.example.com/{publish_time}')
+
+
+def test_keyword_matcher():
+    """测试 Aho-Corasick 匹配结果与逐个查找一致"""
+    print("=" * 60)
+    print("测试关键词匹配")
+    print("=" * 60)
+
+    matcher = KeywordMatcher(['he', 'she', 'his', 'hers', '重大', '重大资产重组', '公告'])
+    assert matcher.find('ushers') == {'he', 'she', 'hers'}
+    assert matcher.find('某公司重大资产重组公告') == {'重大', '重大资产重组', '公告'}
+    assert matcher.contains_any('发布公告') and not matcher.contains_any('普通新闻')
+    assert KeywordMatcher([]).find('任意标题') == set()
+
+    rng = random.Random(7)
+    alphabet = '重大公告减持回购停牌业绩'
+    keywords = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(1000)}
+    titles = [''.join(rng.choice(alphabet + '的了和是') for _ in range(30)) for _ in range(2000)]
+    matcher = KeywordMatcher(keywords)
+
+    start = time.perf_counter()
+    found = [matcher.find(title) for title in titles]
+    automaton = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = [{k for k in keywords if k in title} for title in titles]
+    naive = time.perf_counter() - start
+    assert found == expected
+    print(f"\n{len(keywords)}个关键词 x {len(titles)}个标题: 自动机 {automaton * 1000:.1f} ms, "
+          f"逐个查找 {naive * 1000:.1f} ms")
+
+    print("\n✓ 关键词匹配测试通过")
+
+
+def test_cursor_dedup():
+    """测试游标过滤与内容哈希去重"""
+    feed = NewsFeed(max_seen=100)
+    assert feed.cursor('600000') is None
+
+    first = [_item('标题B', 200), _item('标题A', 100)]
+    assert feed.add('600000', first) == first
+    assert feed.cursor('600000') == 200
+    assert feed.add('600000', first) == []                     # 重复推送
+    assert feed.add('600000', [_item('标题A', 300)]) == []     # 转载（内容相同）
+    assert feed.add('600000', [_item('旧闻', 150)]) == []      # 早于游标
+    same_second = _item('标题C', 200)
+    assert feed.add('600000', [same_second]) == [same_second]  # 与游标同一秒发布
+    assert feed.add('000001', first) == first                  # 不同股票各自去重
+    assert [item.title for item in feed.recent('600000')] == ['标题C', '标题B', '标题A']
+    assert feed.stats == {'fetched': 9, 'new': 5, 'duplicates': 2}
+
+    small = NewsFeed(max_seen=2)
+    for i in range(5):
+        small.add('600000', [_item(f'标题{i}', i)])
+    assert len(small._seen) == 2
+
+    print("\n✓ 游标与去重测试通过")
+
+
+def test_api_since():
+    """测试接口只返回游标之后的新闻（进程内模拟与HTTP）"""
+    api = TongHuaShunAPI()
+    news = api.get_news('600000', limit=5)
+    assert len(news) == 5 and news[0].publish_time - news[1].publish_time == MOCK_NEWS_INTERVAL
+    assert api.get_news('600000', limit=5, since=news[0].publish_time) == news[:1]
+
+    server = MockQuoteServer()
+    http_api = TongHuaShunAPI(mode='http', base_url=server.start())
+    try:
+        assert len(http_api.get_news('600000', limit=5, since=news[2].publish_time)) == 3
+    finally:
+        server.stop()
+
+    print("\n✓ 增量接口测试通过")
+
+
+class ImportantNewsAPI(TongHuaShunAPI):
+    """每次请求都返回同一条重要新闻（模拟重复推送）"""
+
+    def __init__(self):
+        super().__init__()
+        self.since = []
+
+    def get_news(self, stock_code, limit=5, since=None):
+        self.since.append(since)
+        return [_item(f'{stock_code}重大资产重组', 1000)]
+
+
+def test_monitor_news():
+    """测试监控扫描只处理新增新闻，重要新闻只提醒一次"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001']
+        monitor.config['alert_conditions'] = {'price_change_threshold': 100, 'buy_signal_threshold': 100,
+                                              'sell_signal_threshold': -100, 'cooldown': 0}
+        monitor.config['alert_rules'] = []
+        monitor.config['cache'] = {'enabled': False}
+        monitor.api = ImportantNewsAPI()
+        monitor.alert_rules = monitor.load_alert_rules()
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append((code, alerts))
+
+        monitor.scan_stocks()
+        monitor.scan_stocks()
+        monitor.stop_executors()
+        assert fired == [('600000', ['发现重要新闻!']), ('000001', ['发现重要新闻!'])]
+        assert monitor.api.since == [None, None, 1000, 1000]
+        assert monitor.news_feed.stats['duplicates'] == 2
+
+        print("\n✓ 监控增量新闻测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_keyword_matcher()
+        test_cursor_dedup()
+        test_api_since()
+        test_monitor_news()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
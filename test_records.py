@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+行情数据记录测试脚本
+"""
+
+import sys
+import os
+import tempfile
+import time
+import tracemalloc
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, TongHuaShunAPI
+from records import Quote, NewsItem, format_timestamp, quote_snapshot, quotes_from_snapshot
+
+
+def test_records():
+    """测试 __slots__ 记录的字典式读取与序列化"""
+    print("=" * 60)
+    print("测试行情数据记录")
+    print("=" * 60)
+
+    api = TongHuaShunAPI()
+    quote = api.get_realtime_price('600000')
+    assert isinstance(quote, Quote)
+    assert not hasattr(quote, '__dict__')
+    assert quote['price'] == quote.price and quote.get('missing', 1) == 1
+    assert isinstance(quote.timestamp, int) and abs(quote.timestamp - time.time()) < 5
+    assert format_timestamp(quote.timestamp)[:4].isdigit()
+    assert Quote.from_dict(quote.to_dict()) == quote
+    assert set(quote) == set(Quote.__slots__)
+    try:
+        quote['missing']
+        assert False, "不存在的字段应抛出KeyError"
+    except KeyError:
+        pass
+
+    news = api.get_news('600000', limit=2)
+    assert all(isinstance(item, NewsItem) for item in news)
+    assert isinstance(news[0]['publish_time'], int)
+
+    # 记录比等价的字典占用更少内存
+    quotes = list(api.get_realtime_prices([f'{600000 + i:06d}' for i in range(2000)]).values())
+    tracemalloc.start()
+    as_dicts = [q.to_dict() for q in quotes]
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    as_records = [Quote.from_dict(d) for d in as_dicts]
+    record_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"\n2000条行情: 字典 {dict_bytes / 1024:.0f} KB, 记录 {record_bytes / 1024:.0f} KB")
+    assert record_bytes < dict_bytes and len(as_records) == 2000
+
+    print("\n✓ 记录测试通过")
+
+
+def test_snapshot():
+    """测试整个自选股的结构化数组快照"""
+    api = TongHuaShunAPI()
+    codes = ['600000', '000001', '600519']
+    quotes = api.get_realtime_prices(codes)
+    snapshot = quote_snapshot(quotes.values())
+
+    assert snapshot['code'].tolist() == codes
+    assert snapshot['price'].tolist() == [q.price for q in quotes.values()]
+    movers = snapshot['code'][abs(snapshot['change_percent']) >= 3]
+    assert set(movers) == {q.code for q in quotes.values() if abs(q.change_percent) >= 3}
+    assert quotes_from_snapshot(snapshot) == list(quotes.values())
+
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = codes
+        monitor.scan_stocks()
+        monitor.stop_executors()
+        assert monitor.snapshot['code'].tolist() == codes
+
+        print("\n✓ 行情快照测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_records()
+        test_snapshot()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
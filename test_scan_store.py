@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描结果库测试脚本
+"""
+
+import sys
+import os
+import io
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from datetime import datetime, timedelta
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from scan_store import ScanStore, to_timestamp, main as query_main
+from seeded_api import SeededAPI
+
+START = datetime(2026, 10, 16, 9, 30)
+CODES = [f'{code:06d}' for code in range(600000, 600200)]
+
+
+def _summary(i, codes=CODES):
+    """第i轮（间隔60秒）的扫描结果"""
+    scan_time = START + timedelta(seconds=60 * i)
+    results = [{'code': code, 'name': f'股票{code}', 'price': 10.0 + i * 0.01, 'change': 0.1,
+                'change_percent': 1.0, 'volume': 1000 * i, 'turnover': 1e6, 'high': 11.0, 'low': 9.0,
+                'open': 10.0, 'prev_close': 9.9, 'timestamp': int(scan_time.timestamp()),
+                'score': i % 7 - 3, 'recommendation': 'HOLD',
+                'buy_signals': ['MACD金叉'] if i % 2 else [], 'sell_signals': []} for code in codes]
+    return {'time': scan_time.isoformat(timespec='seconds'), 'results': results,
+            'alerts': {codes[0]: [f'第{i}轮提醒']}, 'errors': {'000001': 'TimeoutError: 超时'}, 'seconds': 0.5}
+
+
+def test_store_and_query():
+    """测试按轮批量写入后，按股票和时间范围查询走索引"""
+    print("=" * 60)
+    print("测试扫描结果库")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = ScanStore(os.path.join(root, 'scans.db'), queue_size=500)
+        summaries = [_summary(i) for i in range(500)]
+        start = time.perf_counter()
+        for summary in summaries:
+            assert store.submit(summary)
+        submit_seconds = time.perf_counter() - start
+        assert store.flush(timeout=60)
+        print(f"\n提交500轮 × {len(CODES)} 只: {submit_seconds * 1000:.1f} ms, 写入统计: {store.stats}")
+        assert store.stats['scans'] == 500 and store.stats['rows'] == 500 * len(CODES)
+        assert store.stats['batches'] < 500 and store.stats['errors'] == 0  # 积压的多轮合并为一个事务
+
+        rows = store.results('600010')
+        assert len(rows) == 500 and [row['time'] for row in rows] == sorted(row['time'] for row in rows)
+        assert rows[1]['buy_signals'] == ['MACD金叉'] and rows[0]['sell_signals'] == []
+
+        begin, end = START + timedelta(minutes=100), START + timedelta(minutes=200)
+        start = time.perf_counter()
+        rows = store.results('600010', begin, end)
+        elapsed = time.perf_counter() - start
+        print(f"按股票和时间范围查询 {len(rows)} 行: {elapsed * 1000:.2f} ms")
+        assert len(rows) == 100
+        assert all(to_timestamp(begin) <= row['time'] < to_timestamp(end) for row in rows)
+        assert elapsed < 0.1
+        assert store.results(start='2026-10-16 09:30', end='2026-10-16 09:31') == store.results(
+            end=START + timedelta(minutes=1))
+        assert store.alerts(CODES[0], limit=1)[0]['message'] == '第0轮提醒'
+        assert store.errors('000001', end=START + timedelta(minutes=2))[0]['error'] == 'TimeoutError: 超时'
+
+        connection = sqlite3.connect(store.path)
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        plan = ' '.join(row[-1] for row in connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM results WHERE code = ? AND time >= ? AND time < ? ORDER BY time',
+            ('600010', 0, 1)))
+        connection.close()
+        assert 'results_code_time' in plan, plan
+        store.close()
+
+        # 查询命令行只读打开，数据库不存在时报错退出，不创建空库
+        output = io.StringIO()
+        with redirect_stdout(output):
+            query_main(['--db', store.path, '--code', '600010', '--limit', '3'])
+        assert len(output.getvalue().splitlines()) == 3
+        missing = os.path.join(root, 'typo', 'scans.db')
+        try:
+            with redirect_stderr(io.StringIO()):
+                query_main(['--db', missing])
+            assert False, "数据库不存在时应当报错"
+        except SystemExit as e:
+            assert e.code != 0
+        assert not os.path.exists(os.path.dirname(missing))
+
+    print("\n✓ 扫描结果库测试通过")
+
+
+def test_slow_writer():
+    """测试写入缓慢时提交不阻塞，队列满时丢弃并计数"""
+    with tempfile.TemporaryDirectory() as root:
+        store = ScanStore(os.path.join(root, 'scans.db'), queue_size=2)
+        write = store._write
+        store._write = lambda connection, batch: (time.sleep(0.2), write(connection, batch))
+
+        start = time.perf_counter()
+        accepted = [store.submit(_summary(i, CODES[:5])) for i in range(10)]
+        elapsed = time.perf_counter() - start
+        assert elapsed < 0.1, elapsed
+        assert not all(accepted) and store.stats['dropped'] == accepted.count(False)
+
+        store.close()
+        assert store.stats['scans'] == accepted.count(True)
+        assert len(store.results(CODES[0])) == accepted.count(True)
+
+    # 写入线程卡住且队列已满时，关闭最多等待timeout秒
+    with tempfile.TemporaryDirectory() as root:
+        store = ScanStore(os.path.join(root, 'scans.db'), queue_size=1)
+        release = threading.Event()
+        store._write = lambda connection, batch: release.wait()
+        for i in range(3):
+            store.submit(_summary(i, CODES[:5]))
+            time.sleep(0.05)
+        start = time.perf_counter()
+        store.close(timeout=0.2)
+        assert time.perf_counter() - start < 1
+        release.set()
+
+    print("\n✓ 慢速写入测试通过")
+
+
+def test_monitor_persist():
+    """测试监控程序每轮扫描的结果和提醒写入结果库"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001']
+        monitor.config['api_config'] = {'max_workers': 1}
+        monitor.config['alert_rules'] = [{'name': '上涨', 'when': 'change_percent > -100', 'cooldown': 0}]
+        monitor.config['scan_store'] = {'enabled': True, 'path': os.path.join(root, 'scans.db')}
+        monitor.alert_rules = monitor.load_alert_rules()
+        monitor.show_alert = lambda name, code, alerts: None
+        monitor.api = SeededAPI()
+
+        summaries = [monitor.scan_stocks() for _ in range(2)]
+        monitor.close_scan_store()
+        rows = monitor.scan_store.results('600000')
+        assert [row['score'] for row in rows] == [summary['results'][0]['score'] for summary in summaries]
+        assert rows[0]['price'] == summaries[0]['results'][0]['price']
+        assert len(monitor.scan_store.alerts('000001')) == 2
+
+        monitor.config['scan_store']['enabled'] = False
+        monitor.scan_stocks()
+        assert monitor.scan_store.stats['scans'] == 2
+
+    print("\n✓ 监控结果保存测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_store_and_query()
+        test_slow_writer()
+        test_monitor_persist()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+扫描调度与交易日历测试脚本
+"""
+
+import sys
+import os
+import tempfile
+import time
+from datetime import date, datetime
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from market_calendar import MarketCalendar
+from scheduler import ScanScheduler, Tier, build_tiers, MAX_IDLE_SECONDS
+from seeded_api import SeededAPI
+
+
+def test_calendar():
+    """测试交易日与交易时段"""
+    print("=" * 60)
+    print("测试交易日历")
+    print("=" * 60)
+
+    calendar = MarketCalendar(holidays=['2026-10-09'])
+    assert calendar.is_trading_day(date(2026, 10, 16))
+    assert not calendar.is_trading_day(date(2026, 10, 17))   # 周六
+    assert not calendar.is_trading_day(date(2026, 10, 1))    # 国庆节
+    assert not calendar.is_trading_day(date(2026, 10, 9))    # 配置追加的休市日
+
+    assert calendar.is_open(datetime(2026, 10, 16, 9, 30))
+    assert not calendar.is_open(datetime(2026, 10, 16, 9, 29))
+    assert not calendar.is_open(datetime(2026, 10, 16, 12, 0))  # 午间休市
+    assert not calendar.is_open(datetime(2026, 10, 16, 15, 0))
+
+    assert calendar.next_open(datetime(2026, 10, 16, 12, 0)) == datetime(2026, 10, 16, 13, 0)
+    assert calendar.next_open(datetime(2026, 10, 16, 15, 30)) == datetime(2026, 10, 19, 9, 30)
+    assert calendar.next_open(datetime(2026, 9, 30, 16, 0)) == datetime(2026, 10, 8, 9, 30)
+    moment = datetime(2026, 10, 16, 10, 15)
+    assert calendar.next_open(moment) == moment
+
+    print("\n✓ 交易日历测试通过")
+
+
+def test_fixed_rate():
+    """测试固定频率、档位优先级和分片错开"""
+    tail = [f'{i:06d}' for i in range(1000)]
+    scheduler = ScanScheduler([Tier('长尾', 300, tail, priority=1), Tier('持仓', 3, ['600000'], priority=0)],
+                              max_batch=200, start=0.0)
+
+    due = scheduler.due(now=0.0)
+    assert due == ['600000'] + tail[:200]               # 高优先级在前，长尾只扫第一个分片
+    assert scheduler.next_wakeup(now=0.0) == 3.0
+    assert scheduler.due(now=3.0) == ['600000']
+    assert scheduler.due(now=59.0) == ['600000']        # 长时间未检查也只扫描一次，不补扫
+    assert scheduler.due(now=60.0) == ['600000'] + tail[200:400]
+
+    # 一次扫描耗时7秒：跳过错过的周期，到期时间仍对齐到3秒的倍数
+    assert scheduler.due(now=67.5) == ['600000']
+    assert scheduler.stats['持仓']['missed'] == 17 + 1
+    assert scheduler.next_wakeup(now=67.5) == 1.5
+
+    assert scheduler.stats['长尾'] == {'ticks': 2, 'missed': 0}
+
+    print("\n✓ 固定频率调度测试通过")
+
+
+def test_market_hours():
+    """测试休市期间不扫描，开盘后继续原来的频率"""
+    scheduler = ScanScheduler([Tier('持仓', 3, ['600000'])], MarketCalendar(), start=0.0)
+    lunch = datetime(2026, 10, 16, 12, 0)
+    assert scheduler.due(now=0.0, wall=lunch) == []
+    assert scheduler.next_wakeup(now=0.0, wall=lunch) == MAX_IDLE_SECONDS
+    assert scheduler.next_wakeup(now=0.0, wall=datetime(2026, 10, 16, 12, 58)) == 120
+
+    afternoon = datetime(2026, 10, 16, 13, 0)
+    assert scheduler.due(now=3600.0, wall=afternoon) == ['600000']
+    assert scheduler.stats['持仓']['missed'] == 0  # 休市期间的周期不算错过
+    assert scheduler.next_wakeup(now=3600.0, wall=afternoon) == 3.0
+
+    tiers = build_tiers(['600000', '000001', '600519'],
+                        [{'name': '持仓', 'interval': 3, 'codes': ['600000', '300750']},
+                         {'name': '关注', 'interval': 30, 'codes': ['600000', '000001']}], 60)
+    assert [(t.name, t.interval, t.codes) for t in tiers] == [
+        ('持仓', 3, ['600000']), ('关注', 30, ['000001']), ('default', 60, ['600519'])]
+
+    print("\n✓ 交易时段调度测试通过")
+
+
+def test_monitor_schedule():
+    """测试监控循环按档位频率扫描，停止时立即退出"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001', '600519']
+        monitor.config['scan_interval'] = 0.5
+        monitor.config['schedule'] = {'market_hours_only': False,
+                                      'tiers': [{'name': '持仓', 'interval': 0.1, 'codes': ['600000']}]}
+        monitor.api = SeededAPI()
+        scans = []
+        scan_stocks = monitor.scan_stocks
+        monitor.scan_stocks = lambda codes=None: (scans.append(codes), scan_stocks(codes))
+
+        monitor.start()
+        time.sleep(0.75)
+        start = time.perf_counter()
+        monitor.stop()
+        assert time.perf_counter() - start < 2
+
+        assert scans[0] == ['600000', '000001', '600519']
+        fast = sum(codes.count('600000') for codes in scans)
+        slow = sum(codes.count('600519') for codes in scans)
+        print(f"\n0.75秒内: 600000 扫描 {fast} 次, 600519 扫描 {slow} 次")
+        assert fast >= 4 and slow <= 2
+
+        print("\n✓ 监控调度测试通过")
+
+
+def test_monitor_loop_errors():
+    """测试调度出错时监控循环记录错误后继续运行"""
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000']
+        monitor.config['scan_interval'] = 0.1
+        monitor.config['schedule'] = {'market_hours_only': False}
+        monitor.api = SeededAPI()
+        scans = []
+        scan_stocks = monitor.scan_stocks
+        monitor.scan_stocks = lambda codes=None: (scans.append(codes), scan_stocks(codes))
+
+        create_scheduler = monitor.create_scheduler
+        def flaky_scheduler():
+            scheduler = create_scheduler()
+            due = scheduler.due
+            failures = [RuntimeError("调度出错")]
+            def flaky_due():
+                if failures:
+                    raise failures.pop()
+                return due()
+            scheduler.due = flaky_due
+            return scheduler
+        monitor.create_scheduler = flaky_scheduler
+
+        monitor.start()
+        deadline = time.monotonic() + 5
+        while not scans and time.monotonic() < deadline:
+            time.sleep(0.01)
+        monitor.stop()
+        assert scans, "出错后监控循环应继续扫描"
+        assert monitor.metrics.get('loop_errors_total', error='RuntimeError') == 1
+
+        print("\n✓ 监控循环出错恢复测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_calendar()
+        test_fixed_rate()
+        test_market_hours()
+        test_monitor_schedule()
+        test_monitor_loop_errors()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
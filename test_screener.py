@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全市场选股测试脚本
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+import numpy as np
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor, StockAnalyzer, TongHuaShunAPI, EXIT_OK, main as monitor_main
+from screener import Screener, format_table, select_extremes
+from seeded_api import SeededAPI
+
+CODES = [f'{code:06d}' for code in range(600000, 600200)]
+SHORT_CODE = '600150'     # 新上市，历史K线不足
+FAILING_CODE = '600105'   # 所在批次的行情获取失败
+
+
+class SmallUniverseAPI(SeededAPI):
+    """200只股票的市场，其中一只历史K线不足，一个批次的行情获取失败"""
+
+    def get_stock_list(self):
+        return list(CODES)
+
+    def get_historical_ohlcv(self, stock_code, days=30):
+        history = super().get_historical_ohlcv(stock_code, days)
+        if stock_code == SHORT_CODE:
+            history = {column: values[-5:] for column, values in history.items()}
+        return history
+
+    def _request_quotes(self, stock_codes):
+        if FAILING_CODE in stock_codes:
+            raise ConnectionError("模拟行情接口故障")
+        return super()._request_quotes(stock_codes)
+
+
+def test_select_extremes():
+    """测试堆选择的结果与全排序一致，评分相同时按涨跌幅排序"""
+    print("=" * 60)
+    print("测试前N名与后N名选择")
+    print("=" * 60)
+
+    rng = np.random.default_rng(0)
+    scores = rng.integers(-9, 10, size=5000)
+    changes = rng.normal(0, 3, size=5000)
+    top, bottom = select_extremes(scores, changes, 20, 10)
+    order = sorted(range(5000), key=lambda i: (scores[i], changes[i]))
+    assert top == order[::-1][:20]
+    assert bottom == order[:10]
+
+    assert select_extremes([1, 3, 3, -2], [0.5, -1.0, 2.0, 0.0], 2, 1) == ([2, 1], [3])
+    assert select_extremes([], [], 5, 5) == ([], [])
+    assert select_extremes([1, 2], [0.0, 0.0], 5, 0) == ([1, 0], [])
+
+    print("\n✓ 选择测试通过")
+
+
+def test_screen_scores():
+    """测试选股评分与 analyze_buy_sell_signals 一致，历史或行情获取失败的股票不参与打分"""
+    api = SmallUniverseAPI(batch_size=10)
+    screener = Screener(api, history_days=30, top_n=5, bottom_n=5)
+    result = screener.screen()
+    print(format_table(result['top'], "\n评分前5名"))
+
+    assert result['universe'] == 200 and result['scored'] == 200 - 1 - 10
+    assert SHORT_CODE in screener.skipped and FAILING_CODE not in screener.skipped
+    assert [row['rank'] for row in result['top']] == [1, 2, 3, 4, 5]
+
+    analyzer = StockAnalyzer()
+    scores = {}
+    for code in CODES:
+        if code == SHORT_CODE or code[:5] == FAILING_CODE[:5]:
+            continue
+        history = api.get_historical_ohlcv(code, days=30)
+        quote = api.get_realtime_price(code)
+        scores[code] = analyzer.analyze_buy_sell_signals({
+            'prices': list(history['close']) + [quote.price],
+            'highs': list(history['high']) + [quote.high],
+            'lows': list(history['low']) + [quote.low],
+        })
+    for row in result['top'] + result['bottom']:
+        expected = scores[row['code']]
+        assert (row['score'], row['buy_signals'], row['sell_signals']) == (
+            expected['score'], expected['buy_signals'], expected['sell_signals'])
+    ranked = sorted(scores.values(), key=lambda signals: signals['score'])
+    assert [row['score'] for row in result['top']] == [signals['score'] for signals in ranked[::-1][:5]]
+    assert [row['score'] for row in result['bottom']] == [signals['score'] for signals in ranked[:5]]
+
+    # 同一交易日内再次选股不重新获取股票列表和历史数据
+    calls = []
+    api.get_historical_ohlcv = lambda *args, **kwargs: calls.append(args)
+    again = screener.screen()
+    assert not calls and again['top'] == result['top']
+
+    print("\n✓ 选股评分测试通过")
+
+
+def test_full_universe():
+    """测试全市场约5000只股票的选股耗时远小于扫描间隔"""
+    screener = Screener(TongHuaShunAPI(), history_days=30)
+    first = screener.screen()
+    assert first['universe'] == first['scored'] == 5000
+    start = time.perf_counter()
+    result = screener.screen()
+    elapsed = time.perf_counter() - start
+    print(f"\n全市场 {result['scored']} 只: 首轮(含历史数据) {first['seconds']:.2f} 秒, 之后每轮 {elapsed:.3f} 秒")
+
+    assert len(result['top']) == len(result['bottom']) == 20
+    assert result['top'][0]['score'] >= result['top'][-1]['score'] >= result['bottom'][-1]['score']
+    assert first['seconds'] < 60 and elapsed < 5  # 默认扫描间隔60秒
+
+    print("\n✓ 全市场选股测试通过")
+
+
+def test_monitor_screen():
+    """测试监控程序的选股结果写入JSON，--screen 选股一次后退出"""
+    with tempfile.TemporaryDirectory() as root:
+        output = os.path.join(root, 'screener.json')
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        # 相对路径相对于配置文件所在目录
+        monitor.config['screener'] = {'enabled': True, 'top_n': 3, 'bottom_n': 2, 'output': 'screener.json'}
+        monitor.config['api_config'] = {'max_workers': 1}
+        monitor.api = SmallUniverseAPI(batch_size=10)
+        result = monitor.screen_market()
+        with open(output, encoding='utf-8') as f:
+            assert json.load(f)['top'] == result['top']
+        assert len(result['bottom']) == 2
+        assert monitor.metrics.get('screen_symbols') == 189
+        assert monitor.screener.interval == monitor.config['scan_interval']
+
+        # 监控循环在两轮扫描之间按间隔选股
+        monitor.screener = None
+        monitor.config.update(watchlist=['600000'], scan_interval=0.2, alert_rules=[],
+                              schedule={'market_hours_only': False}, reload={'enabled': False})
+        monitor.config['screener']['interval'] = 0.3
+        monitor.start()
+        try:
+            deadline = time.monotonic() + 30
+            while monitor.metrics.get('screen_seconds') is None or monitor.metrics.get('screen_seconds').count < 2:
+                assert time.monotonic() < deadline, "等待选股超时"
+                time.sleep(0.05)
+        finally:
+            monitor.stop()
+
+        config_file = os.path.join(root, 'screen_config.json')
+        with open(config_file, 'w', encoding='utf-8') as f:
+            json.dump({'watchlist': [], 'scan_interval': 60, 'data_store': {'bar_path': ''},
+                       'metrics': {'file': ''}, 'screener': {'top_n': 5, 'bottom_n': 5}}, f)
+        assert monitor_main(['--screen', '--config', config_file, '--output', output]) == EXIT_OK
+        with open(output, encoding='utf-8') as f:
+            saved = json.load(f)
+        assert saved['scored'] == 5000 and len(saved['top']) == 5
+
+    print("\n✓ 监控选股测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_select_extremes()
+        test_screen_scores()
+        test_full_universe()
+        test_monitor_screen()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
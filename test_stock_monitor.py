@@ -6,13 +6,15 @@
 
 import sys
 import os
+import tempfile
+import threading
 
 # 确保可以导入stock_monitor模块
 current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.insert(0, current_dir)
 
-from stock_monitor import StockAnalyzer, TongHuaShunAPI, StockMonitor
+from stock_monitor import StockAnalyzer, TongHuaShunAPI, StockMonitor, IndicatorState, TextRedirector
 
 
 def test_technical_analysis():
@@ -76,6 +78,49 @@ def test_technical_analysis():
     print("\n✓ 技术分析测试通过")
 
 
+def test_indicator_state():
+    """测试滚动指标状态与全量计算一致"""
+    print("\n" + "=" * 60)
+    print("测试滚动指标状态")
+    print("=" * 60)
+    
+    analyzer = StockAnalyzer()
+    prices = [10.0, 10.2, 10.5, 10.3, 10.8, 11.0, 10.9, 11.2, 11.5, 11.3,
+              11.6, 11.8, 11.7, 12.0, 12.2, 12.1, 12.4, 12.6, 12.5, 12.8,
+              13.0, 12.9, 13.2, 13.5, 13.3, 13.6, 13.8, 13.7, 14.0, 14.2,
+              13.9, 13.5, 13.6, 13.1, 12.8, 13.0, 12.7, 12.9, 13.3, 13.4]
+    highs = [p * 1.02 for p in prices]
+    lows = [p * 0.98 for p in prices]
+    
+    state = IndicatorState()
+    for i in range(len(prices)):
+        indicators = state.update({'close': prices[i], 'high': highs[i], 'low': lows[i]})
+        window = prices[:i + 1]
+        macd = analyzer.calculate_macd(window)
+        kdj = analyzer.calculate_kdj(highs[:i + 1], lows[:i + 1], window)
+        assert abs(indicators['ma20'] - analyzer.calculate_ma(window, 20)) < 1e-9
+        assert abs(indicators['rsi'] - analyzer.calculate_rsi(window)) < 1e-9
+        assert abs(indicators['macd'] - macd['macd']) < 1e-9
+        assert abs(indicators['signal'] - macd['signal']) < 1e-9
+        assert abs(indicators['k'] - kdj['k']) < 1e-9
+        assert abs(indicators['j'] - kdj['j']) < 1e-9
+    
+    print(f"\n增量计算 {state.bar_count} 根K线:")
+    print(f"  RSI: {indicators['rsi']:.2f}  MACD: {indicators['macd']:.4f}  信号线: {indicators['signal']:.4f}")
+    
+    # peek不改变状态
+    before = state.indicators()
+    peeked = state.peek(15.0)
+    assert state.bar_count == len(prices)
+    assert state.indicators() is before
+    assert peeked['price'] == 15.0
+    
+    signals = analyzer.evaluate_signals(indicators)
+    assert signals == analyzer.analyze_buy_sell_signals({'prices': prices, 'highs': highs, 'lows': lows})
+    
+    print("\n✓ 滚动指标状态测试通过")
+
+
 def test_api():
     """测试API接口"""
     print("\n" + "=" * 60)
@@ -122,18 +167,112 @@ def test_monitor():
     print("=" * 60)
     
     # 创建监控对象
-    monitor = StockMonitor()
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+    
+        print(f"\n配置信息:")
+        print(f"  自选股列表: {', '.join(monitor.config['watchlist'])}")
+        print(f"  扫描间隔: {monitor.config['scan_interval']} 秒")
+        print(f"  价格异动阈值: {monitor.config['alert_conditions']['price_change_threshold']}%")
+    
+        # 执行一次扫描测试
+        print(f"\n执行单次扫描测试:")
+        monitor.scan_stocks()
+    
+        print("\n✓ 监控功能测试通过")
+
+
+class FlakyAPI(TongHuaShunAPI):
+    """前几次调用失败的API，用于测试重试"""
+    
+    def __init__(self, news_failures, market_failures=0):
+        super().__init__(batch_size=2)
+        self.news_failures = news_failures
+        self.market_failures = market_failures
+        self.quote_requests = 0
+    
+    def _request_quotes(self, stock_codes):
+        self.quote_requests += 1
+        return super()._request_quotes(stock_codes)
+    
+    def get_market_infos(self, stock_codes, chunk_size=None):
+        if self.market_failures > 0:
+            self.market_failures -= 1
+            raise ConnectionError("模拟批量接口网络错误")
+        return super().get_market_infos(stock_codes, chunk_size)
+    
+    def get_news(self, stock_code, limit=5, since=None):
+        if self.news_failures.get(stock_code, 0) > 0:
+            self.news_failures[stock_code] -= 1
+            raise ConnectionError(f"模拟网络错误 {stock_code}")
+        return super().get_news(stock_code, limit, since)
+
+
+def test_batch_quotes():
+    """测试批量行情接口"""
+    api = TongHuaShunAPI(batch_size=2)
+    codes = ['600000', '000001', '000002', '600519', '000858']
+    
+    assert api.chunk_codes(codes + ['600000']) == [codes[0:2], codes[2:4], codes[4:]]
+    quotes = api.get_realtime_prices(codes)
+    infos = api.get_market_infos(codes, chunk_size=10)
+    assert list(quotes) == codes and list(infos) == codes
+    assert quotes['600519']['code'] == '600519'
+    assert set(quotes['000858']) == set(api.get_realtime_price('000858'))
+    
+    print("\n✓ 批量行情接口测试通过")
+
+
+def test_concurrent_fetch():
+    """测试并发获取、重试与失败隔离"""
+    print("\n" + "=" * 60)
+    print("测试并发获取")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['api_config'] = {'timeout': 5, 'retry_times': 2, 'max_workers': 4}
+        monitor.api = FlakyAPI({'600000': 1, '000001': 10}, market_failures=1)
+    
+        codes = ['600000', '000001', '000002', '600519']
+        results = monitor.fetch_all(codes)
+    
+        assert set(results) == set(codes)
+        assert monitor.api.quote_requests == 2                       # 4只股票分2批
+        assert results['600000']['market_info']['code'] == '600000'  # 重试后成功
+        assert results['600000']['price_data']['code'] == '600000'
+        assert isinstance(results['000001'], ConnectionError)       # 重试耗尽
+        assert results['000002']['history'] is not None
+        print(f"\n成功: {sum(not isinstance(v, Exception) for v in results.values())} 只, "
+              f"失败: {sum(isinstance(v, Exception) for v in results.values())} 只")
+    
+        monitor.config['watchlist'] = codes
+        monitor.scan_stocks()
+        monitor.stop()
+    
+        print("\n✓ 并发获取测试通过")
+
+
+def test_log_redirector():
+    """测试GUI日志重定向队列（多线程写入，主线程批量取出）"""
+    redirector = TextRedirector()
+    
+    def writer(n):
+        for i in range(100):
+            redirector.write(f"{n}-{i}\n")
     
-    print(f"\n配置信息:")
-    print(f"  自选股列表: {', '.join(monitor.config['watchlist'])}")
-    print(f"  扫描间隔: {monitor.config['scan_interval']} 秒")
-    print(f"  价格异动阈值: {monitor.config['alert_conditions']['price_change_threshold']}%")
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
     
-    # 执行一次扫描测试
-    print(f"\n执行单次扫描测试:")
-    monitor.scan_stocks()
+    lines = redirector.drain().splitlines()
+    assert len(lines) == 400
+    assert lines.count('3-99') == 1
+    assert redirector.drain() == ''
     
-    print("\n✓ 监控功能测试通过")
+    print("\n✓ 日志重定向测试通过")
 
 
 def main():
@@ -147,8 +286,12 @@ def main():
     try:
         # 运行各项测试
         test_technical_analysis()
+        test_indicator_state()
         test_api()
+        test_batch_quotes()
         test_monitor()
+        test_concurrent_fetch()
+        test_log_redirector()
         
         print("\n" + "=" * 60)
         print("所有测试通过! ✓")
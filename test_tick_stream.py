@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时行情推送测试脚本
+"""
+
+import sys
+import os
+import json
+import socket
+import tempfile
+import threading
+import time
+
+# 确保可以导入stock_monitor模块
+current_dir = os.path.dirname(os.path.abspath(__file__))
+if current_dir not in sys.path:
+    sys.path.insert(0, current_dir)
+
+from stock_monitor import StockMonitor
+from tick_stream import TickPublisher, TickSubscriber
+from records import Quote
+from seeded_api import SeededAPI
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError("等待超时")
+        time.sleep(0.01)
+
+
+def test_stream():
+    """测试订阅与推送"""
+    print("=" * 60)
+    print("测试行情推送")
+    print("=" * 60)
+
+    publisher = TickPublisher(interval=0.01)
+    host, port = publisher.start()
+    codes = ['600000', '000001', '600519']
+    received = []
+    subscriber = TickSubscriber(host, port, codes, received.append)
+    subscriber.start()
+    try:
+        _wait_until(lambda: len(received) >= 30)
+    finally:
+        subscriber.stop()
+        publisher.stop()
+
+    assert all(isinstance(quote, Quote) for quote in received)
+    assert [quote.code for quote in received[:6]] == codes * 2
+    assert all(quote.low <= quote.price <= quote.high for quote in received)
+    volumes = [quote.volume for quote in received if quote.code == '600000']
+    assert volumes == sorted(volumes)  # 累计成交量只增不减
+    print(f"\n收到 {len(received)} 条行情, 统计: {subscriber.stats}")
+
+    print("\n✓ 行情推送测试通过")
+
+
+def test_backpressure():
+    """测试处理变慢时队列有界，读取线程阻塞等待"""
+    publisher = TickPublisher(interval=0)
+    host, port = publisher.start()
+    subscriber = TickSubscriber(host, port, ['600000', '000001'], lambda quote: time.sleep(0.005), queue_size=5)
+    subscriber.start()
+    try:
+        _wait_until(lambda: subscriber.stats['processed'] >= 50)
+        stats = dict(subscriber.stats)
+        depth = subscriber.queue.qsize()
+    finally:
+        subscriber.stop()
+        publisher.stop()
+
+    print(f"\n推送 {publisher.stats['sent']} 条, 读取 {stats['received']} 条, 处理 {stats['processed']} 条, "
+          f"队列满 {stats['blocked']} 次")
+    assert depth <= 5
+    assert stats['blocked'] > 0
+    assert stats['received'] - stats['processed'] <= 5 + 2  # 队列 + 正在处理 + 等待入队
+
+    print("\n✓ 背压测试通过")
+
+
+def test_bad_lines():
+    """测试格式错误的推送行跳过并计数，不断开连接"""
+    server = socket.create_server(('127.0.0.1', 0))
+    good = json.dumps({'code': '600000', 'name': '浦发银行', 'price': 10.0}).encode('utf-8')
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            conn.recv(65536)  # 订阅请求
+            conn.sendall(b'{"code": "600000", "price": \n' + b'[1, 2]\n' + b'{"price": 10}\n'
+                         + b'\xff\xfe\n' + good + b'\n')
+            time.sleep(1)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    received = []
+    subscriber = TickSubscriber(*server.getsockname()[:2], ['600000'], received.append)
+    subscriber.start()
+    try:
+        _wait_until(lambda: received)
+    finally:
+        subscriber.stop()
+        server.close()
+
+    assert [quote.code for quote in received] == ['600000']
+    assert subscriber.stats['bad_lines'] == 4 and subscriber.stats['reconnects'] == 0
+
+    print("\n✓ 格式错误推送测试通过")
+
+
+def test_monitor_stream():
+    """测试监控程序逐条分析推送行情并检查提醒"""
+    publisher = TickPublisher(interval=0.02)
+    host, port = publisher.start()
+
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001']
+        monitor.config['scan_interval'] = 3600
+        monitor.config['schedule'] = {'market_hours_only': False}
+        monitor.config['stream'] = {'enabled': True, 'host': host, 'port': port, 'queue_size': 100}
+        monitor.config['alert_conditions'] = {'price_change_threshold': 100, 'buy_signal_threshold': 100,
+                                              'sell_signal_threshold': -100}
+        monitor.config['alert_rules'] = [{'name': '推送', 'when': 'price > 0', 'cooldown': 0,
+                                          'message': '推送价格 {price:.2f}'}]
+        monitor.api = SeededAPI()
+        monitor.alert_rules = monitor.load_alert_rules()
+        fired = []
+        monitor.show_alert = lambda name, code, alerts: fired.append((code, alerts))
+
+        monitor.start()
+        try:
+            _wait_until(lambda: (monitor.metrics.get('stream_ticks_total') or 0) >= 20)
+        finally:
+            monitor.stop()
+            publisher.stop()
+
+        streamed = [(code, alerts) for code, alerts in fired if alerts[0].startswith('推送')]
+        assert {code for code, _ in streamed} == {'600000', '000001'}
+        assert len(streamed) >= 20
+        assert set(monitor.indicator_states) == {'600000', '000001'}
+        print(f"\n推送触发提醒 {len(streamed)} 次")
+
+        print("\n✓ 监控推送模式测试通过")
+
+
+def test_reload_stream():
+    """测试热加载开启推送时启动订阅，关闭时停止；移除的股票不再被推送线程重新创建状态"""
+    publisher = TickPublisher(interval=0.01)
+    host, port = publisher.start()
+
+    with tempfile.TemporaryDirectory() as root:
+        monitor = StockMonitor(os.path.join(root, 'config.json'))
+        monitor.config['watchlist'] = ['600000', '000001']
+        monitor.config['alert_rules'] = []
+        monitor.api = SeededAPI()
+        monitor.alert_rules = monitor.load_alert_rules()
+        assert monitor.tick_subscriber is None
+        try:
+            config = dict(monitor.config, stream={'enabled': True, 'host': host, 'port': port})
+            monitor.apply_config(config)
+            assert monitor.tick_subscriber is not None
+            _wait_until(lambda: (monitor.metrics.get('stream_ticks_total') or 0) >= 10)
+
+            monitor.apply_config(dict(config, watchlist=['600000']))
+            subscriber = monitor.tick_subscriber
+            assert subscriber is not None and subscriber.codes == ['600000']
+            _wait_until(lambda: subscriber.stats['processed'] >= 10)
+            assert '000001' not in monitor.indicator_states and not monitor.bars.buffer('000001', '1m')
+
+            monitor.apply_config(dict(config, watchlist=['600000'], stream={'enabled': False}))
+            assert monitor.tick_subscriber is None
+        finally:
+            if monitor.tick_subscriber:
+                monitor.tick_subscriber.stop()
+            monitor.stop_executors()
+            publisher.stop()
+
+    print("\n✓ 热加载推送测试通过")
+
+
+def main():
+    """主测试函数"""
+    try:
+        test_stream()
+        test_backpressure()
+        test_bad_lines()
+        test_monitor_stream()
+        test_reload_stream()
+        print("\n所有测试通过! ✓")
+    except Exception as e:
+        print(f"\n测试失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
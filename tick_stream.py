@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时行情推送（TCP）
+协议为每行一个JSON：客户端连接后发送 {"subscribe": ["600000", ...]}，服务端持续推送行情（Quote字段）。
+
+TickSubscriber 在后台线程读取推送，放入有界队列；队列满时读取线程阻塞，不再从套接字读取，
+由TCP流量控制把压力传回推送端（背压），而不是无限缓存或丢弃行情。
+TickPublisher 是本地模拟推送服务器（行情为 SeededAPI 行情基础上的随机游走），用于测试:
+  python tick_stream.py --port 8901 --interval 0.5
+然后在 config.json 中设置:
+  "stream": {"enabled": true, "host": "127.0.0.1", "port": 8901}
+"""
+
+import argparse
+import json
+import queue
+import random
+import socket
+import socketserver
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from records import Quote
+
+DEFAULT_QUEUE_SIZE = 1000     # 待处理行情队列长度
+RECONNECT_DELAY = 1.0         # 断线后重连的初始等待（秒），之后指数增加到最多30秒
+SOCKET_TIMEOUT = 1.0          # 读取超时，用于及时响应停止
+
+
+def parse_tick(line: bytes) -> Quote:
+    """解析一行推送的行情，不是含股票代码的JSON对象时抛出ValueError"""
+    data = json.loads(line)
+    if not isinstance(data, dict) or not isinstance(data.get('code'), str):
+        raise ValueError(f"无效的推送行情: {line[:100]!r}")
+    return Quote.from_dict(data)
+
+
+class TickSubscriber:
+    """订阅行情推送，行情经有界队列交给处理线程逐条处理"""
+
+    def __init__(self, host: str, port: int, codes: List[str], handler: Callable[[Quote], None],
+                 queue_size: int = DEFAULT_QUEUE_SIZE):
+        self.host = host
+        self.port = port
+        self.codes = list(codes)
+        self.handler = handler
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = {'received': 0, 'processed': 0, 'errors': 0, 'blocked': 0, 'reconnects': 0, 'bad_lines': 0}
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._sock = None
+
+    def start(self):
+        """启动读取线程和处理线程"""
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._read_loop, name='tick-reader', daemon=True),
+                         threading.Thread(target=self._process_loop, name='tick-processor', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5):
+        """停止读取和处理（队列中未处理的行情丢弃）"""
+        self._stop.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=SOCKET_TIMEOUT)
+        sock.sendall((json.dumps({'subscribe': self.codes}) + '\n').encode('utf-8'))
+        return sock
+
+    def _read_loop(self):
+        delay = RECONNECT_DELAY
+        while not self._stop.is_set():
+            try:
+                self._sock = self._connect()
+                delay = RECONNECT_DELAY
+                self._read(self._sock)
+            except OSError as e:
+                if self._stop.is_set():
+                    break
+                print(f"行情推送连接中断: {str(e)}，{delay:.0f}秒后重连")
+            finally:
+                if self._sock is not None:
+                    self._sock.close()
+                    self._sock = None
+            if self._stop.wait(delay):
+                break
+            delay = min(delay * 2, 30)
+            self.stats['reconnects'] += 1
+
+    def _read(self, sock: socket.socket):
+        buffer = b''
+        while not self._stop.is_set():
+            try:
+                chunk = sock.recv(65536)
+            except socket.timeout:
+                continue
+            if not chunk:
+                raise ConnectionError("服务端关闭连接")
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if not line:
+                    continue
+                try:
+                    quote = parse_tick(line)
+                except (ValueError, KeyError, TypeError):
+                    self.stats['bad_lines'] += 1  # 格式错误的行跳过，不断开连接
+                    continue
+                self._enqueue(quote)
+
+    def _enqueue(self, quote: Quote):
+        """放入有界队列；队列满时阻塞等待（背压），直到有空位或停止"""
+        self.stats['received'] += 1
+        try:
+            self.queue.put_nowait(quote)
+            return
+        except queue.Full:
+            self.stats['blocked'] += 1
+        while not self._stop.is_set():
+            try:
+                self.queue.put(quote, timeout=SOCKET_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+    def _process_loop(self):
+        while not self._stop.is_set():
+            try:
+                quote = self.queue.get(timeout=SOCKET_TIMEOUT)
+            except queue.Empty:
+                continue
+            try:
+                self.handler(quote)
+                self.stats['processed'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"处理推送行情 {quote.code} 时出错: {str(e)}")
+
+
+class TickPublisher:
+    """本地模拟行情推送服务器：每个连接按 interval 秒一轮推送所订阅股票的行情"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, interval: float = 0.5, seed: Optional[int] = None):
+        from seeded_api import SeededAPI, DEFAULT_SEED
+
+        self.interval = interval
+        self.data = SeededAPI(seed=DEFAULT_SEED if seed is None else seed)
+        self.stats = {'connections': 0, 'sent': 0}
+        self._lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer((host, port), self._make_handler())
+        self.server.daemon_threads = True
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def address(self) -> tuple:
+        return self.server.server_address[:2]
+
+    def ticks(self, codes: List[str], rng: random.Random):
+        """无限生成行情：以当日模拟行情为起点做随机游走，成交量、最高、最低随之累计"""
+        quotes: Dict[str, Quote] = self.data.get_realtime_prices(codes)
+        while True:
+            batch = []
+            for code in codes:
+                quote = quotes[code]
+                price = round(max(quote.price * (1 + rng.gauss(0, 0.002)), 0.01), 2)
+                change = price - quote.prev_close
+                quote = Quote(code, quote.name, price, change, change / quote.prev_close * 100,
+                              quote.volume + rng.randint(100, 10000) * 100, quote.turnover,
+                              max(quote.high, price), min(quote.low, price), quote.open, quote.prev_close,
+                              int(time.time()))
+                quotes[code] = quote
+                batch.append(quote)
+            yield batch
+
+    def _make_handler(self):
+        publisher = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                request = json.loads(self.rfile.readline() or b'{}')
+                codes = request.get('subscribe', [])
+                with publisher._lock:
+                    publisher.stats['connections'] += 1
+                rng = random.Random(','.join(codes))
+                try:
+                    for batch in publisher.ticks(codes, rng):
+                        data = ''.join(json.dumps(quote.to_dict(), ensure_ascii=False) + '\n' for quote in batch)
+                        self.wfile.write(data.encode('utf-8'))  # 客户端处理不过来时在这里阻塞
+                        with publisher._lock:
+                            publisher.stats['sent'] += len(batch)
+                        if publisher._stopped.wait(publisher.interval):
+                            break
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
+
+    def start(self) -> tuple:
+        """在后台线程中启动，返回 (host, port)"""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.address
+
+    def stop(self):
+        """停止服务器并断开所有连接"""
+        self._stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='本地模拟行情推送服务器')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8901)
+    parser.add_argument('--interval', type=float, default=0.5, help='每轮推送的间隔（秒）')
+    parser.add_argument('--seed', type=int, default=None, help='模拟数据随机种子')
+    args = parser.parse_args()
+
+    publisher = TickPublisher(args.host, args.port, args.interval, args.seed)
+    print(f"模拟行情推送服务器已启动: {args.host}:{publisher.address[1]}")
+    try:
+        publisher.server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n服务器已停止")
+        publisher.server.server_close()
+
+
+if __name__ == "__main__":
+    main()